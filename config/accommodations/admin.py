@@ -1,8 +1,9 @@
 from django.contrib import admin
 
-from .models import Accommodation, AccommodationImage, AccommodationType, StayDate
+from .models import Accommodation, AccommodationImage, AccommodationType, ExchangeRate, StayDate
 
 admin.site.register(Accommodation)
 admin.site.register(AccommodationType)
 admin.site.register(AccommodationImage)
 admin.site.register(StayDate)
+admin.site.register(ExchangeRate)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from bookings.models import BookedNight, claimed_nights
+
+from .models import AvailabilityNight, StayDate
+
+
+ONE_NIGHT = timedelta(days=1)
+
+
+def availability_window():
+    today = timezone.localdate()
+    return today, today + settings.AVAILABILITY_HORIZON
+
+
+def _nights(start, end):
+    night = start
+    while night < end:
+        yield night
+        night += ONE_NIGHT
+
+
+def sync_availability(accommodation_id, date_from=None, date_to=None):
+    """
+    Пересчитывает календарь ночей размещения в полуинтервале [date_from, date_to).
+
+    Ночь считается предложенной, если попадает в одно из окон StayDate (включая end_date),
+    и занятой, если ее занимает неотмененное бронирование или действующее удержание (BookedNight).
+    Календарь хранится только в пределах окна AVAILABILITY_HORIZON от текущей даты.
+    """
+    window_start, window_end = availability_window()
+    date_from = max(date_from or window_start, window_start)
+    date_to = min(date_to or window_end, window_end)
+    if date_from >= date_to:
+        return
+
+    offered = set()
+    stay_dates = StayDate.objects.filter(
+        accommodation_id=accommodation_id,
+        start_date__lt=date_to,
+        end_date__gte=date_from,
+    ).values_list('start_date', 'end_date')
+    for start_date, end_date in stay_dates:
+        offered.update(_nights(max(start_date, date_from), min(end_date + ONE_NIGHT, date_to)))
+
+    booked = set(
+        BookedNight.objects
+        .filter(claimed_nights(accommodation_id, date_from, date_to))
+        .filter(Q(hold__isnull=True) | Q(hold__expires_at__gt=timezone.now()))
+        .values_list('night', flat=True)
+    )
+
+    with transaction.atomic():
+        AvailabilityNight.objects.filter(
+            accommodation_id=accommodation_id,
+            date__gte=date_from,
+            date__lt=date_to,
+        ).delete()
+        AvailabilityNight.objects.bulk_create(
+            [
+                AvailabilityNight(accommodation_id=accommodation_id, date=night, is_booked=night in booked)
+                for night in sorted(offered)
+            ],
+            batch_size=1000,
+        )
+
+
+def extend_availability(date_from):
+    """
+    Достраивает календарь ночами с date_from до конца окна AVAILABILITY_HORIZON - теми, что вошли в окно
+    с прошлого пересчета. Пересчитываются только размещения, окна StayDate которых захватывают эти ночи.
+    Возвращает ID пересчитанных размещений.
+    """
+    _, window_end = availability_window()
+    accommodation_ids = list(
+        StayDate.objects
+        .filter(start_date__lt=window_end, end_date__gte=date_from)
+        .order_by('accommodation_id')
+        .values_list('accommodation_id', flat=True)
+        .distinct()
+    )
+    for accommodation_id in accommodation_ids:
+        sync_availability(accommodation_id, date_from)
+    return accommodation_ids
+
+
+def available_accommodation_ids(check_in_date, check_out_date):
+    """
+    Подзапрос с ID размещений, у которых свободна каждая ночь в [check_in_date, check_out_date).
+    """
+    nights = (check_out_date - check_in_date).days
+    return (
+        AvailabilityNight.objects
+        .filter(date__gte=check_in_date, date__lt=check_out_date, is_booked=False)
+        .values('accommodation_id')
+        .annotate(free_nights=Count('id'))
+        .filter(free_nights=nights)
+        .values('accommodation_id')
+    )
@@ -0,0 +1,192 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from .models import Accommodation, AccommodationImage, AccommodationType, StayDate
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    """
+    Описание импорта одной модели каталога.
+
+    key - натуральный ключ, по которому строка обновляется при повторном импорте (на него есть
+    уникальное ограничение). Размещения идентифицируются внешним ключом external_id. Поле accommodation_type
+    задается названием типа, поле accommodation - external_id размещения.
+    """
+
+    model: type
+    key: tuple
+    fields: tuple
+    references: tuple = field(default=())
+
+
+SPECS = {
+    'accommodation_types': ImportSpec(
+        model=AccommodationType,
+        key=('name',),
+        fields=('name', 'description'),
+    ),
+    'accommodations': ImportSpec(
+        model=Accommodation,
+        key=('external_id',),
+        fields=(
+            'external_id', 'name', 'description', 'city', 'latitude', 'longitude', 'cost', 'currency', 'adults_capacity',
+            'children_capacity', 'breakfast_included', 'kitchen_available', 'bed_type', 'wifi_available',
+            'available', 'rating',
+        ),
+        references=('accommodation_type',),
+    ),
+    'accommodation_images': ImportSpec(
+        model=AccommodationImage,
+        key=('accommodation', 'image'),
+        fields=('image',),
+        references=('accommodation',),
+    ),
+    'stay_dates': ImportSpec(
+        model=StayDate,
+        key=('accommodation', 'start_date', 'end_date'),
+        fields=('start_date', 'end_date'),
+        references=('accommodation',),
+    ),
+}
+
+
+MAX_REPORTED_ERRORS = 100
+
+BOOLEAN_VALUES = {'true': True, 'yes': True, '1': True, 'false': False, 'no': False, '0': False}
+
+
+class RowError(Exception):
+    pass
+
+
+def read_rows(file, file_format):
+    """
+    Построчно читает CSV (с заголовком) или NDJSON, не загружая файл целиком.
+    """
+    if file_format == 'csv':
+        for line_number, row in enumerate(csv.DictReader(file), start=2):
+            yield line_number, row
+        return
+
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, row
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _resolve_accommodation_types(rows):
+    names = {row.get('accommodation_type') for _, row in rows if isinstance(row, dict)}
+    return dict(AccommodationType.objects.filter(name__in=names).values_list('name', 'id'))
+
+
+def _resolve_accommodations(rows):
+    external_ids = {row.get('accommodation') for _, row in rows if isinstance(row, dict)}
+    return dict(Accommodation.objects.filter(external_id__in=external_ids).values_list('external_id', 'id'))
+
+
+def _to_python(model, field_name, value):
+    model_field = model._meta.get_field(field_name)
+    if value in ('', None):
+        if model_field.null:
+            return None
+        if model_field.has_default():
+            return model_field.get_default()
+        raise RowError(f'не заполнено поле {field_name}')
+    if isinstance(model_field, models.BooleanField) and isinstance(value, str):
+        value = BOOLEAN_VALUES.get(value.strip().lower(), value)
+    try:
+        return model_field.to_python(value)
+    except ValidationError as error:
+        raise RowError(f'{field_name}: {"; ".join(error.messages)}')
+    except (TypeError, ValueError):
+        raise RowError(f'{field_name}: некорректное значение {value!r}')
+
+
+def build_objects(spec, rows):
+    """
+    Превращает пачку строк в объекты модели. Возвращает объекты (по одному на натуральный ключ,
+    побеждает последняя строка) и ошибки в виде (номер строки, сообщение).
+    """
+    types = _resolve_accommodation_types(rows) if 'accommodation_type' in spec.references else {}
+    accommodations = _resolve_accommodations(rows) if 'accommodation' in spec.references else {}
+
+    objects = {}
+    errors = []
+    for line_number, row in rows:
+        try:
+            if not isinstance(row, dict):
+                raise RowError('некорректная строка')
+            values = {name: _to_python(spec.model, name, row.get(name)) for name in spec.fields}
+            for name in spec.key:
+                if name in values and values[name] in ('', None):
+                    raise RowError(f'не заполнено поле {name}')
+            if 'accommodation_type' in spec.references:
+                if row.get('accommodation_type') not in types:
+                    raise RowError(f'неизвестный тип размещения {row.get("accommodation_type")!r}')
+                values['accommodation_type_id'] = types[row['accommodation_type']]
+            if 'accommodation' in spec.references:
+                if row.get('accommodation') not in accommodations:
+                    raise RowError(f'неизвестное размещение {row.get("accommodation")!r}')
+                values['accommodation_id'] = accommodations[row['accommodation']]
+        except RowError as error:
+            errors.append((line_number, str(error)))
+            continue
+
+        instance = spec.model(**values)
+        objects[tuple(getattr(instance, spec.model._meta.get_field(name).attname) for name in spec.key)] = instance
+    return list(objects.values()), errors
+
+
+def upsert(spec, objects):
+    update_fields = [name for name in spec.fields if name not in spec.key]
+    if 'accommodation_type' in spec.references:
+        update_fields.append('accommodation_type')
+
+    if update_fields:
+        spec.model.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=list(spec.key),
+            update_fields=update_fields,
+        )
+    else:
+        spec.model.objects.bulk_create(objects, ignore_conflicts=True)
+
+
+def import_rows(spec, rows, batch_size, on_batch=None):
+    """
+    Импортирует строки пачками по batch_size: каждая пачка - один upsert в своей транзакции,
+    поэтому в памяти одновременно находится не больше одной пачки.
+
+    Возвращает число импортированных строк, число ошибочных строк и первые MAX_REPORTED_ERRORS ошибок.
+    """
+    imported = 0
+    error_count = 0
+    errors = []
+    for batch in batched(rows, batch_size):
+        objects, batch_errors = build_objects(spec, batch)
+        with transaction.atomic():
+            upsert(spec, objects)
+        imported += len(objects)
+        error_count += len(batch_errors)
+        errors.extend(batch_errors[:MAX_REPORTED_ERRORS - len(errors)])
+        if on_batch is not None:
+            on_batch(objects, imported, error_count)
+    return imported, error_count, errors
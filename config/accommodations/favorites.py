@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import Accommodation
+
+
+Favorite = Accommodation.is_favorite.through
+
+
+def _cache_key(user_id):
+    return f'favorites:ids:{user_id}'
+
+
+def favorite_ids(user):
+    """
+    Множество ID избранных размещений пользователя из кэша; для анонимного пользователя - пустое.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    key = _cache_key(user.id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Favorite.objects.filter(customuser_id=user.id).values_list('accommodation_id', flat=True))
+        cache.set(key, ids, timeout=settings.FAVORITES_CACHE_TIMEOUT)
+    return ids
+
+
+def invalidate_favorites(*user_ids):
+    keys = [_cache_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def toggle_favorite(user_id, accommodation_id):
+    """
+    Добавляет размещение в избранное или удаляет его оттуда одним SQL-выражением.
+
+    Возвращает True, если размещение добавлено, False - если удалено, и None, если размещения не существует.
+    """
+    accommodation_column = Favorite._meta.get_field('accommodation').column
+    user_column = Favorite._meta.get_field('customuser').column
+    favorite_table = connection.ops.quote_name(Favorite._meta.db_table)
+    accommodation_table = connection.ops.quote_name(Accommodation._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            WITH deleted AS (
+                DELETE FROM {favorite_table}
+                WHERE {accommodation_column} = %(accommodation_id)s AND {user_column} = %(user_id)s
+                RETURNING 1
+            ), inserted AS (
+                INSERT INTO {favorite_table} ({accommodation_column}, {user_column})
+                SELECT id, %(user_id)s FROM {accommodation_table}
+                WHERE id = %(accommodation_id)s AND NOT EXISTS (SELECT 1 FROM deleted)
+                ON CONFLICT DO NOTHING
+                RETURNING 1
+            )
+            SELECT EXISTS (SELECT 1 FROM deleted), EXISTS (SELECT 1 FROM inserted)
+            ''',
+            {'accommodation_id': accommodation_id, 'user_id': user_id},
+        )
+        removed, added = cursor.fetchone()
+
+    invalidate_favorites(user_id)
+    if removed:
+        return False
+    if added:
+        return True
+    # Ничего не изменилось: либо размещения нет, либо его только что добавил параллельный запрос.
+    return True if Accommodation.objects.filter(id=accommodation_id).exists() else None
+
+
+def update_favorites(user_id, add_ids=(), remove_ids=()):
+    """
+    Пакетно добавляет и удаляет размещения из избранного пользователя.
+
+    Возвращает ID добавленных и удаленных размещений, а также ID несуществующих размещений.
+    """
+    requested_ids = set(add_ids) | set(remove_ids)
+    existing_ids = set(Accommodation.objects.filter(id__in=requested_ids).values_list('id', flat=True))
+    add_ids = set(add_ids) & existing_ids
+    remove_ids = (set(remove_ids) & existing_ids) - add_ids
+
+    with transaction.atomic():
+        already_added = set(
+            Favorite.objects
+            .filter(customuser_id=user_id, accommodation_id__in=add_ids)
+            .values_list('accommodation_id', flat=True)
+        )
+        Favorite.objects.bulk_create(
+            [Favorite(customuser_id=user_id, accommodation_id=accommodation_id)
+             for accommodation_id in add_ids - already_added],
+            ignore_conflicts=True,
+        )
+        removed_ids = set(
+            Favorite.objects
+            .filter(customuser_id=user_id, accommodation_id__in=remove_ids)
+            .values_list('accommodation_id', flat=True)
+        )
+        Favorite.objects.filter(customuser_id=user_id, accommodation_id__in=removed_ids).delete()
+        invalidate_favorites(user_id)
+
+    return {
+        'added': sorted(add_ids - already_added),
+        'removed': sorted(removed_ids),
+        'not_found': sorted(requested_ids - existing_ids),
+    }
+
+
+class FavoriteIdsContextMixin:
+    """
+    Передает в контекст сериализатора множество избранных размещений текущего пользователя,
+    чтобы AccommodationSerializer отмечал is_favorite без запроса на каждую строку.
+    """
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['favorite_ids'] = favorite_ids(self.request.user)
+        return context
@@ -0,0 +1,41 @@
+from django_filters import rest_framework as django_filters
+from rest_framework import filters
+
+from .models import Accommodation
+
+
+class AccommodationSearchFilter(django_filters.FilterSet):
+    """
+    Фильтры поиска размещений. Фильтры по стоимости сравнивают цену в базовой валюте.
+    """
+
+    cost__lte = django_filters.NumberFilter(field_name='price_normalized', lookup_expr='lte')
+    cost__gte = django_filters.NumberFilter(field_name='price_normalized', lookup_expr='gte')
+
+    class Meta:
+        model = Accommodation
+        fields = {
+            'accommodation_type__name': ['exact'],
+            'breakfast_included': ['exact'],
+            'kitchen_available': ['exact'],
+            'city': ['exact'],
+        }
+
+
+class AccommodationOrderingFilter(filters.OrderingFilter):
+    """
+    Сортировка поиска: параметр ordering=cost сортирует по цене в базовой валюте.
+    """
+
+    field_aliases = {'cost': 'price_normalized'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering is None:
+            return None
+        return [self.resolve_alias(order) for order in ordering]
+
+    def resolve_alias(self, order):
+        descending = order.startswith('-')
+        field_name = self.field_aliases.get(order.lstrip('-'), order.lstrip('-'))
+        return f'-{field_name}' if descending else field_name
@@ -0,0 +1,52 @@
+from math import cos, radians
+
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def bounding_box_filter(latitude, longitude, radius_km):
+    """
+    Грубый фильтр по прямоугольнику вокруг точки, который использует индекс (latitude, longitude).
+
+    Прямоугольник гарантированно содержит круг радиуса radius_km; у полюсов он расширяется
+    на все долготы, а при пересечении 180-го меридиана разбивается на два диапазона.
+    """
+    delta_latitude = radius_km / KM_PER_DEGREE
+    min_latitude, max_latitude = latitude - delta_latitude, latitude + delta_latitude
+    latitude_filter = Q(latitude__gte=max(min_latitude, -90), latitude__lte=min(max_latitude, 90))
+
+    if min_latitude <= -90 or max_latitude >= 90:
+        return latitude_filter & Q(longitude__isnull=False)
+
+    delta_longitude = radius_km / (KM_PER_DEGREE * cos(radians(latitude)))
+    if delta_longitude >= 180:
+        return latitude_filter & Q(longitude__isnull=False)
+
+    min_longitude, max_longitude = longitude - delta_longitude, longitude + delta_longitude
+    if min_longitude < -180:
+        longitude_filter = Q(longitude__gte=min_longitude + 360) | Q(longitude__lte=max_longitude)
+    elif max_longitude > 180:
+        longitude_filter = Q(longitude__gte=min_longitude) | Q(longitude__lte=max_longitude - 360)
+    else:
+        longitude_filter = Q(longitude__gte=min_longitude, longitude__lte=max_longitude)
+    return latitude_filter & longitude_filter
+
+
+def distance_km(latitude, longitude):
+    """
+    Выражение точного расстояния (формула гаверсинусов) от точки до размещения в километрах.
+    """
+    latitude_value = Value(latitude, output_field=FloatField())
+    longitude_value = Value(longitude, output_field=FloatField())
+    half_delta_latitude = Radians('latitude') / 2 - Radians(latitude_value) / 2
+    half_delta_longitude = Radians('longitude') / 2 - Radians(longitude_value) / 2
+    haversine = (
+        Power(Sin(half_delta_latitude), 2)
+        + Cos(Radians(latitude_value)) * Cos(Radians('latitude')) * Power(Sin(half_delta_longitude), 2)
+    )
+    # Least защищает asin от значений чуть больше 1 из-за погрешности вычислений.
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(haversine), Value(1.0)))
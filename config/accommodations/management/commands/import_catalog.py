@@ -0,0 +1,66 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accommodations.availability import sync_availability
+from accommodations.catalog_import import SPECS, import_rows, read_rows
+from accommodations.models import Accommodation
+from accommodations.pricing import normalize_prices
+from accommodations.search_cache import invalidate_city
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует каталог (типы размещений, размещения, изображения, окна проживания) из CSV или NDJSON. '
+        'Повторный импорт обновляет строки по натуральному ключу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(SPECS), help='Что импортируется.')
+        parser.add_argument('path', help='Путь к файлу .csv или .ndjson.')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], dest='file_format',
+                            help='Формат файла. По умолчанию определяется по расширению.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки upsert (по умолчанию 1000).')
+
+    def handle(self, *args, model, path, file_format=None, batch_size=1000, **options):
+        spec = SPECS[model]
+        file_format = file_format or Path(path).suffix.lstrip('.').lower()
+        if file_format not in ('csv', 'ndjson'):
+            raise CommandError('Укажите формат файла: --format csv или --format ndjson.')
+        if batch_size <= 0:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+
+        started = time.monotonic()
+        currencies = set()
+        accommodation_ids = set()
+
+        def on_batch(objects, imported, error_count):
+            if model == 'accommodations':
+                currencies.update(accommodation.currency for accommodation in objects)
+            elif model == 'stay_dates':
+                accommodation_ids.update(stay_date.accommodation_id for stay_date in objects)
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'{imported} строк импортировано, ошибок: {error_count} ({imported / elapsed:.0f} строк/с)')
+
+        try:
+            with open(path, newline='', encoding='utf-8') as file:
+                imported, error_count, errors = import_rows(spec, read_rows(file, file_format), batch_size, on_batch)
+        except OSError as error:
+            raise CommandError(f'Не удалось прочитать файл: {error}')
+
+        if currencies:
+            normalize_prices(currencies)
+        for accommodation_id in accommodation_ids:
+            sync_availability(accommodation_id)
+        for city in Accommodation.objects.values_list('city', flat=True).distinct():
+            invalidate_city(city)
+
+        for line_number, message in errors:
+            self.stderr.write(f'Строка {line_number}: {message}')
+        if error_count > len(errors):
+            self.stderr.write(f'... и еще {error_count - len(errors)} ошибок.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт {model} завершен за {time.monotonic() - started:.1f} с: {imported} строк, ошибок: {error_count}.'
+        ))
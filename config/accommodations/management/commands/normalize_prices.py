@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from accommodations.models import Accommodation
+from accommodations.pricing import normalize_prices
+from accommodations.search_cache import invalidate_city
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает цены размещений в базовой валюте по текущим курсам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--currency', action='append', dest='currencies',
+                            help='Код валюты (можно указать несколько раз). По умолчанию - все валюты.')
+
+    def handle(self, *args, currencies=None, **options):
+        updated = normalize_prices(currencies)
+
+        for city in Accommodation.objects.values_list('city', flat=True).distinct():
+            invalidate_city(city)
+
+        self.stdout.write(self.style.SUCCESS(f'Цены в базовой валюте пересчитаны для {updated} размещений.'))
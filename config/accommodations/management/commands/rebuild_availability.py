@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accommodations.availability import availability_window, extend_availability, sync_availability
+from accommodations.models import Accommodation, AvailabilityNight
+from accommodations.search_cache import invalidate_city
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает календарь свободных ночей размещений и удаляет прошедшие ночи.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accommodation', type=int, action='append', dest='accommodation_ids',
+                            help='ID размещения (можно указать несколько раз). По умолчанию - все размещения.')
+        parser.add_argument('--interval', type=int,
+                            help='Сдвигать окно календаря каждые INTERVAL секунд, не завершаясь: удалять прошедшие '
+                                 'ночи и достраивать вошедшие в окно. По умолчанию - один раз.')
+
+    def handle(self, *args, accommodation_ids=None, interval=None, **options):
+        previous_end = None
+        while True:
+            window_start, window_end = availability_window()
+            deleted, _ = AvailabilityNight.objects.filter(date__lt=window_start).delete()
+
+            if previous_end is None:
+                # Первый проход пересобирает календарь целиком, следующие только достраивают новые ночи.
+                synced = self.rebuild(accommodation_ids)
+                cities = Accommodation.objects.values_list('city', flat=True).distinct()
+            else:
+                synced = extend_availability(previous_end)
+                cities = Accommodation.objects.filter(id__in=synced).values_list('city', flat=True).distinct()
+            previous_end = window_end
+
+            for city in cities:
+                invalidate_city(city)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'Календарь пересобран для {len(synced)} размещений, удалено прошедших ночей: {deleted}.'
+            ))
+            if interval is None:
+                return
+            time.sleep(interval)
+
+    def rebuild(self, accommodation_ids):
+        if not accommodation_ids:
+            accommodation_ids = Accommodation.objects.order_by('id').values_list('id', flat=True).iterator()
+        synced = []
+        for accommodation_id in accommodation_ids:
+            sync_availability(accommodation_id)
+            synced.append(accommodation_id)
+        return synced
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accommodations.similarity import rebuild_similarity_index
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает индекс похожих размещений.'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rebuilt = rebuild_similarity_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс похожих размещений пересобран для {rebuilt} размещений за {time.monotonic() - started:.1f} с.'
+        ))
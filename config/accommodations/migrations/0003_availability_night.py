@@ -0,0 +1,30 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('is_booked', models.BooleanField(default=False)),
+                ('accommodation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_nights', to='accommodations.accommodation')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('is_booked', False)), fields=['date', 'accommodation'], name='free_night_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='availabilitynight',
+            constraint=models.UniqueConstraint(fields=('accommodation', 'date'), name='unique_accommodation_night'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:35
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0005_accommodation_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarAccommodations',
+            fields=[
+                ('accommodation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity', serialize=False, to='accommodations.accommodation')),
+                ('similar_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)),
+                ('scores', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), default=list, size=None)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['similar_ids'], name='similar_ids_idx')],
+            },
+        ),
+    ]
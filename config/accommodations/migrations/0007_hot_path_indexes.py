@@ -0,0 +1,25 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:38
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accommodations', '0006_similar_accommodations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='accommodation',
+            index=models.Index(fields=['city', 'id'], name='accommodation_city_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='accommodationimage',
+            index=models.Index(fields=['accommodation', 'id'], name='accommodation_image_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:45
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+def normalize_base_currency_prices(apps, schema_editor):
+    Accommodation = apps.get_model('accommodations', 'Accommodation')
+    Accommodation.objects.filter(currency=settings.BASE_CURRENCY).update(price_normalized=models.F('cost'))
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accommodations', '0007_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('currency', models.CharField(max_length=3, primary_key=True, serialize=False)),
+                ('rate', models.DecimalField(decimal_places=8, help_text='Стоимость единицы валюты в базовой валюте', max_digits=18)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='accommodation',
+            name='price_normalized',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.RunPython(normalize_base_currency_prices, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='accommodation',
+            index=models.Index(fields=['city', 'price_normalized', 'id'], name='accommodation_city_price_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='accommodation',
+            index=models.Index(fields=['price_normalized', 'id'], name='accommodation_price_idx'),
+        ),
+    ]
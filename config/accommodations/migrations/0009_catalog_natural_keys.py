@@ -0,0 +1,121 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Размещения, которые до каталога загружались из fixtures.json: id -> название. В каталоге у них
+# external_id seed-001..seed-024 по тому же id.
+SEED_ACCOMMODATIONS = {
+    1: 'iO Hotel Bishkek',
+    2: 'Nomad Inn',
+    3: 'People Hostel',
+    4: 'Novotel Bishkek City Center',
+    5: '281 Hotel',
+    6: 'Hotel Apartment Al-Salam',
+    7: 'Best view in city, secured 24/7',
+    8: 'Solutel Hotel',
+    9: 'Casablanca Apart Hotel',
+    10: 'Golden Hotel',
+    11: 'Terrasse Hotel & Bar',
+    12: 'Discovery Hotel',
+    13: 'Hotel "Тихий Дом Трансфер"',
+    14: 'Hotel Good Night',
+    15: 'В Гостях на Иссык-Куле',
+    16: 'Eco Village Lodge',
+    17: 'Rauza Guest Villa',
+    18: 'Lakeside Villa Issyk Kul',
+    19: 'Villa Karakol',
+    20: 'Особняк на берегу Иссык-куля',
+    21: 'Kanym Guest Complex',
+    22: 'Super View-2 Bedroom Chalet Karakol',
+    23: 'Family club Royal-apricot',
+    24: 'Kegeti Panorama Holiday Chalet',
+}
+
+
+def link_seed_accommodations(apps, schema_editor):
+    """
+    Проставляет external_id размещениям, загруженным из прежнего fixtures.json, чтобы import_catalog
+    обновил их, а не создал дубли. Размещение считается загруженным из фикстур, если и id,
+    и название совпадают с записью фикстур.
+    """
+    Accommodation = apps.get_model('accommodations', 'Accommodation')
+    for accommodation_id, name in SEED_ACCOMMODATIONS.items():
+        Accommodation.objects.filter(id=accommodation_id, name=name, external_id__isnull=True).update(
+            external_id=f'seed-{accommodation_id:03d}',
+        )
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Сливает дубли, которые нарушили бы новые уникальные ограничения: размещения переводятся на самый
+    старый тип с тем же названием, лишние типы удаляются; из повторяющихся изображений и окон проживания
+    размещения остается самая старая запись.
+    """
+    execute = schema_editor.execute
+    execute(
+        """
+        UPDATE accommodations_accommodation accommodation
+        SET accommodation_type_id = kept.id
+        FROM accommodations_accommodationtype duplicate
+        JOIN (SELECT name, min(id) AS id FROM accommodations_accommodationtype GROUP BY name) kept
+            ON kept.name = duplicate.name
+        WHERE accommodation.accommodation_type_id = duplicate.id AND duplicate.id <> kept.id
+        """
+    )
+    execute(
+        """
+        DELETE FROM accommodations_accommodationtype duplicate
+        USING accommodations_accommodationtype kept
+        WHERE duplicate.name = kept.name AND duplicate.id > kept.id
+        """
+    )
+    execute(
+        """
+        DELETE FROM accommodations_accommodationimage duplicate
+        USING accommodations_accommodationimage kept
+        WHERE duplicate.accommodation_id = kept.accommodation_id AND duplicate.image = kept.image
+            AND duplicate.id > kept.id
+        """
+    )
+    execute(
+        """
+        DELETE FROM accommodations_staydate duplicate
+        USING accommodations_staydate kept
+        WHERE duplicate.accommodation_id = kept.accommodation_id AND duplicate.start_date = kept.start_date
+            AND duplicate.end_date = kept.end_date AND duplicate.id > kept.id
+        """
+    )
+    # Отложенные проверки внешних ключей должны сработать до ALTER TABLE в той же транзакции.
+    execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0008_exchange_rates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accommodation',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.RunPython(link_seed_accommodations, migrations.RunPython.noop),
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='accommodationimage',
+            constraint=models.UniqueConstraint(fields=('accommodation', 'image'), name='unique_accommodation_image'),
+        ),
+        migrations.AddConstraint(
+            model_name='accommodationtype',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_accommodation_type_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='staydate',
+            constraint=models.UniqueConstraint(fields=('accommodation', 'start_date', 'end_date'), name='unique_stay_date'),
+        ),
+    ]
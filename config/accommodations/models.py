@@ -1,23 +1,56 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 
 from accounts.models import CustomUser
 
 
+SEARCH_CONFIG = 'russian'
+
+
 class AccommodationType(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='unique_accommodation_type_name'),
+        ]
+
     def __str__(self):
         return self.name
 
 
+def cover_image_prefetch(lookup='images'):
+    """
+    Prefetch первого изображения каждого размещения в атрибут cover_images одним запросом на всю выборку.
+    lookup - путь к изображениям от модели выборки, например 'accommodation__images' для бронирований.
+    """
+    cover_images = AccommodationImage.objects.order_by('id')[:1]
+    return models.Prefetch(lookup, queryset=cover_images, to_attr='cover_images')
+
+
+class AccommodationQuerySet(models.QuerySet):
+    def with_cover_image(self):
+        return self.prefetch_related(cover_image_prefetch())
+
+    def get_by_natural_key(self, external_id):
+        return self.get(external_id=external_id)
+
+
 class Accommodation(models.Model):
+    # Идентификатор размещения во внешнем каталоге, по нему import_catalog обновляет размещения.
+    external_id = models.CharField(max_length=100, unique=True, blank=True, null=True)
     name = models.CharField(max_length=200)
     description = models.TextField()
     city = models.CharField(max_length=100)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
     accommodation_type = models.ForeignKey(AccommodationType, on_delete=models.CASCADE)
     cost = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=3)
+    price_normalized = models.DecimalField(max_digits=14, decimal_places=2, blank=True, null=True, editable=False)
     adults_capacity = models.IntegerField()
     children_capacity = models.IntegerField(blank=True, null=True)
     breakfast_included = models.BooleanField(default=False)
@@ -27,17 +60,91 @@ class Accommodation(models.Model):
     available = models.BooleanField(default=True)
     rating = models.DecimalField(max_digits=3, decimal_places=1)
     is_favorite = models.ManyToManyField(CustomUser, related_name='favorite_accommodations', blank=True)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = AccommodationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='accommodation_search_idx'),
+            models.Index(fields=['latitude', 'longitude'], name='accommodation_location_idx'),
+            models.Index(fields=['city', 'price_normalized', 'id'], name='accommodation_city_price_idx'),
+            models.Index(fields=['price_normalized', 'id'], name='accommodation_price_idx'),
+            models.Index(fields=['city', 'id'], name='accommodation_city_idx'),
+        ]
 
     def __str__(self):
         return f"{self.id} - {self.name} - {self.city} - {self.accommodation_type} - {self.available}"
 
+    def natural_key(self):
+        # Фикстуры ссылаются на размещения каталога по external_id, а не по id.
+        return (self.external_id,)
+
+
+class ExchangeRate(models.Model):
+    currency = models.CharField(max_length=3, primary_key=True)
+    rate = models.DecimalField(max_digits=18, decimal_places=8, help_text='Стоимость единицы валюты в базовой валюте')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.currency} - {self.rate}"
+
 
 class AccommodationImage(models.Model):
     accommodation = models.ForeignKey(Accommodation, related_name='images', on_delete=models.CASCADE)
     image = models.URLField()
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['accommodation', 'image'], name='unique_accommodation_image'),
+        ]
+        indexes = [
+            models.Index(fields=['accommodation', 'id'], name='accommodation_image_idx'),
+        ]
 
 
 class StayDate(models.Model):
     accommodation = models.ForeignKey(Accommodation, related_name='stay_dates', on_delete=models.CASCADE)
     start_date = models.DateField()
     end_date = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['accommodation', 'start_date', 'end_date'], name='unique_stay_date'),
+        ]
+
+
+class AvailabilityNight(models.Model):
+    accommodation = models.ForeignKey(Accommodation, related_name='availability_nights', on_delete=models.CASCADE)
+    date = models.DateField()
+    is_booked = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['accommodation', 'date'], name='unique_accommodation_night'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'accommodation'], condition=models.Q(is_booked=False),
+                         name='free_night_date_idx'),
+        ]
+
+
+class SimilarAccommodations(models.Model):
+    accommodation = models.OneToOneField(Accommodation, primary_key=True, related_name='similarity',
+                                         on_delete=models.CASCADE)
+    similar_ids = ArrayField(models.BigIntegerField(), default=list)
+    scores = ArrayField(models.FloatField(), default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['similar_ids'], name='similar_ids_idx'),
+        ]
@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, When
+
+from .models import Accommodation, ExchangeRate
+
+
+PRICE_PLACES = Decimal('0.01')
+
+
+def exchange_rate(currency):
+    """
+    Курс валюты к базовой валюте BASE_CURRENCY или None, если курс неизвестен.
+    """
+    if currency == settings.BASE_CURRENCY:
+        return Decimal(1)
+    return ExchangeRate.objects.filter(currency=currency).values_list('rate', flat=True).first()
+
+
+def normalized_price(cost, currency):
+    rate = exchange_rate(currency)
+    if rate is None:
+        return None
+    return (Decimal(cost) * rate).quantize(PRICE_PLACES)
+
+
+def normalize_prices(currencies=None):
+    """
+    Пересчитывает цену в базовой валюте одним UPDATE для всех размещений или только для указанных валют.
+
+    Размещения в валютах без курса получают NULL и не попадают под фильтры по цене.
+    """
+    rate = Subquery(ExchangeRate.objects.filter(currency=OuterRef('currency')).values('rate')[:1])
+    price = Case(
+        When(currency=settings.BASE_CURRENCY, then=F('cost')),
+        default=F('cost') * rate,
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    accommodations = Accommodation.objects.all()
+    if currencies is not None:
+        accommodations = accommodations.filter(currency__in=currencies)
+    return accommodations.update(price_normalized=price)
+
@@ -0,0 +1,101 @@
+import time
+import uuid
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+ALL_CITIES = ''
+IGNORED_PARAMS = ('cursor', 'page_size')
+
+
+def _digest(value):
+    return md5(value.encode('utf-8')).hexdigest()
+
+
+def _version_key(city):
+    return f'search:version:{_digest(city)}'
+
+
+def _get_version(city):
+    key = _version_key(city)
+    version = cache.get(key)
+    if version is None:
+        # Версия никогда не переиспользуется, поэтому вытеснение ключа версии не воскрешает старые записи.
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_city(city):
+    """
+    Инвалидирует кэш поиска по городу и поиск без фильтра по городу.
+    """
+    cache.set_many({_version_key(city): uuid.uuid4().hex, _version_key(ALL_CITIES): uuid.uuid4().hex}, timeout=None)
+
+
+def normalize_query(query_params):
+    items = []
+    for name in sorted(query_params):
+        if name in IGNORED_PARAMS:
+            continue
+        values = sorted(value.strip() for value in query_params.getlist(name) if value.strip())
+        items.extend((name, value) for value in values)
+    return urlencode(items)
+
+
+def _cache_key(query_params):
+    city = query_params.get('city', ALL_CITIES).strip()
+    return f'search:ids:{_get_version(city)}:{_digest(normalize_query(query_params))}'
+
+
+def _get_or_compute(key, compute):
+    """
+    Возвращает значение из кэша, пересчитывая его не более чем одним процессом одновременно.
+
+    Запись живет SEARCH_CACHE_TIMEOUT секунд и еще SEARCH_CACHE_STALE_TIMEOUT секунд отдается как
+    устаревшая, пока пересчет выполняет процесс, захвативший блокировку через cache.add.
+    """
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, timeout=settings.SEARCH_CACHE_LOCK_TIMEOUT):
+        try:
+            value = compute()
+            timeout = settings.SEARCH_CACHE_TIMEOUT
+            cache.set(key, (now + timeout, value), timeout=timeout + settings.SEARCH_CACHE_STALE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    if entry is not None:
+        return entry[1]
+
+    deadline = now + settings.SEARCH_CACHE_LOCK_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+    return compute()
+
+
+def search_result_ids(query_params, queryset):
+    """
+    Упорядоченный список ID результатов поиска из кэша.
+
+    Возвращает None, если результатов больше SEARCH_CACHE_MAX_IDS: такие выдачи не кэшируются
+    и постранично читаются из базы.
+    """
+    def compute():
+        ids = list(queryset.values_list('pk', flat=True)[:settings.SEARCH_CACHE_MAX_IDS + 1])
+        if len(ids) > settings.SEARCH_CACHE_MAX_IDS:
+            return None
+        return ids
+
+    return _get_or_compute(_cache_key(query_params), compute)
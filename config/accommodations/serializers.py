@@ -1,19 +1,75 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Accommodation, AccommodationImage
+
+from feedbacks.serializers import FeedbackSerializer
+from uploads.derivatives import variant_url
+from uploads.models import ImageDerivative
+
+from .models import Accommodation, AccommodationImage, AccommodationType, StayDate
 
 
 class AccommodationImageSerializer(serializers.ModelSerializer):
+    """
+    image - оригинал; url и webp_url - вариант размера variant (JPEG и WebP), пока вариант не построен,
+    url указывает на оригинал, а webp_url пуст.
+    """
+
+    variant = 'gallery'
+
+    url = serializers.SerializerMethodField()
+    webp_url = serializers.SerializerMethodField()
+
     class Meta:
         model = AccommodationImage
         fields = [
             'id',
             'accommodation',
-            'image'
+            'image',
+            'url',
+            'webp_url',
+        ]
+
+    def get_url(self, image):
+        return variant_url(image.image, image.variants, self.variant)
+
+    def get_webp_url(self, image):
+        return variant_url(image.image, image.variants, self.variant, ImageDerivative.WEBP)
+
+
+class AccommodationCardImageSerializer(AccommodationImageSerializer):
+    variant = 'card'
+
+
+class AccommodationTypeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AccommodationType
+        fields = [
+            'id',
+            'name',
+            'description',
+        ]
+
+
+class FavoritesBulkUpdateSerializer(serializers.Serializer):
+    add = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list,
+                                max_length=settings.FAVORITES_BULK_MAX_IDS)
+    remove = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list,
+                                   max_length=settings.FAVORITES_BULK_MAX_IDS)
+
+
+class StayDateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StayDate
+        fields = [
+            'start_date',
+            'end_date',
         ]
 
 
 class AccommodationSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    distance_km = serializers.FloatField(read_only=True)
+    is_favorite = serializers.SerializerMethodField()
 
     class Meta:
         model = Accommodation
@@ -27,16 +83,36 @@ class AccommodationSerializer(serializers.ModelSerializer):
             'wifi_available',
             'cost',
             'currency',
+            'price_normalized',
             'available',
+            'latitude',
+            'longitude',
+            'distance_km',
+            'is_favorite',
         ]
 
     def get_image(self, accommodation):
-        images = accommodation.images.order_by('id')
-        return AccommodationImageSerializer(images.first()).data
+        if hasattr(accommodation, 'cover_images'):
+            cover_image = next(iter(accommodation.cover_images), None)
+        else:
+            cover_image = accommodation.images.order_by('id').first()
+        return AccommodationCardImageSerializer(cover_image).data
+
+    def get_is_favorite(self, accommodation):
+        return accommodation.id in self.context.get('favorite_ids', ())
 
 
 class AccommodationDetailSerializer(serializers.ModelSerializer):
+    """
+    Ожидает размещение из AccommodationDetailAPIView.get_queryset: с аннотациями is_favorite_for_user
+    и feedback_count и с заранее загруженными изображениями, окнами проживания и последними отзывами.
+    """
+
     images = AccommodationImageSerializer(many=True, read_only=True)
+    accommodation_type = AccommodationTypeSerializer(read_only=True)
+    stay_dates = StayDateSerializer(source='upcoming_stay_dates', many=True, read_only=True)
+    is_favorite = serializers.BooleanField(source='is_favorite_for_user', read_only=True)
+    feedbacks = serializers.SerializerMethodField()
 
     class Meta:
         model = Accommodation
@@ -45,6 +121,7 @@ class AccommodationDetailSerializer(serializers.ModelSerializer):
             'images',
             'name',
             'description',
+            'accommodation_type',
             'rating',
             'adults_capacity',
             'bed_type',
@@ -52,4 +129,15 @@ class AccommodationDetailSerializer(serializers.ModelSerializer):
             'cost',
             'currency',
             'available',
+            'latitude',
+            'longitude',
+            'stay_dates',
+            'is_favorite',
+            'feedbacks',
         ]
+
+    def get_feedbacks(self, accommodation):
+        return {
+            'count': accommodation.feedback_count,
+            'latest': FeedbackSerializer(accommodation.latest_feedbacks, many=True).data,
+        }
@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from bookings.models import Booking, BookingHold
+
+from .availability import sync_availability
+from .favorites import Favorite, invalidate_favorites
+from .models import Accommodation, ExchangeRate, StayDate
+from .pricing import normalize_prices, normalized_price
+from .search_cache import invalidate_city
+from .similarity import refresh_similarity
+
+
+def invalidate_search_cache(accommodation_id):
+    city = Accommodation.objects.filter(id=accommodation_id).values_list('city', flat=True).first()
+    if city is not None:
+        transaction.on_commit(lambda: invalidate_city(city))
+
+
+@receiver(pre_save, sender=Accommodation)
+def accommodation_price_changed(sender, instance, **kwargs):
+    instance.price_normalized = normalized_price(instance.cost, instance.currency)
+
+
+@receiver(pre_save, sender=Booking)
+def booking_price(sender, instance, raw=False, **kwargs):
+    if raw or not instance._state.adding or instance.price_per_night is not None:
+        return
+    instance.price_per_night = (
+        Accommodation.objects.filter(id=instance.accommodation_id).values_list('price_normalized', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def exchange_rate_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    normalize_prices([instance.currency])
+    cities = Accommodation.objects.filter(currency=instance.currency).values_list('city', flat=True).distinct()
+    for city in cities:
+        transaction.on_commit(lambda city=city: invalidate_city(city))
+
+
+@receiver(post_save, sender=Accommodation)
+@receiver(post_delete, sender=Accommodation)
+def accommodation_changed(sender, instance, raw=False, **kwargs):
+    transaction.on_commit(lambda: invalidate_city(instance.city))
+    if not raw:
+        accommodation_id = instance.id
+        transaction.on_commit(lambda: refresh_similarity(accommodation_id))
+
+
+@receiver(pre_save, sender=StayDate)
+def remember_stay_date(sender, instance, raw=False, **kwargs):
+    instance._availability_snapshot = None
+    if raw or instance._state.adding:
+        return
+    instance._availability_snapshot = (
+        StayDate.objects.filter(pk=instance.pk).values_list('accommodation_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=StayDate)
+@receiver(post_delete, sender=StayDate)
+def stay_date_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Окно могли перенести на другое размещение: его прежний календарь тоже пересчитывается.
+    for accommodation_id in {instance.accommodation_id, getattr(instance, '_availability_snapshot', None)} - {None}:
+        sync_availability(accommodation_id)
+        invalidate_search_cache(accommodation_id)
+
+
+@receiver(pre_save, sender=Booking)
+@receiver(pre_save, sender=BookingHold)
+def remember_booking_dates(sender, instance, raw=False, **kwargs):
+    instance._availability_snapshot = None
+    if raw or instance._state.adding:
+        return
+    instance._availability_snapshot = sender.objects.filter(pk=instance.pk).values_list(
+        'accommodation_id', 'arrival_date', 'departure_date',
+    ).first()
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=BookingHold)
+@receiver(post_delete, sender=BookingHold)
+def booking_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # При изменении дат освобождаются ночи прежнего периода, поэтому пересчитываются оба.
+    periods = {(instance.accommodation_id, instance.arrival_date, instance.departure_date)}
+    previous = getattr(instance, '_availability_snapshot', None)
+    if previous is not None:
+        periods.add(previous)
+    for accommodation_id, arrival_date, departure_date in periods:
+        sync_availability(accommodation_id, arrival_date, departure_date)
+        invalidate_search_cache(accommodation_id)
+
+
+@receiver(m2m_changed, sender=Favorite)
+def favorites_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        invalidate_favorites(instance.pk)
+    elif action == 'pre_clear':
+        invalidate_favorites(*instance.is_favorite.values_list('id', flat=True))
+    else:
+        invalidate_favorites(*pk_set)
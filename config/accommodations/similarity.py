@@ -0,0 +1,181 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .models import Accommodation, SimilarAccommodations
+
+
+FEATURE_FIELDS = (
+    'id',
+    'city',
+    'price_normalized',
+    'adults_capacity',
+    'children_capacity',
+    'rating',
+    'bed_type',
+    'accommodation_type_id',
+    'breakfast_included',
+    'kitchen_available',
+    'wifi_available',
+)
+
+
+def _standardize(column):
+    std = column.std()
+    if std == 0:
+        return np.zeros_like(column)
+    return (column - column.mean()) / std
+
+
+def _one_hot(values):
+    categories = {value: index for index, value in enumerate(sorted(set(values), key=str))}
+    matrix = np.zeros((len(values), len(categories)), dtype=np.float32)
+    matrix[np.arange(len(values)), [categories[value] for value in values]] = 1
+    return matrix
+
+
+def build_feature_matrix(rows):
+    """
+    Матрица признаков размещений одного города: строки нормированы, поэтому скалярное
+    произведение двух строк равно косинусной близости размещений.
+
+    Цена в базовой валюте берется в логарифме (неизвестная цена заменяется средней),
+    вместимость, рейтинг и удобства стандартизуются.
+    """
+    log_price = np.log1p(np.array(
+        [np.nan if row['price_normalized'] is None else float(row['price_normalized']) for row in rows],
+        dtype=np.float64,
+    ))
+    known = ~np.isnan(log_price)
+    log_price[~known] = log_price[known].mean() if known.any() else 0
+
+    numeric = np.column_stack([
+        _standardize(log_price),
+        _standardize(np.array([row['adults_capacity'] for row in rows], dtype=np.float64)),
+        _standardize(np.array([row['children_capacity'] or 0 for row in rows], dtype=np.float64)),
+        _standardize(np.array([float(row['rating']) for row in rows], dtype=np.float64)),
+    ]).astype(np.float32)
+    flags = np.array(
+        [[row['breakfast_included'], row['kitchen_available'], row['wifi_available']] for row in rows],
+        dtype=np.float32,
+    )
+
+    features = np.hstack([
+        numeric,
+        flags,
+        _one_hot([row['bed_type'] for row in rows]),
+        _one_hot([row['accommodation_type_id'] for row in rows]),
+    ])
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return features / norms
+
+
+def _load_city(city):
+    rows = list(Accommodation.objects.filter(city=city).order_by('id').values(*FEATURE_FIELDS))
+    ids = np.array([row['id'] for row in rows], dtype=np.int64)
+    return ids, build_feature_matrix(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+
+
+def _top_k(features, ids, rows):
+    """
+    Ближайшие соседи для строк rows матрицы features, считаются пачками по SIMILARITY_BATCH_SIZE строк.
+    """
+    top_k = min(settings.SIMILARITY_TOP_K, len(ids) - 1)
+    neighbors = {}
+    if top_k <= 0:
+        return {int(ids[row]): ([], []) for row in rows}
+
+    batch_size = settings.SIMILARITY_BATCH_SIZE
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        scores = features[batch] @ features.T
+        scores[np.arange(len(batch)), batch] = -np.inf
+
+        candidates = np.argpartition(scores, -top_k, axis=1)[:, -top_k:]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+        for row, row_candidates, row_scores in zip(batch, candidates, candidate_scores):
+            neighbors[int(ids[row])] = (ids[row_candidates].tolist(), [round(float(s), 6) for s in row_scores])
+    return neighbors
+
+
+def _save(neighbors):
+    SimilarAccommodations.objects.bulk_create(
+        [
+            SimilarAccommodations(accommodation_id=accommodation_id, similar_ids=similar_ids, scores=scores)
+            for accommodation_id, (similar_ids, scores) in neighbors.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['accommodation'],
+        update_fields=['similar_ids', 'scores', 'updated_at'],
+        batch_size=1000,
+    )
+
+
+def rebuild_city(city):
+    ids, features = _load_city(city)
+    if not len(ids):
+        return 0
+    with transaction.atomic():
+        _save(_top_k(features, ids, np.arange(len(ids))))
+    return len(ids)
+
+
+def rebuild_similarity_index():
+    """
+    Полностью пересобирает индекс похожих размещений, город за городом.
+    """
+    rebuilt = 0
+    for city in Accommodation.objects.order_by('city').values_list('city', flat=True).distinct():
+        rebuilt += rebuild_city(city)
+    return rebuilt
+
+
+def refresh_similarity(accommodation_id):
+    """
+    Инкрементально обновляет индекс после изменения или удаления размещения.
+
+    Пересчитываются соседи самого размещения, списки, в которые оно уже входит,
+    и списки его города, в которые оно теперь должно попасть.
+    """
+    referencing = dict(
+        SimilarAccommodations.objects
+        .filter(similar_ids__contains=[accommodation_id])
+        .values_list('accommodation_id', 'accommodation__city')
+    )
+    city = Accommodation.objects.filter(id=accommodation_id).values_list('city', flat=True).first()
+
+    cities = set(referencing.values())
+    if city is not None:
+        cities.add(city)
+
+    for refresh_city in cities:
+        ids, features = _load_city(refresh_city)
+        if not len(ids):
+            continue
+        positions = {int(accommodation): row for row, accommodation in enumerate(ids)}
+        rows = {positions[accommodation] for accommodation in referencing if accommodation in positions}
+
+        if refresh_city == city:
+            changed_row = positions[accommodation_id]
+            rows.add(changed_row)
+            similarity = features @ features[changed_row]
+            current = dict(
+                SimilarAccommodations.objects
+                .filter(accommodation_id__in=ids.tolist())
+                .values_list('accommodation_id', 'scores')
+            )
+            top_k = min(settings.SIMILARITY_TOP_K, len(ids) - 1)
+            for accommodation, row in positions.items():
+                scores = current.get(accommodation)
+                if accommodation != accommodation_id and (
+                    scores is None or len(scores) < top_k or similarity[row] > scores[-1]
+                ):
+                    rows.add(row)
+
+        with transaction.atomic():
+            _save(_top_k(features, ids, np.array(sorted(rows), dtype=np.int64)))
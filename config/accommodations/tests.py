@@ -1,3 +1,697 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from bookings.models import Booking
+from feedbacks.models import Feedback
+
+from .availability import availability_window, extend_availability
+from .models import (
+    Accommodation,
+    AccommodationImage,
+    AccommodationType,
+    AvailabilityNight,
+    ExchangeRate,
+    SimilarAccommodations,
+    StayDate,
+)
+from .search_cache import _get_or_compute
+from .similarity import FEATURE_FIELDS, build_feature_matrix, rebuild_similarity_index
+
+
+def create_accommodation(accommodation_type, **kwargs):
+    fields = {
+        'name': f'Отель {Accommodation.objects.count() + 1}',
+        'description': 'Описание',
+        'city': 'Бишкек',
+        'accommodation_type': accommodation_type,
+        'cost': 100,
+        'currency': 'KGS',
+        'adults_capacity': 2,
+        'bed_type': '2',
+        'rating': 8.5,
+    }
+    fields.update(kwargs)
+    return Accommodation.objects.create(**fields)
+
+
+class AccommodationCoverImageTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+
+    def create_accommodations(self, count):
+        for _ in range(count):
+            accommodation = create_accommodation(self.accommodation_type)
+            AccommodationImage.objects.bulk_create([
+                AccommodationImage(accommodation=accommodation, image=f'https://img.example/{accommodation.id}/{n}.jpg')
+                for n in range(3)
+            ])
+
+    def count_search_queries(self, page_size=20):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('accommodation-search'), {'city': 'Бишкек', 'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_search_query_count_does_not_grow_with_page_size(self):
+        self.create_accommodations(30)
+
+        small_page_queries, _ = self.count_search_queries(page_size=2)
+        large_page_queries, response = self.count_search_queries(page_size=30)
+
+        self.assertEqual(small_page_queries, large_page_queries)
+        self.assertEqual(len(response.json()['results']), 30)
+
+    def test_cover_image_is_first_image(self):
+        self.create_accommodations(1)
+        accommodation = Accommodation.objects.get()
+        first_image = accommodation.images.order_by('id').first()
+
+        _, response = self.count_search_queries()
+
+        self.assertEqual(response.json()['results'][0]['image']['image'], first_image.image)
+
+    def test_accommodation_without_images(self):
+        create_accommodation(self.accommodation_type)
+
+        _, response = self.count_search_queries()
+
+        self.assertEqual(response.json()['results'][0]['image']['image'], '')
+
+
+class AccommodationDetailTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.accommodation = create_accommodation(AccommodationType.objects.create(name='Отель', description='Отель'))
+
+    def get_detail(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('accommodation-detail', args=[self.accommodation.id]))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.json()
+
+    def test_query_count_does_not_grow_with_related_rows(self):
+        empty_queries, _ = self.get_detail()
+
+        today = timezone.localdate()
+        for n in range(5):
+            AccommodationImage.objects.create(accommodation=self.accommodation, image=f'https://img.example/{n}.jpg')
+            StayDate.objects.create(accommodation=self.accommodation, start_date=today + timedelta(days=n * 10),
+                                    end_date=today + timedelta(days=n * 10 + 5))
+            Feedback.objects.create(user=self.user, accommodation=self.accommodation, text=f'Отзыв {n}')
+        self.accommodation.is_favorite.add(self.user)
+
+        queries, data = self.get_detail()
+
+        self.assertEqual(queries, empty_queries)
+        self.assertEqual(len(data['images']), 5)
+        self.assertEqual(len(data['stay_dates']), 5)
+        self.assertEqual(data['accommodation_type']['name'], 'Отель')
+        self.assertTrue(data['is_favorite'])
+        self.assertEqual(data['feedbacks']['count'], 5)
+        self.assertEqual([feedback['text'] for feedback in data['feedbacks']['latest']], ['Отзыв 4', 'Отзыв 3', 'Отзыв 2'])
+
+    def test_anonymous_user_is_not_favorite(self):
+        self.accommodation.is_favorite.add(self.user)
+        self.client.force_authenticate(None)
+
+        _, data = self.get_detail()
+
+        self.assertFalse(data['is_favorite'])
+
+
+class SearchPageMixin:
+    def search_ids(self, params):
+        """
+        Проходит все страницы поиска по ссылкам next и возвращает ID в порядке выдачи.
+        """
+        ids = []
+        response = self.client.get(reverse('accommodation-search'), params)
+        for _ in range(Accommodation.objects.count() + 1):
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.json()['results'])
+            if response.json()['next'] is None:
+                return ids
+            response = self.client.get(response.json()['next'])
+        self.fail(f'Страницы поиска не заканчиваются: {ids}')
+
+
+class FullTextSearchTests(SearchPageMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+
+    def test_q_matches_name_and_description_ranked_by_weight(self):
+        in_description = create_accommodation(self.accommodation_type, description='Тихий дом рядом с озером')
+        in_name = create_accommodation(self.accommodation_type, name='Домик у озера')
+        create_accommodation(self.accommodation_type, name='Горный приют', description='Вид на горы')
+
+        self.assertEqual(self.search_ids({'q': 'озеро'}), [in_name.id, in_description.id])
+        self.assertEqual(self.search_ids({'q': 'озеро -домик'}), [in_description.id])
+
+    def test_equal_rank_results_are_paged_without_gaps(self):
+        accommodations = [
+            create_accommodation(self.accommodation_type, name=f'Домик у озера {n}') for n in range(7)
+        ]
+        expected = sorted(accommodation.id for accommodation in accommodations)
+
+        self.assertEqual(sorted(self.search_ids({'q': 'озеро', 'page_size': 2})), expected)
+        # Без кэша список ID не помещается в SEARCH_CACHE_MAX_IDS, и страницы строятся keyset-запросами
+        # с рангом в курсоре.
+        with self.settings(SEARCH_CACHE_MAX_IDS=1):
+            cache.clear()
+            ids = self.search_ids({'q': 'озеро', 'page_size': 2})
+        self.assertEqual(sorted(ids), expected)
+        self.assertEqual(len(ids), len(expected))
+
+
+class AvailabilitySearchTests(SearchPageMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.today = timezone.localdate()
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        self.accommodations = [create_accommodation(accommodation_type) for _ in range(2)]
+        for accommodation in self.accommodations:
+            StayDate.objects.create(accommodation=accommodation, start_date=self.today,
+                                    end_date=self.today + timedelta(days=60))
+        self.booked, self.free = self.accommodations
+
+    def stay(self, start, nights=1):
+        check_in = self.today + timedelta(days=start)
+        return {'check_in_date': check_in.isoformat(),
+                'check_out_date': (check_in + timedelta(days=nights)).isoformat()}
+
+    def book(self, start, nights):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(user=self.user, accommodation=self.booked,
+                                          arrival_date=self.today + timedelta(days=start),
+                                          departure_date=self.today + timedelta(days=start + nights))
+
+    def test_booked_nights_are_excluded(self):
+        self.book(5, 3)
+
+        self.assertEqual(self.search_ids(self.stay(6)), [self.free.id])
+        self.assertEqual(self.search_ids(self.stay(3, 3)), [self.free.id])
+        self.assertEqual(sorted(self.search_ids(self.stay(8, 2))), sorted([self.booked.id, self.free.id]))
+
+    def test_cancelled_booking_frees_nights(self):
+        booking = self.book(5, 3)
+        self.assertEqual(self.search_ids(self.stay(6)), [self.free.id])
+
+        booking.is_cancelled = True
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+
+        self.assertEqual(sorted(self.search_ids(self.stay(6))), sorted([self.booked.id, self.free.id]))
+
+    def test_moved_booking_frees_previous_nights(self):
+        booking = self.book(5, 3)
+
+        booking.arrival_date = self.today + timedelta(days=20)
+        booking.departure_date = self.today + timedelta(days=22)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+
+        self.assertEqual(sorted(self.search_ids(self.stay(5, 3))), sorted([self.booked.id, self.free.id]))
+        self.assertEqual(self.search_ids(self.stay(21)), [self.free.id])
+
+    def test_stay_date_edits_rebuild_calendar(self):
+        stay_date = StayDate.objects.get(accommodation=self.booked)
+
+        stay_date.end_date = self.today + timedelta(days=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            stay_date.save()
+        self.assertEqual(self.search_ids(self.stay(15)), [self.free.id])
+
+        stay_date.accommodation = self.free
+        stay_date.end_date = self.today + timedelta(days=30)
+        with self.captureOnCommitCallbacks(execute=True):
+            stay_date.save()
+        self.assertEqual(self.search_ids(self.stay(5)), [self.free.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StayDate.objects.create(accommodation=self.booked, start_date=self.today,
+                                    end_date=self.today + timedelta(days=60))
+        self.assertEqual(sorted(self.search_ids(self.stay(15))), sorted([self.booked.id, self.free.id]))
+
+
+    def test_rebuild_prunes_past_nights_and_extend_fills_window_end(self):
+        window_start, window_end = availability_window()
+        with self.captureOnCommitCallbacks(execute=True):
+            StayDate.objects.create(accommodation=self.free, start_date=self.today + timedelta(days=61),
+                                    end_date=window_end + timedelta(days=30))
+        AvailabilityNight.objects.create(accommodation=self.booked, date=window_start - timedelta(days=1))
+        call_command('rebuild_availability', stdout=StringIO())
+        self.assertFalse(AvailabilityNight.objects.filter(date__lt=window_start).exists())
+
+        # Имитируем ночи, вошедшие в окно после прошлого прохода: достраиваются только они.
+        new_nights_from = window_end - timedelta(days=2)
+        AvailabilityNight.objects.filter(date__gte=new_nights_from).delete()
+        self.assertEqual(extend_availability(new_nights_from), [self.free.id])
+        new_nights = AvailabilityNight.objects.filter(date__gte=new_nights_from).order_by('date')
+        self.assertEqual(
+            list(new_nights.values_list('accommodation_id', 'date')),
+            [(self.free.id, new_nights_from), (self.free.id, new_nights_from + timedelta(days=1))],
+        )
+
+class GeoSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+
+    def place(self, latitude, longitude):
+        return create_accommodation(self.accommodation_type, latitude=latitude, longitude=longitude)
+
+    def search(self, **params):
+        return self.client.get(reverse('accommodation-search'), params)
+
+    def test_radius_filter_and_distance_ordering(self):
+        near = self.place(42.880, 74.600)
+        center = self.place(42.875, 74.590)
+        self.place(42.490, 78.390)
+        create_accommodation(self.accommodation_type)
+
+        results = self.search(lat=42.875, lon=74.59, radius_km=5).json()['results']
+
+        self.assertEqual([row['id'] for row in results], [center.id, near.id])
+        self.assertAlmostEqual(results[0]['distance_km'], 0, places=3)
+        self.assertAlmostEqual(results[1]['distance_km'], 0.99, places=2)
+
+    def test_invalid_location_is_rejected(self):
+        for params in (
+            {'lat': 'север', 'lon': 74.59},
+            {'lat': 42.87},
+            {'lat': 91, 'lon': 74.59},
+            {'lat': 42.87, 'lon': -180.5},
+            {'lat': 42.87, 'lon': 74.59, 'radius_km': 0},
+            {'lat': 42.87, 'lon': 74.59, 'radius_km': settings.SEARCH_MAX_RADIUS_KM + 1},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.search(**params).status_code, 400)
+
+    def test_search_across_antimeridian(self):
+        west = self.place(0, 179.98)
+        east = self.place(0, -179.98)
+        self.place(0, 0)
+
+        ids = [row['id'] for row in self.search(lat=0, lon=179.99, radius_km=10).json()['results']]
+
+        self.assertEqual(sorted(ids), sorted([west.id, east.id]))
+
+    def test_search_near_pole_covers_all_longitudes(self):
+        across_pole = self.place(89.98, -170)
+        nearby = self.place(89.95, 10)
+        self.place(89.0, 10)
+
+        ids = [row['id'] for row in self.search(lat=89.97, lon=10, radius_km=20).json()['results']]
+
+        self.assertEqual(ids, [nearby.id, across_pole.id])
+
+
+class SearchFacetsTests(SearchPageMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        hotel = AccommodationType.objects.create(name='Отель', description='Отель')
+        hostel = AccommodationType.objects.create(name='Хостел', description='Хостел')
+        for accommodation_type, cost, currency, breakfast, kitchen, city in (
+            (hotel, 100, 'KGS', True, False, 'Бишкек'),
+            (hotel, 400, 'KGS', True, True, 'Бишкек'),
+            (hotel, 600, 'KGS', False, False, 'Бишкек'),
+            (hostel, 1500, 'KGS', False, True, 'Бишкек'),
+            (hostel, 50, 'XYZ', True, False, 'Бишкек'),
+            (hotel, 700, 'KGS', True, False, 'Ош'),
+        ):
+            create_accommodation(accommodation_type, cost=cost, currency=currency, breakfast_included=breakfast,
+                                 kitchen_available=kitchen, city=city)
+
+    def facets(self, **params):
+        response = self.client.get(reverse('accommodation-search-facets'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_counts_match_filtered_search(self):
+        for params in ({'city': 'Бишкек'}, {'city': 'Бишкек', 'breakfast_included': 'true'}, {'cost__lte': 600}):
+            with self.subTest(params=params):
+                facets = self.facets(**params)
+                found = Accommodation.objects.filter(id__in=self.search_ids(params))
+
+                self.assertEqual(facets['total'], found.count())
+                self.assertEqual(
+                    {row['name']: row['count'] for row in facets['accommodation_types']},
+                    {name: found.filter(accommodation_type__name=name).count()
+                     for name in found.values_list('accommodation_type__name', flat=True).distinct()},
+                )
+                self.assertEqual(facets['breakfast_included'], {
+                    'true': found.filter(breakfast_included=True).count(),
+                    'false': found.filter(breakfast_included=False).count(),
+                })
+                self.assertEqual(facets['kitchen_available']['true'], found.filter(kitchen_available=True).count())
+
+    def test_price_histogram_buckets(self):
+        facets = self.facets(city='Бишкек', price_bucket_size=500)
+
+        # Цена в валюте без курса неизвестна, такое размещение в гистограмму не попадает.
+        self.assertEqual(facets['total'], 5)
+        self.assertEqual(
+            [(row['min'], row['max'], row['count']) for row in facets['price_histogram']],
+            [(0, 500, 2), (500, 1000, 1), (1500, 2000, 1)],
+        )
+        self.assertEqual(facets['accommodation_types'], [{'name': 'Отель', 'count': 3}, {'name': 'Хостел', 'count': 2}])
+
+    def test_invalid_bucket_size_is_rejected(self):
+        for price_bucket_size in ('abc', '0', '-500', 'NaN', 'Infinity'):
+            with self.subTest(price_bucket_size=price_bucket_size):
+                response = self.client.get(reverse('accommodation-search-facets'),
+                                           {'price_bucket_size': price_bucket_size})
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SIMILARITY_TOP_K=2)
+class SimilarityIndexTests(TestCase):
+    def setUp(self):
+        hotel = AccommodationType.objects.create(name='Отель', description='Отель')
+        hostel = AccommodationType.objects.create(name='Хостел', description='Хостел')
+        self.hotel, self.hostel = hotel, hostel
+        self.base = create_accommodation(hotel, cost=1000, adults_capacity=2, rating=8)
+        self.twin = create_accommodation(hotel, cost=1050, adults_capacity=2, rating=8)
+        self.cousin = create_accommodation(hotel, cost=3000, adults_capacity=3, rating=7)
+        self.stranger = create_accommodation(hostel, cost=20000, adults_capacity=6, rating=5, bed_type='1',
+                                             kitchen_available=True)
+        self.elsewhere = create_accommodation(hotel, cost=1000, adults_capacity=2, rating=8, city='Ош')
+
+    def similar_ids(self, accommodation):
+        return SimilarAccommodations.objects.get(accommodation=accommodation).similar_ids
+
+    def test_rebuild_finds_nearest_neighbours_within_city(self):
+        self.assertEqual(rebuild_similarity_index(), 5)
+
+        self.assertEqual(self.similar_ids(self.base), [self.twin.id, self.cousin.id])
+        self.assertEqual(self.similar_ids(self.twin), [self.base.id, self.cousin.id])
+        self.assertNotIn(self.stranger.id, self.similar_ids(self.cousin)[:1])
+        self.assertEqual(self.similar_ids(self.elsewhere), [])
+
+    def test_batched_rebuild_matches_brute_force(self):
+        for n in range(9):
+            create_accommodation(self.hotel if n % 2 else self.hostel, cost=500 + n * 700, adults_capacity=1 + n % 4,
+                                 rating=5 + n % 5, breakfast_included=bool(n % 3))
+        with self.settings(SIMILARITY_BATCH_SIZE=3, SIMILARITY_TOP_K=4):
+            rebuild_similarity_index()
+
+        rows = list(Accommodation.objects.filter(city='Бишкек').order_by('id').values(*FEATURE_FIELDS))
+        features = build_feature_matrix(rows)
+        scores = features @ features.T
+        for row, accommodation in enumerate(rows):
+            expected = sorted((index for index in range(len(rows)) if index != row),
+                              key=lambda index: -scores[row, index])
+            stored = SimilarAccommodations.objects.get(accommodation_id=accommodation['id'])
+            self.assertEqual(len(stored.similar_ids), 4)
+            self.assertAlmostEqual(stored.scores[0], float(scores[row, expected[0]]), places=5)
+            self.assertEqual(sorted(stored.scores, reverse=True), stored.scores)
+            self.assertAlmostEqual(stored.scores[-1], float(scores[row, expected[3]]), places=5)
+
+    def test_saving_and_deleting_updates_referencing_lists(self):
+        rebuild_similarity_index()
+
+        self.stranger.accommodation_type = self.hotel
+        self.stranger.cost, self.stranger.adults_capacity, self.stranger.rating = 1000, 2, 8
+        self.stranger.bed_type, self.stranger.kitchen_available = '2', False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stranger.save()
+        self.assertEqual(set(self.similar_ids(self.base)), {self.twin.id, self.stranger.id})
+        self.assertIn(self.base.id, self.similar_ids(self.stranger))
+
+        twin_id = self.twin.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.twin.delete()
+        self.assertNotIn(twin_id, self.similar_ids(self.base))
+        self.assertFalse(SimilarAccommodations.objects.filter(similar_ids__contains=[twin_id]).exists())
+
+
+class SearchCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        self.accommodation = create_accommodation(self.accommodation_type)
+        self.other_city = create_accommodation(self.accommodation_type, city='Ош')
+
+    def search(self):
+        response = self.client.get(reverse('accommodation-search'), {'city': 'Бишкек'})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_repeated_search_is_served_from_cache(self):
+        first = self.search()
+        hidden = Accommodation.objects.bulk_create([Accommodation(
+            name='Новый отель', description='Описание', city='Бишкек', accommodation_type=self.accommodation_type,
+            cost=100, currency='KGS', adults_capacity=2, bed_type='2', rating=8,
+        )])[0]
+
+        with CaptureQueriesContext(connection) as context:
+            second = self.search()
+
+        self.assertEqual(second, first)
+        self.assertNotIn(hidden.id, second)
+        id_list_limit = f'LIMIT {settings.SEARCH_CACHE_MAX_IDS + 1}'
+        self.assertFalse([query['sql'] for query in context.captured_queries if id_list_limit in query['sql']])
+
+    def test_changes_invalidate_city(self):
+        today = timezone.localdate()
+        changes = {
+            'booking': lambda: Booking.objects.create(
+                user=self.user, accommodation=self.accommodation,
+                arrival_date=today + timedelta(days=3), departure_date=today + timedelta(days=5),
+            ),
+            'stay_date': lambda: StayDate.objects.create(
+                accommodation=self.accommodation, start_date=today, end_date=today + timedelta(days=10),
+            ),
+            'accommodation': lambda: self.accommodation.save(),
+            'exchange_rate': lambda: ExchangeRate.objects.create(currency='KGS', rate=1),
+        }
+        for name, change in changes.items():
+            with self.subTest(name):
+                self.search()
+                hidden = Accommodation.objects.bulk_create([Accommodation(
+                    name=f'Новый отель {name}', description='Описание', city='Бишкек',
+                    accommodation_type=self.accommodation_type, cost=100, currency='KGS', adults_capacity=2,
+                    bed_type='2', rating=8,
+                )])[0]
+                self.assertNotIn(hidden.id, self.search())
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    change()
+
+                self.assertIn(hidden.id, self.search())
+
+    def test_changes_in_other_city_keep_cache(self):
+        first = self.search()
+        Accommodation.objects.bulk_create([Accommodation(
+            name='Новый отель', description='Описание', city='Бишкек', accommodation_type=self.accommodation_type,
+            cost=100, currency='KGS', adults_capacity=2, bed_type='2', rating=8,
+        )])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_city.save()
+
+        self.assertEqual(self.search(), first)
+
+    def test_stale_entry_is_served_while_lock_is_held(self):
+        def unexpected():
+            self.fail('Значение пересчитано, хотя пересчет уже выполняется.')
+
+        cache.set('search:ids:test', (time.time() - 1, [1, 2]), timeout=60)
+        cache.add('search:ids:test:lock', 1)
+        self.assertEqual(_get_or_compute('search:ids:test', unexpected), [1, 2])
+
+        cache.delete('search:ids:test:lock')
+        self.assertEqual(_get_or_compute('search:ids:test', lambda: [3]), [3])
+        self.assertEqual(_get_or_compute('search:ids:test', unexpected), [3])
+
+    def test_missing_entry_is_computed_after_lock_wait(self):
+        cache.add('search:ids:test:lock', 1)
+
+        with self.settings(SEARCH_CACHE_LOCK_TIMEOUT=0.1):
+            self.assertEqual(_get_or_compute('search:ids:test', lambda: [4]), [4])
+
+
+class FavoriteAccommodationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        self.accommodations = [create_accommodation(accommodation_type) for _ in range(3)]
+
+    def search_favorites(self):
+        response = self.client.get(reverse('accommodation-search'), {'city': 'Бишкек'})
+        return {row['id']: row['is_favorite'] for row in response.json()['results']}
+
+    def test_toggle_adds_and_removes(self):
+        url = reverse('toggle-favorite-accommodation', args=[self.accommodations[0].id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url)
+        self.assertEqual(response.json(), {'message': 'Accommodation added to favorites.'})
+        self.assertTrue(self.search_favorites()[self.accommodations[0].id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url)
+        self.assertEqual(response.json(), {'message': 'Accommodation removed from favorites.'})
+        self.assertFalse(self.search_favorites()[self.accommodations[0].id])
+
+    def test_toggle_missing_accommodation(self):
+        response = self.client.patch(reverse('toggle-favorite-accommodation', args=[0]))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_update(self):
+        first, second, third = self.accommodations
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.favorite_accommodations.add(third)
+
+        missing_id = third.id + 1
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('favorite-accommodations-bulk'), {
+                'add': [first.id, second.id, missing_id],
+                'remove': [third.id],
+            }, format='json')
+
+        self.assertEqual(response.json(), {
+            'added': [first.id, second.id],
+            'removed': [third.id],
+            'not_found': [missing_id],
+        })
+        self.assertEqual(self.search_favorites(), {first.id: True, second.id: True, third.id: False})
+
+    def test_orm_changes_invalidate_cache(self):
+        self.assertFalse(any(self.search_favorites().values()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.accommodations[1].is_favorite.add(self.user)
+
+        self.assertTrue(self.search_favorites()[self.accommodations[1].id])
+
+
+class NormalizedPriceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        self.cheap_usd = create_accommodation(accommodation_type, cost=20, currency='USD')
+        self.expensive_usd = create_accommodation(accommodation_type, cost=100, currency='USD')
+        self.kgs = create_accommodation(accommodation_type, cost=5000, currency='KGS')
+
+    def search(self, **params):
+        response = self.client.get(reverse('accommodation-search'), {'city': 'Бишкек', **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_prices_without_rate_are_not_filtered(self):
+        self.assertIsNone(Accommodation.objects.get(id=self.cheap_usd.id).price_normalized)
+        self.assertEqual(self.search(cost__gte=10), [self.kgs.id])
+
+    def test_rate_change_renormalizes_prices(self):
+        with self.settings(BASE_CURRENCY='KGS'):
+            ExchangeRate.objects.create(currency='USD', rate=Decimal('87.5'))
+
+            self.assertEqual(self.search(ordering='cost'), [self.cheap_usd.id, self.kgs.id, self.expensive_usd.id])
+            self.assertEqual(self.search(cost__lte=5000), [self.cheap_usd.id, self.kgs.id])
+
+            response = self.client.get(reverse('accommodation-search'), {'city': 'Бишкек', 'ordering': '-cost'})
+            first = response.json()['results'][0]
+            self.assertEqual((first['cost'], first['currency'], first['price_normalized']), ('100.00', 'USD', '8750.00'))
+
+
+class ImportCatalogTests(TestCase):
+    def write_file(self, suffix, content):
+        file = tempfile.NamedTemporaryFile('w', suffix=suffix, encoding='utf-8', delete=False)
+        self.addCleanup(os.remove, file.name)
+        with file:
+            file.write(content)
+        return file.name
+
+    def import_catalog(self, model, path):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_catalog', model, path, batch_size=2, stdout=stdout, stderr=stderr)
+        return stderr.getvalue()
+
+    def test_reimport_is_idempotent(self):
+        types = self.write_file('.ndjson', '{"name": "Отель", "description": "Отель"}\n')
+        accommodations = self.write_file('.csv', (
+            'external_id,name,description,city,cost,currency,adults_capacity,bed_type,rating,accommodation_type,'
+            'wifi_available\n'
+            'ala-too,Ала-Тоо,Описание,Бишкек,100,KGS,2,2,8.5,Отель,false\n'
+            'ala-too,Ала-Тоо,Новое описание,Бишкек,120,KGS,2,2,8.5,Отель,false\n'
+            'issyk-kul,Иссык-Куль,Описание,Чолпон-Ата,200,KGS,4,2,9.0,Вилла,true\n'
+        ))
+        stay_dates = self.write_file('.ndjson', (
+            '{"accommodation": "ala-too", "start_date": "2030-01-01", "end_date": "2030-01-10"}\n'
+        ))
+
+        for _ in range(2):
+            self.import_catalog('accommodation_types', types)
+            errors = self.import_catalog('accommodations', accommodations)
+            self.import_catalog('stay_dates', stay_dates)
+
+        self.assertIn('Строка 4: неизвестный тип размещения', errors)
+        accommodation = Accommodation.objects.get()
+        self.assertEqual((accommodation.description, accommodation.cost), ('Новое описание', 120))
+        self.assertFalse(accommodation.wifi_available)
+        self.assertEqual(accommodation.price_normalized, 120)
+        self.assertEqual(AccommodationType.objects.count(), 1)
+        self.assertEqual(StayDate.objects.filter(accommodation=accommodation).count(), 1)
+
+    def test_accommodations_are_matched_by_external_id(self):
+        types = self.write_file('.ndjson', '{"name": "Квартира", "description": "Квартира"}\n')
+        accommodations = self.write_file('.ndjson', ''.join(
+            '{"external_id": %s, "name": "Квартира", "description": "Описание", "city": "Бишкек", "cost": "100", '
+            '"currency": "KGS", "adults_capacity": 2, "bed_type": "1", "rating": "8.0", '
+            '"accommodation_type": "Квартира"}\n' % external_id
+            for external_id in ('"flat-1"', '"flat-2"', 'null')
+        ))
+
+        self.import_catalog('accommodation_types', types)
+        errors = self.import_catalog('accommodations', accommodations)
+
+        self.assertIn('Строка 3: не заполнено поле external_id', errors)
+        self.assertEqual(
+            sorted(Accommodation.objects.filter(name='Квартира', city='Бишкек').values_list('external_id', flat=True)),
+            ['flat-1', 'flat-2'],
+        )
+
+    def test_seed_catalog_and_fixtures_do_not_depend_on_ids(self):
+        # Занятые id: фикстуры не должны рассчитывать на то, что размещения каталога получат id по порядку файла.
+        create_accommodation(AccommodationType.objects.create(name='Юрта', description='Юрта'))
+        for _ in range(2):
+            for model in ('accommodation_types', 'accommodations', 'accommodation_images', 'stay_dates'):
+                self.assertEqual(self.import_catalog(model, settings.BASE_DIR / 'catalog' / f'{model}.ndjson'), '')
+        call_command('loaddata', settings.BASE_DIR / 'fixtures.json', verbosity=0)
+
+        self.assertEqual(Accommodation.objects.filter(external_id__startswith='seed-').count(), 24)
+        self.assertEqual(set(Feedback.objects.values_list('accommodation__external_id', flat=True)), {'seed-010'})
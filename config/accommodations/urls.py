@@ -2,19 +2,29 @@ from django.urls import path
 
 from .views import (
     AccommodationSearchAPIView,
+    AccommodationSearchFacetsAPIView,
     ToggleFavoriteAccommodationAPIView,
     FavoriteAccommodationListAPIView,
+    FavoriteAccommodationsBulkUpdateAPIView,
     AccommodationDetailAPIView,
     SimilarAccommodationsListAPIView,
+    AccommodationImagesAddCreateAPIView,
+    AccommodationImagesBatchAddAPIView,
 )
 
 
 urlpatterns = [
     path('search/', AccommodationSearchAPIView.as_view(), name='accommodation-search'),
+    path('search/facets/', AccommodationSearchFacetsAPIView.as_view(), name='accommodation-search-facets'),
     path('<int:id>/toggle_favorite/', ToggleFavoriteAccommodationAPIView.as_view(),
          name='toggle-favorite-accommodation'),
     path('favorite/', FavoriteAccommodationListAPIView.as_view(), name='favorite-accommodations-list'),
+    path('favorite/bulk/', FavoriteAccommodationsBulkUpdateAPIView.as_view(), name='favorite-accommodations-bulk'),
     path('<int:pk>/', AccommodationDetailAPIView.as_view(), name='accommodation-detail'),
     path('similar/<int:accommodation_id>/', SimilarAccommodationsListAPIView.as_view(),
          name='similar-accommodations-list'),
+    path('<int:accommodation_id>/images/', AccommodationImagesAddCreateAPIView.as_view(),
+         name='accommodation-images-add'),
+    path('<int:accommodation_id>/images/batch/', AccommodationImagesBatchAddAPIView.as_view(),
+         name='accommodation-images-batch-add'),
 ]
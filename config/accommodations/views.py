@@ -1,20 +1,125 @@
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import (
+    BigIntegerField, Count, Exists, F, FloatField, Func, IntegerField, OuterRef, Prefetch, Subquery, Value,
+)
+from django.db.models.functions import Cast, Coalesce, Floor
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework import filters
 from django_filters import rest_framework as django_filters
-from rest_framework.generics import get_object_or_404, ListAPIView, RetrieveAPIView, CreateAPIView
+from rest_framework.generics import get_object_or_404, GenericAPIView, ListAPIView, RetrieveAPIView
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+
+from feedbacks.models import Feedback
+from uploads.models import Upload
+from uploads.processing import ALLOWED_CONTENT_TYPES, stage_upload, stage_uploads
+from uploads.serializers import UploadSerializer
+
+from .availability import available_accommodation_ids
+from .favorites import FavoriteIdsContextMixin, toggle_favorite, update_favorites
+from .filters import AccommodationOrderingFilter, AccommodationSearchFilter
+from .geo import bounding_box_filter, distance_km
+from .models import SEARCH_CONFIG, Accommodation, AccommodationImage, SimilarAccommodations, StayDate
+from .search_cache import search_result_ids
+from .serializers import (
+    AccommodationSerializer,
+    AccommodationDetailSerializer,
+    FavoritesBulkUpdateSerializer,
+)
+
+
+class AccommodationSearchMixin:
+    """
+    Общая логика фильтрации поиска размещений для выдачи и фасетов.
+    """
 
-from cloudinary.uploader import upload
+    queryset = Accommodation.objects.with_cover_image()
+    filter_backends = [AccommodationOrderingFilter, django_filters.DjangoFilterBackend]
+    ordering_fields = ['cost']
+    filterset_class = AccommodationSearchFilter
 
-from .models import Accommodation
-from .serializers import AccommodationSerializer, AccommodationImageSerializer, AccommodationDetailSerializer
+    def get_queryset(self):
+        queryset = self.queryset
 
+        q = self.request.query_params.get('q', '').strip()
+        check_in_date = self.request.query_params.get('check_in_date')
+        check_out_date = self.request.query_params.get('check_out_date')
+        num_adults = self.request.query_params.get('num_adults')
+        num_children = self.request.query_params.get('num_children')
+        city = self.request.query_params.get('city')
+        lat = self.request.query_params.get('lat')
+        lon = self.request.query_params.get('lon')
+
+        if check_in_date:
+            check_in_date, check_out_date = self.parse_stay_dates(check_in_date, check_out_date)
+            queryset = queryset.filter(id__in=available_accommodation_ids(check_in_date, check_out_date))
+        if num_adults:
+            queryset = queryset.filter(adults_capacity__gte=num_adults)
+        if num_children:
+            queryset = queryset.filter(children_capacity__gte=num_children)
+        if city:
+            queryset = queryset.filter(city=city)
+        if q:
+            search_query = SearchQuery(q, search_type='websearch', config=SEARCH_CONFIG)
+            queryset = (
+                queryset
+                .filter(search_vector=search_query)
+                # ts_rank возвращает real; в курсор попадает его значение как double, и сравнение с исходным
+                # real никогда не дает равенства. После приведения к double precision значения совпадают.
+                .annotate(search_rank=Cast(SearchRank(F('search_vector'), search_query), FloatField()))
+                .order_by('-search_rank')
+            )
+        if lat or lon:
+            lat, lon, radius_km = self.parse_location(lat, lon, self.request.query_params.get('radius_km'))
+            queryset = (
+                queryset
+                .filter(bounding_box_filter(lat, lon, radius_km))
+                .annotate(distance_km=distance_km(lat, lon))
+                .filter(distance_km__lte=radius_km)
+                .order_by('distance_km')
+            )
 
-class AccommodationSearchAPIView(ListAPIView):
+        return queryset
+
+    @staticmethod
+    def parse_stay_dates(check_in_date, check_out_date):
+        try:
+            check_in = parse_date(check_in_date)
+            check_out = parse_date(check_out_date) if check_out_date else check_in and check_in + timedelta(days=1)
+        except ValueError:
+            check_in = check_out = None
+        if check_in is None or check_out is None:
+            raise ValidationError({'error': 'Даты заезда и выезда должны быть в формате YYYY-MM-DD.'})
+        if check_out <= check_in:
+            raise ValidationError({'error': 'Дата выезда должна быть позже даты заезда.'})
+        return check_in, check_out
+
+    @staticmethod
+    def parse_location(lat, lon, radius_km):
+        try:
+            lat, lon = float(lat), float(lon)
+            radius_km = float(radius_km) if radius_km else settings.SEARCH_DEFAULT_RADIUS_KM
+        except (TypeError, ValueError):
+            raise ValidationError({'error': 'Параметры lat, lon и radius_km должны быть числами.'})
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValidationError({'error': 'Некорректные координаты.'})
+        if not 0 < radius_km <= settings.SEARCH_MAX_RADIUS_KM:
+            raise ValidationError({'error': f'Радиус поиска должен быть от 0 до {settings.SEARCH_MAX_RADIUS_KM} км.'})
+        return lat, lon, radius_km
+
+
+class AccommodationSearchAPIView(FavoriteIdsContextMixin, AccommodationSearchMixin, ListAPIView):
     """
     API для поиска размещений.
 
@@ -24,64 +129,171 @@ class AccommodationSearchAPIView(ListAPIView):
 
     Данный эндпоинт поддерживает параметры фильтрации в запросе, что позволяет точно настроить результаты поиска в соответствии с потребностями пользователя.
 
+    Упорядоченный список найденных размещений кэшируется по нормализованной строке запроса и сбрасывается
+    при изменении размещений, дат проживания или бронирований в городе.
+
     Параметры запроса:
+    - q (str): Полнотекстовый поиск по названию и описанию размещения (поддерживает синтаксис веб-поиска:
+      "кавычки" для фраз, "-слово" для исключения, "or"). Без параметра ordering результаты сортируются по релевантности.
+    - lat (float), lon (float): Координаты центра поиска на карте. Если указаны, возвращаются только размещения
+      в радиусе radius_km, отсортированные по расстоянию (поле distance_km в ответе).
+    - radius_km (float): Радиус поиска в километрах (по умолчанию 10, максимум 200).
     - check_in_date (str): Дата заезда гостей в формате YYYY-MM-DD.
+    - check_out_date (str): Дата выезда гостей в формате YYYY-MM-DD. По умолчанию - следующий день после заезда.
+      Размещение попадает в выдачу, только если свободна каждая ночь между заездом и выездом.
     - num_adults (int): Количество взрослых гостей.
     - num_children (int): Количество детей гостей.
     - city (str): Город, в котором ищется размещение(Доступные города для поиска: Kegeti, Тамга, Каракол, Чолпон-Ата, Бишкек, Dzhetyoguz, Джалал-Абад).
-    - Дополнительные параметры фильтрации, такие как стоимость (cost), тип размещения (accommodation_type__name), наличие завтрака (breakfast_included) и наличие собственной кухни (kitchen_available).
+    - Дополнительные параметры фильтрации, такие как стоимость (cost__gte, cost__lte), тип размещения (accommodation_type__name), наличие завтрака (breakfast_included) и наличие собственной кухни (kitchen_available).
+      Стоимость сравнивается в базовой валюте (BASE_CURRENCY) по текущему курсу, размещения в валютах без курса
+      под фильтр по стоимости не попадают.
+    - page_size (int): Количество размещений на странице (по умолчанию 20, максимум 100).
+    - cursor (str): Курсор страницы из полей "next"/"previous" предыдущего ответа.
+    - ordering (str): Сортировка, например "cost" или "-cost" (по цене в базовой валюте).
 
     Ответы:
-    - 200 OK: В случае успешного выполнения запроса, возвращается список объектов размещений, удовлетворяющих критериям фильтрации.
+    - 200 OK: В случае успешного выполнения запроса, возвращается страница объектов размещений, удовлетворяющих критериям фильтрации.
         Пример ответа:
-        [
-            {
-                "image": {"image": "url_to_image.jpg"},
-                "name": "Название размещения",
-                "rating": 9.5,
-                "adults_capacity": 2,
-                "bed_type": "Двуспальная",
-                "wifi_available": true,
-                "cost": 100.00,
-                "currency": "USD",
-                "available": true
-            },
-            ...
-        ]
-    - 400 Bad Request: В случае некорректного формата запроса или переданных параметров фильтрации.
+        {
+            "next": "https://.../search/?cursor=eyJwIjogWyIxMDAuMDAiLCAxMl19",
+            "previous": null,
+            "results": [
+                {
+                    "image": {"image": "url_to_image.jpg"},
+                    "name": "Название размещения",
+                    "rating": 9.5,
+                    "adults_capacity": 2,
+                    "bed_type": "Двуспальная",
+                    "wifi_available": true,
+                    "cost": 100.00,
+                    "currency": "USD",
+                    "price_normalized": 8700.00,
+                    "available": true,
+                    "is_favorite": false
+                },
+                ...
+            ]
+        }
+    - 400 Bad Request: В случае некорректного формата запроса или переданных параметров фильтрации
+      (например, некорректные даты, дата выезда не позже даты заезда или некорректные координаты).
     - 404 Not Found: В случае, если размещения, удовлетворяющие заданным критериям, не найдены.
     """
 
-    queryset = Accommodation.objects.all()
     serializer_class = AccommodationSerializer
-    filter_backends = [filters.OrderingFilter, django_filters.DjangoFilterBackend]
-    ordering_fields = ['cost']
-    filterset_fields = {
-        'cost': ['lte', 'gte'],
-        'accommodation_type__name': ['exact'],
-        'breakfast_included': ['exact'],
-        'kitchen_available': ['exact'],
-        'city': ['exact'],
-    }
 
-    def get_queryset(self):
-        queryset = self.queryset
+    def paginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return self.paginator.paginate_ordered_ids(
+            queryset,
+            self.request,
+            lambda ordered_queryset: search_result_ids(self.request.query_params, ordered_queryset),
+            view=self,
+        )
 
-        check_in_date = self.request.query_params.get('check_in_date')
-        num_adults = self.request.query_params.get('num_adults')
-        num_children = self.request.query_params.get('num_children')
-        city = self.request.query_params.get('city')
 
-        if check_in_date:
-            queryset = queryset.filter(stay_dates__start_date__lte=check_in_date, stay_dates__end_date__gte=check_in_date)
-        if num_adults:
-            queryset = queryset.filter(adults_capacity__gte=num_adults)
-        if num_children:
-            queryset = queryset.filter(children_capacity__gte=num_children)
-        if city:
-            queryset = queryset.filter(city=city)
+class AccommodationSearchFacetsAPIView(AccommodationSearchMixin, GenericAPIView):
+    """
+    API для получения счетчиков фильтров (фасетов) поиска размещений.
 
-        return queryset
+    Принимает те же параметры фильтрации, что и поиск размещений, и одним агрегирующим запросом
+    возвращает количество подходящих размещений по типам размещения, наличию завтрака и кухни,
+    а также гистограмму цен.
+
+    Параметры запроса:
+    - Все параметры фильтрации эндпоинта поиска размещений.
+    - price_bucket_size (decimal): Ширина интервала гистограммы цен в базовой валюте (по умолчанию 1000).
+
+    Ответы:
+    - 200 OK: Счетчики для текущего набора фильтров.
+        Пример ответа:
+        {
+            "total": 24,
+            "accommodation_types": [{"name": "Отель", "count": 14}, ...],
+            "breakfast_included": {"true": 5, "false": 19},
+            "kitchen_available": {"true": 3, "false": 21},
+            "price_histogram": [{"min": 0, "max": 1000, "count": 10}, ...]
+        }
+    - 400 Bad Request: Некорректные параметры фильтрации или ширина интервала гистограммы.
+    """
+
+    pagination_class = None
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('price_bucket_size', openapi.IN_QUERY, type=openapi.TYPE_NUMBER,
+                              description='Ширина интервала гистограммы цен'),
+        ],
+        responses={
+            200: openapi.Response(
+                description='Счетчики фильтров для текущего набора фильтров',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'total': openapi.Schema(type=openapi.TYPE_INTEGER, description='Количество размещений'),
+                        'accommodation_types': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT), description='Количество по типам размещения'),
+                        'breakfast_included': openapi.Schema(type=openapi.TYPE_OBJECT, description='Количество с завтраком и без'),
+                        'kitchen_available': openapi.Schema(type=openapi.TYPE_OBJECT, description='Количество с кухней и без'),
+                        'price_histogram': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT), description='Гистограмма цен'),
+                    }
+                )
+            ),
+            400: openapi.Response(description='Bad Request - некорректные параметры фильтрации'),
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        price_bucket_size = self.parse_price_bucket_size(request.query_params.get('price_bucket_size'))
+        queryset = self.filter_queryset(self.get_queryset())
+
+        rows = (
+            queryset
+            .order_by()
+            .annotate(price_bucket=Floor(F('price_normalized') / price_bucket_size))
+            .values('accommodation_type__name', 'breakfast_included', 'kitchen_available', 'price_bucket')
+            .annotate(count=Count('id'))
+        )
+
+        total = 0
+        accommodation_types = {}
+        breakfast_included = {'true': 0, 'false': 0}
+        kitchen_available = {'true': 0, 'false': 0}
+        price_histogram = {}
+        for row in rows:
+            count = row['count']
+            total += count
+            type_name = row['accommodation_type__name']
+            accommodation_types[type_name] = accommodation_types.get(type_name, 0) + count
+            breakfast_included['true' if row['breakfast_included'] else 'false'] += count
+            kitchen_available['true' if row['kitchen_available'] else 'false'] += count
+            if row['price_bucket'] is not None:
+                bucket = int(row['price_bucket'])
+                price_histogram[bucket] = price_histogram.get(bucket, 0) + count
+
+        return Response({
+            'total': total,
+            'accommodation_types': [
+                {'name': name, 'count': count}
+                for name, count in sorted(accommodation_types.items(), key=lambda item: (-item[1], item[0]))
+            ],
+            'breakfast_included': breakfast_included,
+            'kitchen_available': kitchen_available,
+            'price_histogram': [
+                {'min': bucket * price_bucket_size, 'max': (bucket + 1) * price_bucket_size, 'count': count}
+                for bucket, count in sorted(price_histogram.items())
+            ],
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def parse_price_bucket_size(price_bucket_size):
+        if not price_bucket_size:
+            return Decimal(settings.FACETS_PRICE_BUCKET_SIZE)
+        try:
+            price_bucket_size = Decimal(price_bucket_size)
+        except InvalidOperation:
+            raise ValidationError({'error': 'Параметр price_bucket_size должен быть числом.'})
+        if not price_bucket_size.is_finite() or price_bucket_size <= 0:
+            raise ValidationError({'error': 'Параметр price_bucket_size должен быть больше нуля.'})
+        return price_bucket_size
 
 
 class ToggleFavoriteAccommodationAPIView(APIView):
@@ -95,7 +307,8 @@ class ToggleFavoriteAccommodationAPIView(APIView):
     идентификатором размещения в качестве части URL.
 
     При успешном добавлении размещения в избранное, сервер возвращает сообщение об успешном добавлении
-    или удалении размещения в/из избранного со статусом 200 OK.
+    или удалении размещения в/из избранного со статусом 200 OK. Переключение выполняется одним
+    SQL-выражением, поэтому параллельные запросы не оставляют избранное в противоречивом состоянии.
 
     Если размещение с указанным идентификатором не найдено, сервер возвращает статус 404 Not Found.
 
@@ -131,22 +344,61 @@ class ToggleFavoriteAccommodationAPIView(APIView):
         },
     )
     def patch(self, request, id):
-        user = request.user
-
-        try:
-            accommodation = Accommodation.objects.get(id=id)
-        except Accommodation.DoesNotExist:
+        added = toggle_favorite(request.user.id, id)
+        if added is None:
             return Response({'error': 'Accommodation not found.'}, status=status.HTTP_404_NOT_FOUND)
-
-        if not accommodation.is_favorite.filter(id=user.id).exists():
-            accommodation.is_favorite.add(user)
+        if added:
             return Response({'message': 'Accommodation added to favorites.'}, status=status.HTTP_200_OK)
-        else:
-            accommodation.is_favorite.remove(user)
-            return Response({'message': 'Accommodation removed from favorites.'}, status=status.HTTP_200_OK)
+        return Response({'message': 'Accommodation removed from favorites.'}, status=status.HTTP_200_OK)
 
 
-class FavoriteAccommodationListAPIView(ListAPIView):
+class FavoriteAccommodationsBulkUpdateAPIView(APIView):
+    """
+    API для пакетного добавления и удаления размещений в/из избранного.
+
+    Параметры запроса:
+    - add (list[int]): ID размещений, которые нужно добавить в избранное.
+    - remove (list[int]): ID размещений, которые нужно удалить из избранного.
+    Каждый список содержит не больше FAVORITES_BULK_MAX_IDS элементов; если ID есть в обоих списках,
+    размещение добавляется.
+
+    Ответы:
+        - 200 OK: Изменения применены.
+            {
+                "added": [1, 2],
+                "removed": [5],
+                "not_found": [100]
+            }
+        - 400 Bad Request: Некорректный формат запроса.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=FavoritesBulkUpdateSerializer,
+        responses={
+            200: openapi.Response(
+                description='OK - изменения применены',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'added': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER), description='Добавленные размещения'),
+                        'removed': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER), description='Удаленные размещения'),
+                        'not_found': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER), description='Несуществующие размещения'),
+                    }
+                )
+            ),
+            400: openapi.Response(description='Bad Request - неверный формат запроса'),
+        },
+    )
+    def post(self, request):
+        serializer = FavoritesBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = update_favorites(request.user.id, serializer.validated_data['add'], serializer.validated_data['remove'])
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class FavoriteAccommodationListAPIView(FavoriteIdsContextMixin, ListAPIView):
     """
     API для вывода списка избранных отелей пользователя.
 
@@ -154,6 +406,7 @@ class FavoriteAccommodationListAPIView(ListAPIView):
 
     Ответы:
         - 200 OK: Список избранных отелей успешно получен.
+            Ответ постраничный: {"next": "...", "previous": "...", "results": [...]}, см. параметры cursor и page_size.
     """
 
     serializer_class = AccommodationSerializer
@@ -164,7 +417,7 @@ class FavoriteAccommodationListAPIView(ListAPIView):
     )
     def get_queryset(self):
         user = self.request.user
-        return user.favorite_accommodations.all()
+        return user.favorite_accommodations.with_cover_image()
 
 
 class AccommodationDetailAPIView(RetrieveAPIView):
@@ -173,14 +426,59 @@ class AccommodationDetailAPIView(RetrieveAPIView):
 
     Пользователи могут использовать этот эндпоинт для просмотра подробной информации о конкретном размещении.
 
+    Размещение, его тип, количество отзывов и признак избранного (через EXISTS) читаются одним запросом,
+    изображения, окна проживания и последние отзывы догружаются по одному запросу на каждый список,
+    поэтому число запросов не зависит от размера этих списков.
+
     Ответы:
-        - 200 OK: Возвращает детальную информацию об отеле, включая его изображения и указание на то, добавлен ли отель в избранное пользователем.
+        - 200 OK: Возвращает детальную информацию об отеле, включая его тип, изображения, ближайшие окна проживания,
+          сводку отзывов (количество и последние отзывы) и указание на то, добавлен ли отель в избранное пользователем.
         - 404 Not Found: Размещение с указанным идентификатором не найдено.
     """
 
-    queryset = Accommodation.objects.all()
     serializer_class = AccommodationDetailSerializer
 
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_authenticated:
+            is_favorite = Exists(Accommodation.is_favorite.through.objects.filter(
+                accommodation_id=OuterRef('pk'),
+                customuser_id=user.id,
+            ))
+        else:
+            is_favorite = Value(False)
+
+        feedback_count = (
+            Feedback.objects
+            .filter(accommodation_id=OuterRef('pk'))
+            .order_by()
+            .values('accommodation_id')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        latest_feedbacks = (
+            Feedback.objects
+            .select_related('user')
+            .order_by('-id')[:settings.DETAIL_LATEST_FEEDBACKS]
+        )
+        return (
+            Accommodation.objects
+            .select_related('accommodation_type')
+            .annotate(
+                is_favorite_for_user=is_favorite,
+                feedback_count=Coalesce(Subquery(feedback_count), 0),
+            )
+            .prefetch_related(
+                Prefetch('images', queryset=AccommodationImage.objects.order_by('id')),
+                Prefetch(
+                    'stay_dates',
+                    queryset=StayDate.objects.filter(end_date__gte=timezone.localdate()).order_by('start_date'),
+                    to_attr='upcoming_stay_dates',
+                ),
+                Prefetch('feedback_set', queryset=latest_feedbacks, to_attr='latest_feedbacks'),
+            )
+        )
+
     @swagger_auto_schema(
         responses={
             200: openapi.Response(
@@ -189,6 +487,7 @@ class AccommodationDetailAPIView(RetrieveAPIView):
                     type=openapi.TYPE_OBJECT,
                     properties={
                         'name': openapi.Schema(type=openapi.TYPE_STRING, description='Название отеля'),
+                        'accommodation_type': openapi.Schema(type=openapi.TYPE_OBJECT, description='Тип размещения (id, name, description)'),
                         'rating': openapi.Schema(type=openapi.TYPE_NUMBER, description='Рейтинг отеля'),
                         'adults_capacity': openapi.Schema(type=openapi.TYPE_INTEGER, description='Вместимость для взрослых'),
                         'bed_type': openapi.Schema(type=openapi.TYPE_STRING, description='Тип кровати'),
@@ -197,7 +496,9 @@ class AccommodationDetailAPIView(RetrieveAPIView):
                         'currency': openapi.Schema(type=openapi.TYPE_STRING, description='Валюта'),
                         'available': openapi.Schema(type=openapi.TYPE_BOOLEAN, description='Доступность размещения'),
                         'images': openapi.Schema(type=openapi.TYPE_ARRAY, description='Список изображений отеля', items=openapi.Schema(type=openapi.TYPE_STRING)),
+                        'stay_dates': openapi.Schema(type=openapi.TYPE_ARRAY, description='Текущие и будущие окна проживания (start_date, end_date)', items=openapi.Schema(type=openapi.TYPE_OBJECT)),
                         'is_favorite': openapi.Schema(type=openapi.TYPE_BOOLEAN, description='Добавлен ли отель в избранное текущим пользователем'),
+                        'feedbacks': openapi.Schema(type=openapi.TYPE_OBJECT, description='Сводка отзывов: количество (count) и последние отзывы (latest)'),
                     }
                 )
             ),
@@ -205,48 +506,140 @@ class AccommodationDetailAPIView(RetrieveAPIView):
         }
     )
     def get(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
+        return self.retrieve(request, *args, **kwargs)
 
-        is_favorite = False
-        if request.user.is_authenticated:
-            is_favorite = instance.is_favorite.filter(id=request.user.id).exists()
 
-        data = serializer.data
-        data['is_favorite'] = is_favorite
+class AccommodationImagesAddCreateAPIView(APIView):
+    """
+    API для добавления изображения размещения (только для персонала).
 
-        return Response(data, status=status.HTTP_200_OK)
+    Параметры:
+    - accommodation_id (int): ID размещения.
+    - image (file): Изображение формата PNG/JPEG.
 
+    Изображение принимается в обработку и загружается в хранилище в фоне; статус загрузки можно
+    получить по адресу uploads/<id>/. После загрузки изображение появляется в списке изображений размещения.
 
-class AccommodationImagesAddCreateAPIView(CreateAPIView):
-    serializer_class = AccommodationImageSerializer
+    Ответы:
+    - 202 Accepted: Изображение принято в обработку, в поле "data" - статус загрузки.
+    - 400 Bad Request: Изображение не передано или имеет неверный формат.
+    - 403 Forbidden: Пользователь не является персоналом.
+    - 404 Not Found: Размещение не найдено.
+    """
 
-    def create(self, request, *args, **kwargs):
-        accommodation_id = self.kwargs['accommodation_id']
-        request.data['accommodation'] = accommodation_id
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('image', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True,
+                              description='Изображение формата PNG/JPEG'),
+        ],
+        responses={
+            202: openapi.Response(description='Изображение принято в обработку', schema=UploadSerializer()),
+            400: openapi.Response(description='Изображение не передано или имеет неверный формат'),
+            404: openapi.Response(description='Размещение не найдено'),
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        accommodation = Accommodation.objects.filter(id=self.kwargs['accommodation_id']).first()
+        if accommodation is None:
+            return Response({'error': 'Размещение не найдено'}, status=status.HTTP_404_NOT_FOUND)
         image = request.FILES.get('image')
-        image_allowed_formats = ['image/png', 'image/jpeg']
-        if image.content_type not in image_allowed_formats:
+        if image is None or image.content_type not in ALLOWED_CONTENT_TYPES:
             return Response({'message': 'Неверный формат изображения. Допускаются только форматы PNG и JPEG.'},
                             status=status.HTTP_400_BAD_REQUEST)
-        image_response = upload(image, folder="accommodation_images/", resource_type='auto')
-        request.data['image'] = image_response['secure_url']
-        serializer = AccommodationImageSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response({'message': 'Изображение успешно добавлено', 'data': serializer.data}, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        upload = stage_upload(image, request.user, Upload.ACCOMMODATION_IMAGE, accommodation=accommodation)
+        return Response({'message': 'Изображение принято в обработку', 'data': UploadSerializer(upload).data},
+                        status=status.HTTP_202_ACCEPTED)
+
+
+class AccommodationImagesBatchAddAPIView(APIView):
+    """
+    API для пакетного добавления изображений размещения (только для персонала).
+
+    Параметры:
+    - accommodation_id (int): ID размещения.
+    - images (file, несколько): Изображения формата PNG/JPEG, не больше UPLOAD_BATCH_MAX_FILES за запрос.
+
+    Все файлы проверяются до загрузки: если хотя бы один файл имеет неверный формат, пакет не принимается.
+    Принятые файлы загружаются в хранилище в фоне параллельно, изображения добавляются к размещению одной
+    вставкой после загрузки. Статус каждого файла можно получить по адресу uploads/<id>/.
+
+    Ответы:
+    - 202 Accepted: Изображения приняты в обработку, в поле "data" - статус загрузки для каждого файла.
+    - 400 Bad Request: Файлы не переданы, их слишком много или некоторые имеют неверный формат (поле "files").
+    - 403 Forbidden: Пользователь не является персоналом.
+    - 404 Not Found: Размещение не найдено.
+    """
+
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('images', openapi.IN_FORM, type=openapi.TYPE_ARRAY, required=True,
+                              items=openapi.Items(type=openapi.TYPE_FILE), collection_format='multi',
+                              description='Изображения формата PNG/JPEG'),
+        ],
+        responses={
+            202: openapi.Response(
+                description='Изображения приняты в обработку',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'data': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            description='Имя файла (file) и статус его загрузки (upload)',
+                            items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                        ),
+                    },
+                ),
+            ),
+            400: openapi.Response(description='Файлы не переданы, их слишком много или они имеют неверный формат'),
+            404: openapi.Response(description='Размещение не найдено'),
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        accommodation = Accommodation.objects.filter(id=self.kwargs['accommodation_id']).first()
+        if accommodation is None:
+            return Response({'error': 'Размещение не найдено'}, status=status.HTTP_404_NOT_FOUND)
+        images = request.FILES.getlist('images')
+        if not images:
+            return Response({'error': 'Не переданы изображения'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(images) > settings.UPLOAD_BATCH_MAX_FILES:
+            return Response({'error': f'Можно загрузить не больше {settings.UPLOAD_BATCH_MAX_FILES} изображений за раз'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        invalid_files = [
+            {'file': image.name, 'error': 'Неверный формат изображения. Допускаются только форматы PNG и JPEG.'}
+            for image in images if image.content_type not in ALLOWED_CONTENT_TYPES
+        ]
+        if invalid_files:
+            return Response({'error': 'Некоторые изображения имеют неверный формат', 'files': invalid_files},
+                            status=status.HTTP_400_BAD_REQUEST)
 
+        uploads = stage_uploads(images, request.user, Upload.ACCOMMODATION_IMAGE, accommodation=accommodation)
+        return Response({
+            'message': 'Изображения приняты в обработку',
+            'data': [{'file': image.name, 'upload': UploadSerializer(upload).data}
+                     for image, upload in zip(images, uploads)],
+        }, status=status.HTTP_202_ACCEPTED)
 
-class SimilarAccommodationsListAPIView(ListAPIView):
+
+class SimilarAccommodationsListAPIView(FavoriteIdsContextMixin, ListAPIView):
     """
     API для получения списка похожих размещений.
 
     Параметры:
-    - accommodation_id (int): ID размещения, для которого нужно найти похожие (отели в том же самом городе).
+    - accommodation_id (int): ID размещения, для которого нужно найти похожие.
+
+    Похожие размещения берутся из заранее посчитанного индекса (косинусная близость по цене, вместимости,
+    рейтингу, типу кровати, удобствам и типу размещения в том же городе) и отдаются от самых похожих.
+    Если индекс для размещения еще не построен, возвращаются размещения в том же городе.
 
     Ответы:
-    - 200 OK: Список похожих размещений.
+    - 200 OK: Список похожих размещений (постранично, в поле "results"; см. параметры cursor и page_size).
         - image (str): URL изображения размещения.
         - name (str): Название размещения.
         - rating (float): Рейтинг размещения.
@@ -256,6 +649,7 @@ class SimilarAccommodationsListAPIView(ListAPIView):
         - cost (float): Стоимость размещения.
         - currency (str): Валюта стоимости.
         - available (bool): Доступность размещения.
+        - is_favorite (bool): Добавлено ли размещение в избранное текущим пользователем.
     - 404: Если размещение с предоставленным ID не существует.
     """
 
@@ -264,6 +658,25 @@ class SimilarAccommodationsListAPIView(ListAPIView):
     def get_queryset(self):
         accommodation_id = self.kwargs['accommodation_id']
         accommodation = get_object_or_404(Accommodation, id=accommodation_id)
-        city_accommodations = Accommodation.objects.filter(city=accommodation.city)
-        return city_accommodations.exclude(id=accommodation_id)
+        similar_ids = (
+            SimilarAccommodations.objects.filter(accommodation_id=accommodation_id)
+            .values_list('similar_ids', flat=True).first()
+        )
+        if similar_ids is None:
+            city_accommodations = Accommodation.objects.filter(city=accommodation.city).with_cover_image()
+            return city_accommodations.exclude(id=accommodation_id)
+
+        similarity_rank = Func(
+            Value(similar_ids, output_field=ArrayField(BigIntegerField())),
+            F('id'),
+            function='array_position',
+            output_field=IntegerField(),
+        )
+        return (
+            Accommodation.objects
+            .filter(id__in=similar_ids)
+            .annotate(similarity_rank=similarity_rank)
+            .order_by('similarity_rank')
+            .with_cover_image()
+        )
 
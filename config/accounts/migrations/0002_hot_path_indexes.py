@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:38
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='otp',
+            index=models.Index(fields=['user', 'title'], name='otp_user_title_idx'),
+        ),
+    ]
@@ -13,6 +13,7 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     )
     email = models.EmailField(unique=True)
     image = models.URLField(blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     phone_number = PhoneNumberField(blank=True, null=True, unique=True)
     birthday = models.DateField(blank=True, null=True)
     email_confirmed = models.BooleanField(default=False)
@@ -35,3 +36,8 @@ class OTP(models.Model):
     title = models.CharField(max_length=128)
     value = models.IntegerField(blank=True, null=True)
     expired_date = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'title'], name='otp_user_title_idx'),
+        ]
@@ -3,6 +3,9 @@ import re
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from uploads.derivatives import variant_url
+from uploads.models import ImageDerivative
+
 from .models import CustomUser
 from .utils import create_and_send_otp
 
@@ -76,14 +79,30 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    image_url = serializers.SerializerMethodField()
+    image_webp_url = serializers.SerializerMethodField()
+
     class Meta:
         model = CustomUser
         fields = [
             'username',
             'image',
+            'image_url',
+            'image_webp_url',
             'full_name',
             'email',
             'phone_number',
             'birthday',
             'email_confirmed'
-        ]
\ No newline at end of file
+        ]
+
+    def get_image_url(self, user):
+        return variant_url(user.image, user.image_variants, 'avatar')
+
+    def get_image_webp_url(self, user):
+        return variant_url(user.image, user.image_variants, 'avatar', ImageDerivative.WEBP)
+
+    def update(self, instance, validated_data):
+        if 'image' in validated_data and validated_data['image'] != instance.image:
+            instance.image_variants = {}
+        return super().update(instance, validated_data)
@@ -8,7 +8,9 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.views import TokenObtainPairView
-from cloudinary.uploader import upload
+from uploads.models import Upload
+from uploads.processing import ALLOWED_CONTENT_TYPES, stage_upload
+from uploads.serializers import UploadSerializer
 
 from .models import CustomUser, OTP
 from .serializers import (
@@ -456,7 +458,8 @@ class UserProfileGetAPIView(APIView):
     - username: Строка до 150 символов.
     - full_name: Строка до 150 символов, может быть пустым.
     - email: Строка, представляющая действительный email адрес. Уникальное значение.
-    - image: Изображение формата PNG/JPEG.
+    - image: Изображение формата PNG/JPEG. Загружается в фоне: в ответе поле "image_upload" содержит
+      статус загрузки (см. uploads/<id>/), фото появится в профиле после ее завершения.
     - phone_number: Строка в международном формате, может быть пустым. Уникальное значение.
     - birthday: Дата в формате "YYYY-MM-DD", может быть пустым.
     - email_confirmed: Булево значение. True, если email подтвержден, иначе False.
@@ -504,12 +507,11 @@ class UserProfileUpdateAPIView(APIView):
         user = request.user
         image = request.FILES.get('image')
         if image:
-            image_allowed_formats = ['image/png', 'image/jpeg']
-            if image.content_type not in image_allowed_formats:
+            if image.content_type not in ALLOWED_CONTENT_TYPES:
                 return Response({'message': 'Неверный формат изображения. Допускаются только форматы PNG и JPEG.'},
                                 status=status.HTTP_400_BAD_REQUEST)
-            image_response = upload(image, folder="profiles_images/", resource_type='auto')
-            request.data['image'] = image_response['secure_url']
+            # Фото загружается в хранилище в фоне и записывается в профиль после загрузки.
+            request.data.pop('image')
         if 'email' not in request.data:
             request.data['email'] = user.email
         if 'username' not in request.data:
@@ -517,7 +519,11 @@ class UserProfileUpdateAPIView(APIView):
         serializer = UserProfileSerializer(user, data=request.data)
         if serializer.is_valid():
             serializer.save()
-            return Response(serializer.data)
+            data = serializer.data
+            if image:
+                upload = stage_upload(image, user, Upload.PROFILE_IMAGE)
+                data = {**data, 'image_upload': UploadSerializer(upload).data}
+            return Response(data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -0,0 +1,6 @@
+from django.contrib import admin
+
+from .models import DailyAccommodationStats, DailyCityStats
+
+admin.site.register(DailyAccommodationStats)
+admin.site.register(DailyCityStats)
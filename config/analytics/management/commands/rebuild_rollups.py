@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from accommodations.models import Accommodation
+from analytics.models import DailyAccommodationStats, DailyCityStats
+from analytics.rollups import rebuild_accommodation_stats, rebuild_city_stats
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает дневные показатели по бронированиям: сначала показатели размещений пачками '
+            'по --chunk-size размещений, затем показатели городов пачками по --chunk-days дней.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accommodation', type=int, action='append', dest='accommodation_ids',
+                            help='ID размещения (можно указать несколько раз). По умолчанию - все размещения.')
+        parser.add_argument('--chunk-size', type=int, default=settings.ANALYTICS_REBUILD_CHUNK_SIZE,
+                            help='Число размещений в одной транзакции.')
+        parser.add_argument('--chunk-days', type=int, default=settings.ANALYTICS_REBUILD_CHUNK_DAYS,
+                            help='Число дней показателей городов в одной транзакции.')
+
+    def handle(self, *args, accommodation_ids=None, chunk_size=None, chunk_days=None, **options):
+        if not accommodation_ids:
+            accommodation_ids = Accommodation.objects.order_by('id').values_list('id', flat=True).iterator()
+
+        rebuilt = 0
+        chunk = []
+        for accommodation_id in accommodation_ids:
+            chunk.append(accommodation_id)
+            if len(chunk) == chunk_size:
+                rebuild_accommodation_stats(chunk)
+                rebuilt += len(chunk)
+                chunk = []
+        if chunk:
+            rebuild_accommodation_stats(chunk)
+            rebuilt += len(chunk)
+        self.stdout.write(f'Показатели пересобраны для {rebuilt} размещений.')
+
+        # Пересобирается весь период, в котором есть показатели размещений или городов, чтобы убрать
+        # строки городов, для которых показателей размещений больше нет.
+        bounds = [
+            model.objects.aggregate(date_from=Min('date'), date_to=Max('date'))
+            for model in (DailyAccommodationStats, DailyCityStats)
+        ]
+        dates_from = [bound['date_from'] for bound in bounds if bound['date_from'] is not None]
+        dates_to = [bound['date_to'] for bound in bounds if bound['date_to'] is not None]
+        chunks = 0
+        if dates_from:
+            date_from, date_to = min(dates_from), max(dates_to) + timedelta(days=1)
+            while date_from < date_to:
+                chunk_end = min(date_from + timedelta(days=chunk_days), date_to)
+                rebuild_city_stats(date_from, chunk_end)
+                date_from = chunk_end
+                chunks += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Показатели городов пересобраны ({chunks} пачек).'))
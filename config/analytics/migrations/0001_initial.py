@@ -0,0 +1,53 @@
+# Generated by Django 5.0.3 on 2026-10-17 05:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accommodations', '0010_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAccommodationStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked_nights', models.IntegerField(default=0)),
+                ('cancelled_nights', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('accommodation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='accommodations.accommodation')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyCityStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked_nights', models.IntegerField(default=0)),
+                ('cancelled_nights', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('city', models.CharField(max_length=100)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='daily_city_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailycitystats',
+            constraint=models.UniqueConstraint(fields=('city', 'date'), name='unique_daily_city_stats'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyaccommodationstats',
+            index=models.Index(fields=['date'], name='daily_accommodation_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyaccommodationstats',
+            constraint=models.UniqueConstraint(fields=('accommodation', 'date'), name='unique_daily_accommodation_stats'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import models
+
+from accommodations.models import Accommodation
+
+
+class DailyStats(models.Model):
+    """
+    Дневные показатели по ночам проживания: занятые ночи, отмененные ночи и выручка в базовой валюте.
+
+    Строки обновляются приращениями при создании и отмене бронирований (analytics.rollups), поэтому
+    отчеты не сканируют бронирования.
+    """
+
+    date = models.DateField()
+    booked_nights = models.IntegerField(default=0)
+    cancelled_nights = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailyAccommodationStats(DailyStats):
+    accommodation = models.ForeignKey(Accommodation, on_delete=models.CASCADE, related_name='daily_stats')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['accommodation', 'date'], name='unique_daily_accommodation_stats'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='daily_accommodation_date_idx'),
+        ]
+
+
+class DailyCityStats(DailyStats):
+    city = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['city', 'date'], name='unique_daily_city_stats'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='daily_city_date_idx'),
+        ]
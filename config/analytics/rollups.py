@@ -0,0 +1,150 @@
+from django.db import connection, transaction
+
+from accommodations.models import Accommodation
+from bookings.models import Booking
+
+from .models import DailyAccommodationStats, DailyCityStats
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+# Ночи из выборки deltas (accommodation_id, arrival_date, departure_date, price, booked, cancelled)
+# вместе с городом размещения. Ночь departure_date не входит в проживание.
+NIGHTS_SQL = '''
+    SELECT d.accommodation_id, a.city, night::date AS night, d.booked, d.cancelled,
+           d.booked * COALESCE(d.price, 0) AS revenue
+    FROM deltas d
+    JOIN {accommodation_table} a ON a.id = d.accommodation_id
+    CROSS JOIN generate_series(
+        d.arrival_date::timestamp, d.departure_date::timestamp - interval '1 day', interval '1 day'
+    ) AS night
+'''
+
+DELTAS_SQL = '''
+    SELECT * FROM unnest(%s::bigint[], %s::date[], %s::date[], %s::numeric[], %s::int[], %s::int[])
+        AS d(accommodation_id, arrival_date, departure_date, price, booked, cancelled)
+'''
+
+BOOKINGS_SQL = '''
+    SELECT accommodation_id, arrival_date, departure_date, price_per_night AS price,
+           CASE WHEN is_cancelled THEN 0 ELSE 1 END AS booked,
+           CASE WHEN is_cancelled THEN 1 ELSE 0 END AS cancelled
+    FROM {booking_table}
+    WHERE accommodation_id = ANY(%s)
+'''
+
+
+def _upsert_sql(table, key):
+    """
+    Прибавляет ночи из выборки nights к строкам таблицы table с ключом (key, date).
+    Строки вставляются в порядке ключа, поэтому параллельные транзакции блокируют их в одном порядке.
+    """
+    return f'''
+        INSERT INTO {table} ({key}, "date", booked_nights, cancelled_nights, revenue)
+        SELECT {key}, night, SUM(booked), SUM(cancelled), SUM(revenue)
+        FROM nights
+        GROUP BY {key}, night
+        ORDER BY {key}, night
+        ON CONFLICT ({key}, "date") DO UPDATE SET
+            booked_nights = {table}.booked_nights + EXCLUDED.booked_nights,
+            cancelled_nights = {table}.cancelled_nights + EXCLUDED.cancelled_nights,
+            revenue = {table}.revenue + EXCLUDED.revenue
+    '''
+
+
+def booking_snapshot(booking):
+    """
+    Поля бронирования, от которых зависят показатели.
+    """
+    return (booking.accommodation_id, booking.arrival_date, booking.departure_date,
+            booking.price_per_night, booking.is_cancelled)
+
+
+def booking_delta(snapshot, sign=1):
+    """
+    Приращение показателей от бронирования: неотмененное занимает свои ночи и приносит выручку,
+    отмененное учитывается только в отмененных ночах. sign = -1 убирает бронирование из показателей.
+    """
+    accommodation_id, arrival_date, departure_date, price, is_cancelled = snapshot
+    booked, cancelled = (0, 1) if is_cancelled else (1, 0)
+    return accommodation_id, arrival_date, departure_date, price, sign * booked, sign * cancelled
+
+
+def apply_booking_deltas(deltas):
+    """
+    Применяет приращения к дневным показателям размещений и городов одним SQL-выражением
+    (INSERT ... ON CONFLICT DO UPDATE). Вызывается в транзакции, изменившей бронирования,
+    поэтому показатели фиксируются вместе с ними.
+    """
+    deltas = list(deltas)
+    if not deltas:
+        return
+    nights = NIGHTS_SQL.format(accommodation_table=_table(Accommodation))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            WITH deltas AS ({DELTAS_SQL}), nights AS ({nights}), by_accommodation AS (
+                {_upsert_sql(_table(DailyAccommodationStats), 'accommodation_id')}
+                RETURNING 1
+            )
+            {_upsert_sql(_table(DailyCityStats), 'city')}
+            ''',
+            [list(column) for column in zip(*deltas)],
+        )
+
+
+def record_bookings(bookings):
+    """
+    Добавляет в показатели новые бронирования, например созданные через bulk_create без сигналов.
+    """
+    apply_booking_deltas(booking_delta(booking_snapshot(booking)) for booking in bookings)
+
+
+def _lock(model):
+    # Блокировка не мешает чтению, но ждет транзакции, которые сейчас меняют показатели, и не пускает
+    # новые до конца пересборки пачки: приращения не теряются и не учитываются дважды.
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {_table(model)} IN SHARE ROW EXCLUSIVE MODE')
+
+
+def rebuild_accommodation_stats(accommodation_ids):
+    """
+    Пересчитывает показатели размещений accommodation_ids по их бронированиям в одной транзакции.
+    """
+    accommodation_ids = list(accommodation_ids)
+    nights = NIGHTS_SQL.format(accommodation_table=_table(Accommodation))
+    bookings = BOOKINGS_SQL.format(booking_table=_table(Booking))
+    with transaction.atomic():
+        _lock(DailyAccommodationStats)
+        DailyAccommodationStats.objects.filter(accommodation_id__in=accommodation_ids).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                WITH deltas AS ({bookings}), nights AS ({nights})
+                {_upsert_sql(_table(DailyAccommodationStats), 'accommodation_id')}
+                ''',
+                [accommodation_ids],
+            )
+
+
+def rebuild_city_stats(date_from, date_to):
+    """
+    Пересчитывает показатели городов за полуинтервал [date_from, date_to) из показателей размещений.
+    """
+    with transaction.atomic():
+        _lock(DailyCityStats)
+        DailyCityStats.objects.filter(date__gte=date_from, date__lt=date_to).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {_table(DailyCityStats)} (city, "date", booked_nights, cancelled_nights, revenue)
+                SELECT a.city, s."date", SUM(s.booked_nights), SUM(s.cancelled_nights), SUM(s.revenue)
+                FROM {_table(DailyAccommodationStats)} s
+                JOIN {_table(Accommodation)} a ON a.id = s.accommodation_id
+                WHERE s."date" >= %s AND s."date" < %s
+                GROUP BY a.city, s."date"
+                ''',
+                [date_from, date_to],
+            )
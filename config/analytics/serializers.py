@@ -0,0 +1,28 @@
+from django.conf import settings
+from rest_framework.serializers import CharField, DateField, DecimalField, IntegerField, Serializer, ValidationError
+
+
+class DailyStatsQuerySerializer(Serializer):
+    date_from = DateField()
+    date_to = DateField()
+    city = CharField(required=False)
+    accommodation = IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs['date_to'] < attrs['date_from']:
+            raise ValidationError({'date_to': 'Конец периода должен быть не раньше его начала.'})
+        if (attrs['date_to'] - attrs['date_from']).days >= settings.ANALYTICS_MAX_DAYS:
+            raise ValidationError({'date_to': f'Период не может быть длиннее {settings.ANALYTICS_MAX_DAYS} дней.'})
+        if 'city' in attrs and 'accommodation' in attrs:
+            raise ValidationError('Укажите либо город, либо размещение.')
+        return attrs
+
+
+class StatsSerializer(Serializer):
+    booked_nights = IntegerField()
+    cancelled_nights = IntegerField()
+    revenue = DecimalField(max_digits=16, decimal_places=2)
+
+
+class DailyStatsSerializer(StatsSerializer):
+    date = DateField()
@@ -0,0 +1,45 @@
+from django.db import models
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from accommodations.models import Accommodation
+from bookings.models import Booking
+
+from .rollups import apply_booking_deltas, booking_delta, booking_snapshot
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking(sender, instance, raw=False, **kwargs):
+    instance._rollup_snapshot = None
+    if raw or instance._state.adding:
+        return
+    instance._rollup_snapshot = Booking.objects.filter(pk=instance.pk).values_list(
+        'accommodation_id', 'arrival_date', 'departure_date', 'price_per_night', 'is_cancelled',
+    ).first()
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_snapshot', None)
+    current = booking_snapshot(instance)
+    if previous == current:
+        return
+    deltas = [booking_delta(current)]
+    if previous is not None:
+        deltas.insert(0, booking_delta(previous, sign=-1))
+    apply_booking_deltas(deltas)
+
+
+def _deleted_with_accommodation(origin):
+    model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    return issubclass(model, Accommodation)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, origin=None, **kwargs):
+    # Показатели удаляемого размещения удаляются каскадом вместе с ним.
+    if origin is not None and _deleted_with_accommodation(origin):
+        return
+    apply_booking_deltas([booking_delta(booking_snapshot(instance), sign=-1)])
@@ -0,0 +1,135 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from accommodations.models import AccommodationType
+from accommodations.tests import create_accommodation
+from bookings.models import Booking
+
+from .models import DailyAccommodationStats, DailyCityStats
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        self.accommodation = create_accommodation(accommodation_type, cost=100)
+        self.other = create_accommodation(accommodation_type, cost=250)
+
+    def book(self, accommodation, arrival_date, departure_date):
+        response = self.client.post(reverse('booking_create'), {
+            'accommodation': accommodation.id,
+            'arrival_date': arrival_date,
+            'departure_date': departure_date,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return Booking.objects.latest('id')
+
+    def accommodation_stats(self, accommodation):
+        return list(
+            DailyAccommodationStats.objects.filter(accommodation=accommodation).order_by('date')
+            .values_list('date', 'booked_nights', 'cancelled_nights', 'revenue')
+        )
+
+    def city_stats(self):
+        return list(
+            DailyCityStats.objects.order_by('city', 'date')
+            .values_list('city', 'date', 'booked_nights', 'cancelled_nights', 'revenue')
+        )
+
+    def test_booking_adds_its_nights(self):
+        self.book(self.accommodation, '2030-01-10', '2030-01-12')
+
+        self.assertEqual(self.accommodation_stats(self.accommodation), [
+            (date(2030, 1, 10), 1, 0, Decimal('100.00')),
+            (date(2030, 1, 11), 1, 0, Decimal('100.00')),
+        ])
+        self.assertEqual(self.city_stats(), [
+            ('Бишкек', date(2030, 1, 10), 1, 0, Decimal('100.00')),
+            ('Бишкек', date(2030, 1, 11), 1, 0, Decimal('100.00')),
+        ])
+
+    def test_cancellation_moves_nights_at_booked_price(self):
+        booking = self.book(self.accommodation, '2030-01-10', '2030-01-11')
+        self.accommodation.cost = 300
+        self.accommodation.save()
+
+        response = self.client.patch(reverse('cancel-booking', kwargs={'booking_id': booking.id}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.accommodation_stats(self.accommodation), [(date(2030, 1, 10), 0, 1, Decimal('0.00'))])
+
+    def test_batch_booking_is_counted(self):
+        response = self.client.post(reverse('booking-batch-create'), {'items': [
+            {'accommodation': self.accommodation.id, 'arrival_date': '2030-01-10', 'departure_date': '2030-01-11'},
+            {'accommodation': self.other.id, 'arrival_date': '2030-01-10', 'departure_date': '2030-01-11'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.city_stats(), [('Бишкек', date(2030, 1, 10), 2, 0, Decimal('350.00'))])
+
+    def test_rebuild_restores_incremental_rollups(self):
+        self.book(self.accommodation, '2030-01-10', '2030-01-13')
+        cancelled = self.book(self.other, '2030-01-12', '2030-01-14')
+        self.client.patch(reverse('cancel-booking', kwargs={'booking_id': cancelled.id}))
+        expected = (self.accommodation_stats(self.accommodation), self.accommodation_stats(self.other),
+                    self.city_stats())
+        DailyAccommodationStats.objects.update(booked_nights=7, revenue=0)
+        DailyCityStats.objects.create(city='Ош', date=date(2030, 2, 1), booked_nights=1)
+
+        call_command('rebuild_rollups', chunk_size=1, chunk_days=2, stdout=io.StringIO())
+
+        self.assertEqual((self.accommodation_stats(self.accommodation), self.accommodation_stats(self.other),
+                          self.city_stats()), expected)
+
+
+class DailyStatsAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = CustomUser.objects.create_user(username='staff', email='staff@example.com', password='password',
+                                                    is_staff=True)
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        self.accommodation = create_accommodation(accommodation_type)
+        DailyAccommodationStats.objects.create(accommodation=self.accommodation, date=date(2030, 1, 10),
+                                               booked_nights=1, revenue=100)
+        DailyCityStats.objects.bulk_create([
+            DailyCityStats(city='Бишкек', date=date(2030, 1, 10), booked_nights=3, revenue=300),
+            DailyCityStats(city='Ош', date=date(2030, 1, 10), booked_nights=1, cancelled_nights=2, revenue=50),
+            DailyCityStats(city='Ош', date=date(2030, 1, 12), booked_nights=2, revenue=80),
+        ])
+
+    def get(self, **params):
+        return self.client.get(reverse('analytics-daily'), {'date_from': '2030-01-10', 'date_to': '2030-01-12',
+                                                             **params})
+
+    def test_staff_only(self):
+        user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client.force_authenticate(user)
+
+        self.assertEqual(self.get().status_code, 403)
+
+    def test_all_cities_with_empty_days(self):
+        self.client.force_authenticate(self.staff)
+
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['totals'], {'booked_nights': 6, 'cancelled_nights': 2, 'revenue': '430.00'})
+        self.assertEqual([(day['date'], day['booked_nights']) for day in response.json()['days']],
+                         [('2030-01-10', 4), ('2030-01-11', 0), ('2030-01-12', 2)])
+
+    def test_city_and_accommodation_filters(self):
+        self.client.force_authenticate(self.staff)
+
+        self.assertEqual(self.get(city='Ош').json()['totals']['booked_nights'], 3)
+        self.assertEqual(self.get(accommodation=self.accommodation.id).json()['totals']['revenue'], '100.00')
+        self.assertEqual(self.get(city='Ош', accommodation=self.accommodation.id).status_code, 400)
+        self.assertEqual(self.get(date_to='2029-12-31').status_code, 400)
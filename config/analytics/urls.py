@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import DailyStatsAPIView
+
+urlpatterns = [
+    path('daily/', DailyStatsAPIView.as_view(), name='analytics-daily'),
+]
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Sum
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import DailyAccommodationStats, DailyCityStats
+from .serializers import DailyStatsQuerySerializer, DailyStatsSerializer, StatsSerializer
+
+
+METRICS = ('booked_nights', 'cancelled_nights', 'revenue')
+
+STATS_SCHEMA = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'booked_nights': openapi.Schema(type=openapi.TYPE_INTEGER, description='Занятые ночи'),
+        'cancelled_nights': openapi.Schema(type=openapi.TYPE_INTEGER, description='Ночи отмененных бронирований'),
+        'revenue': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DECIMAL,
+                                  description='Выручка в базовой валюте'),
+    },
+)
+
+
+def _empty_day(day):
+    return {'date': day, 'booked_nights': 0, 'cancelled_nights': 0, 'revenue': Decimal('0')}
+
+
+class DailyStatsAPIView(APIView):
+    """
+    API дневных показателей загрузки и выручки для персонала.
+
+    Показатели читаются только из дневных сводок (analytics.models), бронирования не сканируются.
+
+    Параметры запроса:
+    - date_from, date_to (string): Период в формате "YYYY-MM-DD", границы включаются.
+    - city (string, необязательно): Город.
+    - accommodation (integer, необязательно): ID размещения.
+    Без города и размещения возвращаются показатели по всем городам.
+
+    Ответы:
+    - 200 OK: Показатели за каждый день периода в поле "days" и итоги в поле "totals".
+    - 400 Bad Request: Некорректный период или указаны одновременно город и размещение.
+    - 403 Forbidden: Показатели доступны только персоналу.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self, params):
+        if 'accommodation' in params:
+            queryset = DailyAccommodationStats.objects.filter(accommodation_id=params['accommodation'])
+        elif 'city' in params:
+            queryset = DailyCityStats.objects.filter(city=params['city'])
+        else:
+            queryset = DailyCityStats.objects.all()
+        return queryset.filter(date__gte=params['date_from'], date__lte=params['date_to'])
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('date_from', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE,
+                              required=True, description='Начало периода (включительно)'),
+            openapi.Parameter('date_to', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE,
+                              required=True, description='Конец периода (включительно)'),
+            openapi.Parameter('city', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='Город'),
+            openapi.Parameter('accommodation', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description='ID размещения'),
+        ],
+        responses={
+            200: openapi.Response(
+                description='Дневные показатели и итоги за период',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'currency': openapi.Schema(type=openapi.TYPE_STRING, description='Валюта выручки'),
+                        'totals': STATS_SCHEMA,
+                        'days': openapi.Schema(type=openapi.TYPE_ARRAY, items=STATS_SCHEMA,
+                                               description='Показатели за каждый день периода'),
+                    },
+                ),
+            ),
+            400: openapi.Response(description='Bad Request - некорректные параметры'),
+            403: openapi.Response(description='Forbidden - показатели доступны только персоналу'),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        query = DailyStatsQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response({'error': query.errors}, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+
+        rows = {
+            row['date']: {'date': row['date'], **{metric: row[f'total_{metric}'] for metric in METRICS}}
+            for row in self.get_queryset(params)
+            .values('date')
+            .annotate(**{f'total_{metric}': Sum(metric) for metric in METRICS})
+            .order_by('date')
+        }
+        days = []
+        day = params['date_from']
+        while day <= params['date_to']:
+            days.append(rows.get(day, _empty_day(day)))
+            day += timedelta(days=1)
+
+        totals = {metric: sum(row[metric] for row in days) for metric in METRICS}
+        return Response({
+            'currency': settings.BASE_CURRENCY,
+            'totals': StatsSerializer(totals).data,
+            'days': DailyStatsSerializer(days, many=True).data,
+        }, status=status.HTTP_200_OK)
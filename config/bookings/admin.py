@@ -1,5 +1,23 @@
 from django.contrib import admin
 
-from .models import Booking
+from .models import Booking, BookingHold, IdempotencyKey
 
-admin.site.register(Booking)
+
+@admin.register(Booking, BookingHold)
+class ReadOnlyBookingAdmin(admin.ModelAdmin):
+    """
+    Бронирования и удержания только просматриваются: создавать и менять их можно лишь через API,
+    где даты проверяются на пересечения под блокировкой размещения.
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(IdempotencyKey)
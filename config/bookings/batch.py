@@ -0,0 +1,114 @@
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accommodations.availability import sync_availability
+from accommodations.models import Accommodation
+from accommodations.search_cache import invalidate_city
+from analytics.rollups import record_bookings
+
+from .events import BOOKING_CREATED, publish_booking_events
+from .holds import BookingConflict, claiming_nights, holds_on
+from .models import BookedNight, Booking, BookingHold, claimed_nights
+
+
+def _overlaps(arrival_date, departure_date, other_arrival_date, other_departure_date):
+    return arrival_date < other_departure_date and other_arrival_date < departure_date
+
+
+def _nights_of_any(items):
+    return reduce(or_, (
+        claimed_nights(item['accommodation'], item['arrival_date'], item['departure_date']) for item in items
+    ))
+
+
+def _find_conflicts(user, items, accommodations):
+    """
+    Ошибки по позициям пакета: {индекс: сообщение}. Занятость проверяется одним запросом на весь пакет
+    по ночам, занятым бронированиями и чужими действующими удержаниями.
+    """
+    conflicts = {}
+    for index, item in enumerate(items):
+        accommodation = accommodations.get(item['accommodation'])
+        if accommodation is None:
+            conflicts[index] = 'Жилье с указанным ID не существует'
+        elif not accommodation['available']:
+            conflicts[index] = 'Жилье недоступно для бронирования'
+        elif any(
+            other['accommodation'] == item['accommodation']
+            and _overlaps(item['arrival_date'], item['departure_date'], other['arrival_date'], other['departure_date'])
+            for other in items[:index]
+        ):
+            conflicts[index] = 'Даты пересекаются с другой позицией пакета'
+
+    candidates = [item for index, item in enumerate(items) if index not in conflicts]
+    if not candidates:
+        return conflicts
+    other_holds = BookingHold.objects.filter(expires_at__gt=timezone.now()).exclude(user=user)
+    taken = (
+        BookedNight.objects
+        .filter(_nights_of_any(candidates))
+        .filter(Q(booking_id__isnull=False) | Q(hold__in=other_holds))
+        .values_list('accommodation_id', 'night', 'booking_id')
+    )
+    for index, item in enumerate(items):
+        if index in conflicts:
+            continue
+        for accommodation_id, night, booking_id in taken:
+            if accommodation_id == item['accommodation'] and item['arrival_date'] <= night < item['departure_date']:
+                conflicts[index] = (
+                    'Жилье уже забронировано на выбранные даты' if booking_id is not None
+                    else 'Жилье временно удерживается другим пользователем'
+                )
+                break
+    return conflicts
+
+
+def book_batch(user, items):
+    """
+    Бронирует все позиции пакета в одной транзакции или ни одной.
+
+    Размещения не блокируются: пересечения с параллельными запросами отклоняет уникальность занятых ночей.
+    Возвращает (бронирования, ошибки по позициям); при ошибках ничего не создается.
+    Собственные и истекшие удержания на эти даты снимаются.
+    """
+    accommodation_ids = sorted({item['accommodation'] for item in items})
+    accommodations = {
+        accommodation['id']: accommodation
+        for accommodation in Accommodation.objects
+        .filter(id__in=accommodation_ids)
+        .values('id', 'city', 'available', 'price_normalized')
+    }
+    try:
+        with claiming_nights():
+            conflicts = _find_conflicts(user, items, accommodations)
+            if conflicts:
+                return [], conflicts
+
+            holds_on(_nights_of_any(items)).filter(Q(user=user) | Q(expires_at__lte=timezone.now())).delete()
+            # Триггер занимает ночи в порядке вставки. Позиции вставляются по размещению и дате заезда,
+            # поэтому пакеты с общими размещениями не ждут друг друга взаимно.
+            order = sorted(range(len(items)), key=lambda index: (items[index]['accommodation'],
+                                                                 items[index]['arrival_date']))
+            created = Booking.objects.bulk_create([
+                Booking(user=user, accommodation_id=items[index]['accommodation'],
+                        arrival_date=items[index]['arrival_date'], departure_date=items[index]['departure_date'],
+                        price_per_night=accommodations[items[index]['accommodation']]['price_normalized'])
+                for index in order
+            ])
+            bookings = [booking for _, booking in sorted(zip(order, created), key=lambda pair: pair[0])]
+            # bulk_create не отправляет post_save: показатели, календарь доступности и кэш поиска обновляются здесь.
+            record_bookings(bookings)
+            publish_booking_events(BOOKING_CREATED, bookings)
+            for item in items:
+                sync_availability(item['accommodation'], item['arrival_date'], item['departure_date'])
+            for city in {accommodations[accommodation_id]['city'] for accommodation_id in accommodation_ids}:
+                transaction.on_commit(lambda city=city: invalidate_city(city))
+    except BookingConflict:
+        # Ночи занял параллельный запрос после проверки: повторная проверка видит его бронирования.
+        conflicts = _find_conflicts(user, items, accommodations)
+        return [], conflicts or {index: 'Жилье уже забронировано на выбранные даты' for index in range(len(items))}
+    return bookings, {}
@@ -0,0 +1,23 @@
+from outbox.relay import publish
+
+
+BOOKING_CREATED = 'booking.created'
+BOOKING_CANCELLED = 'booking.cancelled'
+
+
+def booking_payload(booking):
+    return {
+        'booking_id': booking.id,
+        'user_id': booking.user_id,
+        'accommodation_id': booking.accommodation_id,
+        'arrival_date': booking.arrival_date,
+        'departure_date': booking.departure_date,
+        'price_per_night': booking.price_per_night,
+    }
+
+
+def publish_booking_events(event_type, bookings):
+    """
+    Записывает события бронирований в outbox; вызывается в транзакции, которая меняет бронирования.
+    """
+    return publish(event_type, *(booking_payload(booking) for booking in bookings))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db.models import CharField, Value
+
+from config.exports import Export
+
+from .models import Booking
+
+
+BOOKINGS_EXPORT = Export(
+    name='bookings',
+    queryset=Booking.objects.all(),
+    columns={
+        'id': 'id',
+        'arrival_date': 'arrival_date',
+        'departure_date': 'departure_date',
+        'is_cancelled': 'is_cancelled',
+        'user_id': 'user_id',
+        'user_username': 'user__username',
+        'user_email': 'user__email',
+        'accommodation_id': 'accommodation_id',
+        'accommodation_name': 'accommodation__name',
+        'accommodation_city': 'accommodation__city',
+        # Цена ночи, зафиксированная при бронировании, всегда в базовой валюте.
+        'price_per_night': 'price_per_night',
+        'price_currency': Value(settings.BASE_CURRENCY, output_field=CharField()),
+    },
+    date_field='arrival_date',
+)
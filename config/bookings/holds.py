@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .events import BOOKING_CREATED, publish_booking_events
+from .models import BookedNight, Booking, BookingHold, claimed_nights
+
+
+class HoldConflict(Exception):
+    pass
+
+
+class BookingConflict(Exception):
+    pass
+
+
+def _active_holds():
+    return BookingHold.objects.filter(expires_at__gt=timezone.now())
+
+
+def holds_on(nights):
+    """
+    Удержания, занимающие ночи BookedNight, подходящие под условие nights.
+    """
+    return BookingHold.objects.filter(id__in=BookedNight.objects.filter(nights, hold__isnull=False).values('hold_id'))
+
+
+@contextmanager
+def claiming_nights():
+    """
+    Транзакция, в которой бронирования и удержания занимают ночи.
+
+    Если ночь между проверкой и вставкой занял параллельный запрос, вставка нарушает уникальность
+    BookedNight - это нарушение превращается в BookingConflict, транзакция откатывается.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as error:
+        if getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None) != 'unique_booked_night':
+            raise
+        raise BookingConflict from error
+
+
+def claim_dates(user, accommodation_id, arrival_date, departure_date):
+    """
+    Готовит даты к бронированию пользователем: проверяет, что ночи не заняты бронированием (BookingConflict)
+    и не удерживаются другим пользователем (HoldConflict), и снимает собственные и истекшие удержания на эти даты.
+
+    Вызывается внутри claiming_nights(). Проверка нужна для понятной ошибки, а одновременную вставку тех же ночей
+    отклоняет уникальность BookedNight, поэтому строка размещения не блокируется.
+    """
+    nights = claimed_nights(accommodation_id, arrival_date, departure_date)
+    if BookedNight.objects.filter(nights, booking_id__isnull=False).exists():
+        raise BookingConflict
+    holds = holds_on(nights)
+    if holds.filter(expires_at__gt=timezone.now()).exclude(user=user).exists():
+        raise HoldConflict
+    holds.delete()
+
+
+def create_hold(user, accommodation_id, arrival_date, departure_date):
+    """
+    Удерживает даты размещения на BOOKING_HOLD_TTL секунд. Собственные удержания пользователя на эти даты
+    заменяются новым. Если даты заняты бронированием или чужим удержанием, выбрасывает BookingConflict
+    или HoldConflict.
+    """
+    with claiming_nights():
+        claim_dates(user, accommodation_id, arrival_date, departure_date)
+        return BookingHold.objects.create(
+            user=user,
+            accommodation_id=accommodation_id,
+            arrival_date=arrival_date,
+            departure_date=departure_date,
+            expires_at=timezone.now() + timedelta(seconds=settings.BOOKING_HOLD_TTL),
+        )
+
+
+def confirm_hold(user, hold_id):
+    """
+    Превращает действующее удержание пользователя в бронирование. Возвращает бронирование
+    или None, если удержания нет или оно истекло.
+
+    Ночи удержания переходят бронированию в одной транзакции, поэтому занять их в промежутке никто не может.
+    """
+    with claiming_nights():
+        hold = _active_holds().select_for_update().filter(id=hold_id, user=user).first()
+        if hold is None:
+            return None
+        hold.delete()
+        booking = Booking.objects.create(
+            user=user,
+            accommodation_id=hold.accommodation_id,
+            arrival_date=hold.arrival_date,
+            departure_date=hold.departure_date,
+        )
+        publish_booking_events(BOOKING_CREATED, [booking])
+        return booking
+
+
+def expire_holds(batch_size):
+    """
+    Удаляет истекшие удержания пачками по batch_size, выбирая их по индексу expires_at. Строки, которые
+    сейчас подтверждаются, пропускаются (SKIP LOCKED). Освобожденные ночи возвращаются в календарь
+    доступности сигналами удаления. Возвращает число удаленных удержаний.
+    """
+    expired = 0
+    while True:
+        with transaction.atomic():
+            expired_ids = list(
+                BookingHold.objects
+                .filter(expires_at__lte=timezone.now())
+                .order_by('expires_at')
+                .select_for_update(skip_locked=True)
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not expired_ids:
+                return expired
+            expired += BookingHold.objects.filter(id__in=expired_ids).delete()[0]
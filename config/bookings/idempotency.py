@@ -0,0 +1,90 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from drf_yasg import openapi
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+IDEMPOTENCY_KEY_PARAMETER = openapi.Parameter(
+    IDEMPOTENCY_HEADER, openapi.IN_HEADER, type=openapi.TYPE_STRING, required=False,
+    description='Ключ идемпотентности: повторный запрос с тем же ключом получает ответ первого запроса',
+)
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def idempotent(handler):
+    """
+    Поддержка заголовка Idempotency-Key для обработчика APIView.
+
+    Ответ первого запроса сохраняется на IDEMPOTENCY_KEY_TTL секунд и возвращается на повторы с тем же ключом.
+    Ключ создается в той же транзакции, в которой выполняется запрос, поэтому одновременный дубликат ждет на
+    уникальном ограничении, пока первый запрос не завершится, и получает его ответ, а не выполняется повторно.
+    Ответы 5xx не сохраняются: повтор выполнит запрос заново.
+    """
+
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            return Response({'error': 'Слишком длинный ключ идемпотентности'}, status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        now = timezone.now()
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(user=request.user, key=key, expires_at__lte=now).delete()
+            record, created = IdempotencyKey.objects.get_or_create(
+                user=request.user,
+                key=key,
+                defaults={
+                    'request_hash': fingerprint,
+                    'expires_at': now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                },
+            )
+            if not created:
+                if record.request_hash != fingerprint:
+                    return Response({'error': 'Ключ идемпотентности уже использован для другого запроса'},
+                                    status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                response = Response(record.response_body, status=record.status_code)
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code >= 500:
+                record.delete()
+                return response
+            record.status_code = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=['status_code', 'response_body'])
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys(batch_size):
+    """
+    Удаляет истекшие ключи пачками по batch_size через индекс по expires_at. Возвращает число удаленных ключей.
+    """
+    deleted = 0
+    now = timezone.now()
+    while True:
+        expired = IdempotencyKey.objects.filter(expires_at__lte=now).order_by('expires_at')
+        expired_ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not expired_ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=expired_ids).delete()[0]
@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bookings.holds import expire_holds
+
+
+class Command(BaseCommand):
+    help = 'Удаляет истекшие удержания дат и возвращает освободившиеся ночи в календарь доступности.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.BOOKING_HOLD_SWEEP_BATCH_SIZE,
+                            help='Размер пачки удаления.')
+        parser.add_argument('--interval', type=int,
+                            help='Запускать очистку каждые INTERVAL секунд, не завершаясь. По умолчанию - один раз.')
+
+    def handle(self, *args, batch_size=None, interval=None, **options):
+        while True:
+            expired = expire_holds(batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Удалено истекших удержаний: {expired}.'))
+            if interval is None:
+                return
+            time.sleep(interval)
@@ -0,0 +1,7 @@
+from bookings.exports import BOOKINGS_EXPORT
+from config.exports import ExportCommand
+
+
+class Command(ExportCommand):
+    help = 'Потоково выгружает бронирования в NDJSON или CSV.'
+    export = BOOKINGS_EXPORT
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from bookings.partitions import detach_partitions, ensure_partitions, month_start
+
+
+class Command(BaseCommand):
+    help = ('Создает партиции бронирований на --months-ahead месяцев вперед и, если указан --detach-before, '
+            'отсоединяет партиции прошлых месяцев и переносит их в схему --archive-schema. '
+            'Отсоединенные бронирования не видны приложению; показатели analytics сохраняются, '
+            'но rebuild_rollups их уже не учтет.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=settings.BOOKING_PARTITION_MONTHS_AHEAD,
+                            help='Число месяцев вперед, для которых создаются партиции.')
+        parser.add_argument('--detach-before',
+                            help='Отсоединить партиции месяцев раньше этой даты (YYYY-MM-DD, берется начало месяца).')
+        parser.add_argument('--archive-schema', default=settings.BOOKING_ARCHIVE_SCHEMA,
+                            help='Схема для отсоединенных партиций.')
+        parser.add_argument('--interval', type=int,
+                            help='Повторять каждые INTERVAL секунд, не завершаясь. По умолчанию - один раз.')
+
+    def handle(self, *args, months_ahead=None, detach_before=None, archive_schema=None, interval=None, **options):
+        if detach_before is not None:
+            try:
+                detach_before = parse_date(detach_before)
+            except ValueError:
+                detach_before = None
+            if detach_before is None:
+                raise CommandError('Параметр --detach-before должен быть датой в формате YYYY-MM-DD.')
+            detach_before = month_start(detach_before)
+
+        while True:
+            created = ensure_partitions(months_ahead)
+            months = f' ({", ".join(f"{month:%Y-%m}" for month in created)})' if created else ''
+            self.stdout.write(self.style.SUCCESS(f'Создано партиций: {len(created)}{months}.'))
+            if detach_before is not None:
+                detached, skipped = detach_partitions(detach_before, archive_schema)
+                self.stdout.write(self.style.SUCCESS(
+                    f'Отсоединено партиций: {len(detached)}, перенесены в схему {archive_schema}.'
+                ))
+                if skipped:
+                    self.stderr.write(f'Партиции с незавершенными бронированиями не отсоединены: {", ".join(skipped)}.')
+            if interval is None:
+                return
+            time.sleep(interval)
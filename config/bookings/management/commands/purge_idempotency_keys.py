@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Удаляет истекшие ключи идемпотентности.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки удаления (по умолчанию 1000).')
+        parser.add_argument('--interval', type=int,
+                            help='Запускать очистку каждые INTERVAL секунд, не завершаясь. По умолчанию - один раз.')
+
+    def handle(self, *args, batch_size=1000, interval=None, **options):
+        while True:
+            deleted = purge_expired_keys(batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Удалено истекших ключей идемпотентности: {deleted}.'))
+            if interval is None:
+                return
+            time.sleep(interval)
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(check=models.Q(('departure_date__gt', models.F('arrival_date'))), name='booking_departure_after_arrival'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:38
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accommodations', '0007_hot_path_indexes'),
+        ('bookings', '0002_booking_departure_after_arrival'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['user', 'departure_date'], name='booking_user_departure_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('is_cancelled', True)), fields=['user'], name='booking_user_cancelled_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('is_cancelled', False)), fields=['accommodation', 'arrival_date'], name='booking_active_arrival_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-17 07:12
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('bookings', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['arrival_date', 'id'], name='booking_arrival_idx'),
+        ),
+    ]
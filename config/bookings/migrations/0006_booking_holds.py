@@ -0,0 +1,36 @@
+# Generated by Django 5.0.3 on 2026-10-17 05:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0010_image_variants'),
+        ('bookings', '0005_idempotency_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arrival_date', models.DateField()),
+                ('departure_date', models.DateField()),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('accommodation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accommodations.accommodation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='booking_hold_expires_idx'), models.Index(fields=['accommodation', 'arrival_date'], name='booking_hold_arrival_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookinghold',
+            constraint=models.CheckConstraint(check=models.Q(('departure_date__gt', models.F('arrival_date'))), name='booking_hold_departure_after_arrival'),
+        ),
+    ]
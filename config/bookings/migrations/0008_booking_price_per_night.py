@@ -0,0 +1,28 @@
+# Generated by Django 5.0.3 on 2026-10-17 05:12
+
+from django.db import migrations, models
+
+
+def fill_prices(apps, schema_editor):
+    Accommodation = apps.get_model('accommodations', 'Accommodation')
+    Booking = apps.get_model('bookings', 'Booking')
+    Booking.objects.update(price_per_night=models.Subquery(
+        Accommodation.objects.filter(id=models.OuterRef('accommodation_id')).values('price_normalized')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0010_image_variants'),
+        ('bookings', '0007_idempotency_response_encoder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='price_per_night',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.RunPython(fill_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,200 @@
+# Generated by Django 5.0.3 on 2026-10-17 05:21
+
+from datetime import date
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+COLUMNS = 'id, user_id, accommodation_id, arrival_date, departure_date, is_cancelled, price_per_night'
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_bookings(apps, schema_editor):
+    """
+    Пересоздает bookings_booking как таблицу, секционированную по месяцу заезда, с партициями для
+    всех месяцев с бронированиями, текущего и BOOKING_PARTITION_MONTHS_AHEAD месяцев вперед,
+    а также партицией по умолчанию.
+    """
+    execute = schema_editor.execute
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT min(arrival_date), max(arrival_date) FROM bookings_booking')
+        first, last = cursor.fetchone()
+
+    today = timezone.localdate()
+    this_month = today.replace(day=1)
+    month = this_month
+    if first is not None:
+        month = min(month, first.replace(day=1))
+    end = add_months(this_month, settings.BOOKING_PARTITION_MONTHS_AHEAD + 1)
+    if last is not None:
+        end = max(end, add_months(last.replace(day=1), 1))
+
+    execute(
+        'CREATE TABLE bookings_booking_partitioned '
+        '(LIKE bookings_booking INCLUDING DEFAULTS) PARTITION BY RANGE (arrival_date)'
+    )
+    execute('ALTER TABLE bookings_booking_partitioned ADD CONSTRAINT bookings_booking_partitioned_pkey '
+            'PRIMARY KEY (id, arrival_date)')
+    while month < end:
+        execute(
+            f'CREATE TABLE bookings_booking_p{month:%Y%m} PARTITION OF bookings_booking_partitioned '
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+        month = add_months(month, 1)
+    execute('CREATE TABLE bookings_booking_default PARTITION OF bookings_booking_partitioned DEFAULT')
+
+    execute(f'INSERT INTO bookings_booking_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM bookings_booking')
+    execute('DROP TABLE bookings_booking')
+    execute('ALTER TABLE bookings_booking_partitioned RENAME TO bookings_booking')
+    execute('ALTER TABLE bookings_booking RENAME CONSTRAINT bookings_booking_partitioned_pkey TO bookings_booking_pkey')
+    execute('ALTER TABLE bookings_booking ADD CONSTRAINT booking_departure_after_arrival '
+            'CHECK (departure_date > arrival_date)')
+
+    execute('CREATE SEQUENCE bookings_booking_id_seq OWNED BY bookings_booking.id')
+    execute("SELECT setval('bookings_booking_id_seq', COALESCE(max(id), 0) + 1, false) FROM bookings_booking")
+    execute("ALTER TABLE bookings_booking ALTER COLUMN id SET DEFAULT nextval('bookings_booking_id_seq')")
+
+    execute('ALTER TABLE bookings_booking ADD CONSTRAINT bookings_booking_accommodation_id_fb488e31_fk_accommoda '
+            'FOREIGN KEY (accommodation_id) REFERENCES accommodations_accommodation (id) DEFERRABLE INITIALLY DEFERRED')
+    execute('ALTER TABLE bookings_booking ADD CONSTRAINT bookings_booking_user_id_834dfc23_fk_accounts_customuser_id '
+            'FOREIGN KEY (user_id) REFERENCES accounts_customuser (id) DEFERRABLE INITIALLY DEFERRED')
+    execute('CREATE INDEX bookings_booking_accommodation_id_fb488e31 ON bookings_booking (accommodation_id)')
+    execute('CREATE INDEX bookings_booking_user_id_834dfc23 ON bookings_booking (user_id)')
+    execute('CREATE INDEX booking_user_departure_idx ON bookings_booking (user_id, departure_date)')
+    execute('CREATE INDEX booking_user_cancelled_idx ON bookings_booking (user_id) WHERE is_cancelled')
+    execute('CREATE INDEX booking_active_arrival_idx ON bookings_booking (accommodation_id, arrival_date) '
+            'WHERE NOT is_cancelled')
+    execute('CREATE INDEX booking_arrival_idx ON bookings_booking (arrival_date, id)')
+
+
+def nights_of(row):
+    """
+    Начало SELECT, выдающего по строке (размещение, ночь) на каждую ночь записи row.
+    """
+    return (f'SELECT {row}.accommodation_id, '
+            f'{row}.arrival_date + generate_series(0, {row}.departure_date - {row}.arrival_date - 1)')
+
+
+CLAIM_NIGHTS_SQL = f'''
+CREATE FUNCTION bookings_booking_claim_nights() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        DELETE FROM bookings_bookednight WHERE booking_id = OLD.id;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NOT NEW.is_cancelled THEN
+        INSERT INTO bookings_bookednight (accommodation_id, night, booking_id) {nights_of('NEW')}, NEW.id;
+    END IF;
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER bookings_booking_claim_nights AFTER INSERT OR DELETE ON bookings_booking
+FOR EACH ROW EXECUTE FUNCTION bookings_booking_claim_nights();
+CREATE TRIGGER bookings_booking_reclaim_nights AFTER UPDATE ON bookings_booking
+FOR EACH ROW WHEN ((OLD.accommodation_id, OLD.arrival_date, OLD.departure_date, OLD.is_cancelled)
+                   IS DISTINCT FROM (NEW.accommodation_id, NEW.arrival_date, NEW.departure_date, NEW.is_cancelled))
+EXECUTE FUNCTION bookings_booking_claim_nights();
+
+CREATE FUNCTION bookings_bookinghold_claim_nights() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        DELETE FROM bookings_bookednight WHERE hold_id = OLD.id;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO bookings_bookednight (accommodation_id, night, hold_id) {nights_of('NEW')}, NEW.id;
+    END IF;
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER bookings_bookinghold_claim_nights AFTER INSERT OR DELETE ON bookings_bookinghold
+FOR EACH ROW EXECUTE FUNCTION bookings_bookinghold_claim_nights();
+CREATE TRIGGER bookings_bookinghold_reclaim_nights AFTER UPDATE ON bookings_bookinghold
+FOR EACH ROW WHEN ((OLD.accommodation_id, OLD.arrival_date, OLD.departure_date)
+                   IS DISTINCT FROM (NEW.accommodation_id, NEW.arrival_date, NEW.departure_date))
+EXECUTE FUNCTION bookings_bookinghold_claim_nights();
+'''
+
+DROP_CLAIM_NIGHTS_SQL = '''
+DROP TRIGGER bookings_booking_claim_nights ON bookings_booking;
+DROP TRIGGER bookings_booking_reclaim_nights ON bookings_booking;
+DROP FUNCTION bookings_booking_claim_nights();
+DROP TRIGGER bookings_bookinghold_claim_nights ON bookings_bookinghold;
+DROP TRIGGER bookings_bookinghold_reclaim_nights ON bookings_bookinghold;
+DROP FUNCTION bookings_bookinghold_claim_nights();
+'''
+
+
+def claim_existing_nights(apps, schema_editor):
+    """
+    Занимает ночи существующих неотмененных бронирований и действующих удержаний; истекшие удержания удаляются.
+
+    До этой миграции пересечения не запрещались в базе. Если две записи занимают одну ночь, миграция
+    останавливается со списком таких ночей: пересечения нужно разрешить вручную (отменить или перенести
+    одно из бронирований) и повторить миграцию.
+    """
+    execute = schema_editor.execute
+    execute('DELETE FROM bookings_bookinghold WHERE expires_at <= now()')
+    execute(
+        'CREATE TEMPORARY TABLE existing_nights AS '
+        f"{nights_of('b')} AS night, b.id AS booking_id, NULL::bigint AS hold_id "
+        'FROM bookings_booking b WHERE NOT b.is_cancelled '
+        f"UNION ALL {nights_of('h')}, NULL, h.id FROM bookings_bookinghold h"
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT accommodation_id, night, array_agg(booking_id ORDER BY booking_id), '
+            'array_agg(hold_id ORDER BY hold_id) '
+            'FROM existing_nights GROUP BY accommodation_id, night HAVING count(*) > 1 '
+            'ORDER BY accommodation_id, night'
+        )
+        overlaps = cursor.fetchall()
+    if overlaps:
+        details = '; '.join(
+            f'размещение {accommodation_id}, ночь {night}: '
+            f'бронирования {[booking_id for booking_id in bookings if booking_id]}, '
+            f'удержания {[hold_id for hold_id in holds if hold_id]}'
+            for accommodation_id, night, bookings, holds in overlaps[:20]
+        )
+        raise RuntimeError(
+            f'Ночей, занятых пересекающимися бронированиями или удержаниями: {len(overlaps)} ({details}). '
+            f'Отмените или перенесите пересекающиеся записи и повторите миграцию.'
+        )
+    execute(
+        'INSERT INTO bookings_bookednight (accommodation_id, night, booking_id, hold_id) '
+        'SELECT accommodation_id, night, booking_id, hold_id FROM existing_nights'
+    )
+    execute('DROP TABLE existing_nights')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0010_image_variants'),
+        ('bookings', '0008_booking_price_per_night'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_bookings),
+        migrations.CreateModel(
+            name='BookedNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('night', models.DateField()),
+                ('booking_id', models.BigIntegerField(db_index=True, null=True)),
+                ('accommodation', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accommodations.accommodation')),
+                ('hold', models.ForeignKey(null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='bookings.bookinghold')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('accommodation', 'night'), name='unique_booked_night'), models.CheckConstraint(check=models.Q(models.Q(('booking_id__isnull', False), ('hold__isnull', True)), models.Q(('booking_id__isnull', True), ('hold__isnull', False)), _connector='OR'), name='booked_night_single_owner')],
+            },
+        ),
+        migrations.RunPython(claim_existing_nights, migrations.RunPython.noop),
+        migrations.RunSQL(CLAIM_NIGHTS_SQL, DROP_CLAIM_NIGHTS_SQL),
+    ]
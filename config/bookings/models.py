@@ -1,12 +1,122 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 from accounts.models import CustomUser
 from accommodations.models import Accommodation
 
 
+def claimed_nights(accommodation_id, arrival_date, departure_date):
+    """
+    Условие для занятых ночей BookedNight размещения в полуинтервале [arrival_date, departure_date).
+    """
+    return models.Q(accommodation_id=accommodation_id, night__gte=arrival_date, night__lt=departure_date)
+
+
 class Booking(models.Model):
+    """
+    Бронирование размещения.
+
+    Таблица секционирована по месяцу заезда (bookings.partitions), первичный ключ в базе - (id, arrival_date).
+    Ограничения-исключения на секционированной таблице не поддерживаются, поэтому пересечения запрещает
+    уникальность ночей BookedNight, которые занимает триггер на вставку и изменение бронирования.
+    """
+
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     accommodation = models.ForeignKey(Accommodation, on_delete=models.CASCADE)
     arrival_date = models.DateField()
     departure_date = models.DateField()
     is_cancelled = models.BooleanField(default=False)
+    # Цена ночи в базовой валюте на момент бронирования, по ней считается выручка.
+    price_per_night = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(departure_date__gt=models.F('arrival_date')),
+                name='booking_departure_after_arrival',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'departure_date'], name='booking_user_departure_idx'),
+            models.Index(fields=['user'], condition=models.Q(is_cancelled=True), name='booking_user_cancelled_idx'),
+            models.Index(fields=['accommodation', 'arrival_date'], condition=models.Q(is_cancelled=False),
+                         name='booking_active_arrival_idx'),
+            models.Index(fields=['arrival_date', 'id'], name='booking_arrival_idx'),
+        ]
+
+
+class BookingHold(models.Model):
+    """
+    Временное удержание дат размещения на время оформления бронирования.
+
+    До expires_at удержание учитывается в доступности так же, как бронирование. Подтвержденное удержание
+    превращается в бронирование, истекшие удержания удаляет команда expire_booking_holds.
+    """
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    accommodation = models.ForeignKey(Accommodation, on_delete=models.CASCADE)
+    arrival_date = models.DateField()
+    departure_date = models.DateField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(departure_date__gt=models.F('arrival_date')),
+                name='booking_hold_departure_after_arrival',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='booking_hold_expires_idx'),
+            models.Index(fields=['accommodation', 'arrival_date'], name='booking_hold_arrival_idx'),
+        ]
+
+
+class BookedNight(models.Model):
+    """
+    Ночь размещения, занятая неотмененным бронированием или удержанием.
+
+    Строки ведут триггеры базы на bookings_booking и bookings_bookinghold (миграция 0009), поэтому ночи занимает
+    любая запись - API, bulk_create, команда или shell. Уникальность (accommodation, night) не дает занять одну ночь
+    дважды: параллельные запросы ждут друг друга, только если претендуют на одни и те же ночи.
+    """
+
+    accommodation = models.ForeignKey(Accommodation, related_name='+', on_delete=models.DO_NOTHING)
+    night = models.DateField()
+    # Без внешнего ключа: первичный ключ секционированной таблицы бронирований - (id, arrival_date).
+    booking_id = models.BigIntegerField(null=True, db_index=True)
+    hold = models.ForeignKey(BookingHold, null=True, related_name='+', on_delete=models.DO_NOTHING)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['accommodation', 'night'], name='unique_booked_night'),
+            models.CheckConstraint(
+                check=models.Q(booking_id__isnull=False, hold__isnull=True)
+                | models.Q(booking_id__isnull=True, hold__isnull=False),
+                name='booked_night_single_owner',
+            ),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Сохраненный ответ на запрос с заголовком Idempotency-Key. Повторный запрос с тем же ключом
+    до expires_at получает сохраненный ответ, а не выполняется снова.
+    """
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_key_expires_idx'),
+        ]
@@ -0,0 +1,151 @@
+import re
+from datetime import date
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import BookedNight, Booking
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{Booking._meta.db_table}_p{month:%Y%m}'
+
+
+def default_partition_name():
+    return f'{Booking._meta.db_table}_default'
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _columns():
+    return ', '.join(_quote(field.column) for field in Booking._meta.concrete_fields if not field.generated)
+
+
+def attached_partitions():
+    """
+    Помесячные партиции бронирований: {первый день месяца: имя таблицы}.
+    """
+    pattern = re.compile(rf'^{re.escape(Booking._meta.db_table)}_p(\d{{4}})(\d{{2}})$')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            '''
+            SELECT pg_class.relname
+            FROM pg_inherits
+            JOIN pg_class ON pg_class.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            ''',
+            [Booking._meta.db_table],
+        )
+        names = [name for name, in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def months_in_default_partition():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', arrival_date)::date FROM {_quote(default_partition_name())}"
+        )
+        return {month for month, in cursor.fetchall()}
+
+
+def create_partition(month):
+    """
+    Создает партицию бронирований с заездом в месяце month и переносит в нее бронирования этого месяца
+    из партиции по умолчанию. Возвращает False, если партиция уже есть.
+
+    Партиция по умолчанию блокируется до конца транзакции, чтобы в нее не попали новые строки этого месяца
+    между переносом и подключением партиции. Она содержит только бронирования месяцев без партиций,
+    поэтому блокировка короткая.
+    """
+    parent, default = _quote(Booking._meta.db_table), _quote(default_partition_name())
+    name, columns = _quote(partition_name(month)), _columns()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {default} IN ACCESS EXCLUSIVE MODE')
+        if month in attached_partitions():
+            return False
+        cursor.execute(
+            f'CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS)'
+        )
+        bounds = [month, add_months(month, 1)]
+        cursor.execute(
+            f'INSERT INTO {name} ({columns}) SELECT {columns} FROM {default} '
+            f'WHERE arrival_date >= %s AND arrival_date < %s',
+            bounds,
+        )
+        cursor.execute(f'DELETE FROM {default} WHERE arrival_date >= %s AND arrival_date < %s', bounds)
+        cursor.execute(
+            f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES FROM ('{bounds[0]}') TO ('{bounds[1]}')"
+        )
+        # Удаление из партиции по умолчанию освободило ночи перенесенных бронирований, а новая таблица
+        # до подключения была без триггера: ночи занимаются заново в той же транзакции.
+        cursor.execute(
+            f'INSERT INTO {_quote(BookedNight._meta.db_table)} (accommodation_id, night, booking_id) '
+            f'SELECT accommodation_id, arrival_date + generate_series(0, departure_date - arrival_date - 1), id '
+            f'FROM {name} WHERE NOT is_cancelled'
+        )
+    return True
+
+
+def ensure_partitions(months_ahead):
+    """
+    Создает партиции от текущего месяца до months_ahead месяцев вперед, а также партиции для месяцев,
+    бронирования которых попали в партицию по умолчанию. Тогда запросы свежих бронирований не читают
+    партицию по умолчанию. Возвращает месяцы созданных партиций.
+    """
+    today = timezone.localdate()
+    month = month_start(today)
+    end = add_months(month_start(today), months_ahead + 1)
+    months = months_in_default_partition()
+    while month < end:
+        months.add(month)
+        month = add_months(month, 1)
+    return [month for month in sorted(months - set(attached_partitions())) if create_partition(month)]
+
+
+def detach_partitions(before, schema):
+    """
+    Отсоединяет партиции месяцев, закончившихся не позже before, и переносит их в схему schema, где они
+    остаются обычными таблицами. Партиции с незавершенными неотмененными бронированиями пропускаются.
+
+    Возвращает имена отсоединенных и пропущенных партиций.
+    """
+    parent = _quote(Booking._meta.db_table)
+    today = timezone.localdate()
+    detached, skipped = [], []
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {_quote(schema)}')
+    for month, name in sorted(attached_partitions().items()):
+        if add_months(month, 1) > before:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {_quote(name)} WHERE departure_date > %s AND NOT is_cancelled)',
+                [today],
+            )
+            if cursor.fetchone()[0]:
+                skipped.append(name)
+                continue
+            cursor.execute(f'ALTER TABLE {parent} DETACH PARTITION {_quote(name)}')
+            # Отсоединение не вызывает триггер удаления: прошедшие ночи архивных бронирований освобождаются здесь.
+            cursor.execute(
+                f'DELETE FROM {_quote(BookedNight._meta.db_table)} WHERE booking_id IN (SELECT id FROM {_quote(name)})'
+            )
+            cursor.execute(f'ALTER TABLE {_quote(name)} SET SCHEMA {_quote(schema)}')
+        detached.append(name)
+    return detached, skipped
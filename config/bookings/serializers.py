@@ -1,6 +1,15 @@
-from rest_framework.serializers import ModelSerializer
+from django.conf import settings
+from rest_framework.serializers import DateField, IntegerField, ModelSerializer, Serializer, ValidationError
 
-from .models import Booking
+from accommodations.serializers import AccommodationSerializer
+
+from .models import Booking, BookingHold
+
+
+def validate_stay(attrs):
+    if attrs['departure_date'] <= attrs['arrival_date']:
+        raise ValidationError({'departure_date': 'Дата выезда должна быть позже даты заезда.'})
+    return attrs
 
 
 class BookingSerializer(ModelSerializer):
@@ -14,3 +23,50 @@ class BookingSerializer(ModelSerializer):
             'arrival_date',
             'departure_date',
         ]
+
+    def validate(self, attrs):
+        return validate_stay(attrs)
+
+
+class BookingListSerializer(ModelSerializer):
+    accommodation = AccommodationSerializer(read_only=True)
+
+    class Meta:
+        model = Booking
+        fields = [
+            'id',
+            'arrival_date',
+            'departure_date',
+            'is_cancelled',
+            'accommodation',
+        ]
+
+
+class BookingHoldSerializer(ModelSerializer):
+
+    class Meta:
+        model = BookingHold
+        fields = [
+            'id',
+            'accommodation',
+            'arrival_date',
+            'departure_date',
+            'expires_at',
+        ]
+        read_only_fields = ['expires_at']
+
+    def validate(self, attrs):
+        return validate_stay(attrs)
+
+
+class BookingBatchItemSerializer(Serializer):
+    accommodation = IntegerField(min_value=1)
+    arrival_date = DateField()
+    departure_date = DateField()
+
+    def validate(self, attrs):
+        return validate_stay(attrs)
+
+
+class BookingBatchSerializer(Serializer):
+    items = BookingBatchItemSerializer(many=True, allow_empty=False, max_length=settings.BOOKING_BATCH_MAX_ITEMS)
@@ -1,3 +1,516 @@
-from django.test import TestCase
+import io
+import json
+import threading
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from accommodations.models import Accommodation, AccommodationType, AvailabilityNight, StayDate
+from accommodations.tests import create_accommodation
+
+from .holds import expire_holds
+from .models import BookedNight, Booking, BookingHold, IdempotencyKey
+from .partitions import attached_partitions, default_partition_name, detach_partitions, ensure_partitions
+
+
+class BookingOverlapTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.accommodation = create_accommodation(AccommodationType.objects.create(name='Отель', description='Отель'))
+
+    def book(self, arrival_date, departure_date, **headers):
+        return self.client.post(reverse('booking_create'), {
+            'accommodation': self.accommodation.id,
+            'arrival_date': arrival_date,
+            'departure_date': departure_date,
+        }, format='json', headers=headers)
+
+    def test_overlapping_booking_is_conflict(self):
+        self.assertEqual(self.book('2030-01-10', '2030-01-15').status_code, 201)
+
+        response = self.book('2030-01-14', '2030-01-20')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_adjacent_bookings_are_allowed(self):
+        self.assertEqual(self.book('2030-01-10', '2030-01-15').status_code, 201)
+        self.assertEqual(self.book('2030-01-15', '2030-01-20').status_code, 201)
+
+    def test_cancelled_booking_releases_dates(self):
+        self.assertEqual(self.book('2030-01-10', '2030-01-15').status_code, 201)
+        Booking.objects.update(is_cancelled=True)
+
+        self.assertEqual(self.book('2030-01-12', '2030-01-14').status_code, 201)
+
+    def test_departure_must_be_after_arrival(self):
+        self.assertEqual(self.book('2030-01-10', '2030-01-10').status_code, 400)
+
+    def test_long_stay_is_allowed(self):
+        self.assertEqual(self.book('2030-01-10', '2030-07-10').status_code, 201)
+        self.assertEqual(self.book('2030-07-01', '2030-07-20').status_code, 409)
+
+    def test_retry_with_idempotency_key_replays_first_response(self):
+        first = self.book('2030-01-10', '2030-01-15', **{'Idempotency-Key': 'checkout-1'})
+        retry = self.book('2030-01-10', '2030-01-15', **{'Idempotency-Key': 'checkout-1'})
+
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_idempotency_key_reused_for_other_request_is_rejected(self):
+        self.book('2030-01-10', '2030-01-15', **{'Idempotency-Key': 'checkout-1'})
+
+        response = self.book('2030-02-10', '2030-02-15', **{'Idempotency-Key': 'checkout-1'})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_cancel_retry_with_idempotency_key_is_replayed(self):
+        self.book('2030-01-10', '2030-01-15')
+        url = reverse('cancel-booking', args=[Booking.objects.get().id])
+
+        first = self.client.patch(url, headers={'Idempotency-Key': 'cancel-1'})
+        retry = self.client.patch(url, headers={'Idempotency-Key': 'cancel-1'})
+
+        self.assertEqual((first.status_code, retry.status_code), (200, 200))
+        self.assertEqual(self.client.patch(url).status_code, 400)
+
+    def test_purge_command_deletes_only_expired_keys(self):
+        self.book('2030-01-10', '2030-01-15', **{'Idempotency-Key': 'checkout-1'})
+        self.book('2030-02-10', '2030-02-15', **{'Idempotency-Key': 'checkout-2'})
+        IdempotencyKey.objects.filter(key='checkout-1').update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        call_command('purge_idempotency_keys', batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['checkout-2'])
+
+
+class BookingHoldTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.other = CustomUser.objects.create_user(username='other', email='other@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.accommodation = create_accommodation(AccommodationType.objects.create(name='Отель', description='Отель'))
+        self.arrival_date = timezone.localdate() + timedelta(days=10)
+        self.departure_date = self.arrival_date + timedelta(days=3)
+        StayDate.objects.create(accommodation=self.accommodation, start_date=self.arrival_date - timedelta(days=5),
+                                end_date=self.departure_date + timedelta(days=5))
+
+    def dates(self, client=None, url='booking-hold-create'):
+        return (client or self.client).post(reverse(url), {
+            'accommodation': self.accommodation.id,
+            'arrival_date': self.arrival_date,
+            'departure_date': self.departure_date,
+        }, format='json')
+
+    def other_client(self):
+        client = APIClient()
+        client.force_authenticate(self.other)
+        return client
+
+    def booked_nights(self):
+        return AvailabilityNight.objects.filter(accommodation=self.accommodation, is_booked=True).count()
+
+    def test_hold_blocks_other_users_and_counts_against_availability(self):
+        self.assertEqual(self.dates().status_code, 201)
+
+        self.assertEqual(self.booked_nights(), 3)
+        self.assertEqual(self.dates(self.other_client()).status_code, 409)
+        self.assertEqual(self.dates(self.other_client(), url='booking_create').status_code, 409)
+
+    def test_confirm_converts_hold_into_booking(self):
+        hold_id = self.dates().data['id']
+
+        response = self.client.post(reverse('booking-hold-confirm', args=[hold_id]))
+
+        self.assertEqual(response.status_code, 201)
+        booking = Booking.objects.get()
+        self.assertEqual((booking.id, booking.arrival_date), (response.data['id'], self.arrival_date))
+        self.assertFalse(BookingHold.objects.exists())
+        self.assertEqual(self.booked_nights(), 3)
+
+    def test_own_booking_consumes_hold(self):
+        self.dates()
+
+        self.assertEqual(self.dates(url='booking_create').status_code, 201)
+        self.assertFalse(BookingHold.objects.exists())
+
+    def test_expired_hold_is_swept_and_frees_dates(self):
+        hold_id = self.dates().data['id']
+        BookingHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.client.post(reverse('booking-hold-confirm', args=[hold_id])).status_code, 404)
+        self.assertEqual(expire_holds(batch_size=10), 1)
+        self.assertEqual(self.booked_nights(), 0)
+        self.assertEqual(self.dates(self.other_client(), url='booking_create').status_code, 201)
+
+
+class BookingBatchTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        self.first = create_accommodation(accommodation_type)
+        self.second = create_accommodation(accommodation_type)
+
+    def book_batch(self, items, **headers):
+        return self.client.post(reverse('booking-batch-create'), {'items': [
+            {'accommodation': accommodation.id, 'arrival_date': arrival_date, 'departure_date': departure_date}
+            for accommodation, arrival_date, departure_date in items
+        ]}, format='json', headers=headers)
+
+    def test_all_items_are_booked_together(self):
+        response = self.book_batch([
+            (self.first, '2030-01-10', '2030-01-15'),
+            (self.second, '2030-01-10', '2030-01-15'),
+            (self.first, '2030-01-15', '2030-01-18'),
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([booking['accommodation'] for booking in response.data['bookings']],
+                         [self.first.id, self.second.id, self.first.id])
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 3)
+
+    def test_conflicts_are_reported_per_item_and_nothing_is_booked(self):
+        Booking.objects.create(user=self.user, accommodation=self.second,
+                               arrival_date=date(2030, 1, 12), departure_date=date(2030, 1, 14))
+
+        response = self.book_batch([
+            (self.first, '2030-01-10', '2030-01-15'),
+            (self.second, '2030-01-10', '2030-01-15'),
+            (self.first, '2030-01-14', '2030-01-16'),
+        ])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([item['index'] for item in response.data['items']], [1, 2])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_batch_retry_with_idempotency_key_is_replayed(self):
+        items = [(self.first, '2030-01-10', '2030-01-15'), (self.second, '2030-01-10', '2030-01-15')]
+
+        first = self.book_batch(items, **{'Idempotency-Key': 'group-1'})
+        retry = self.book_batch(items, **{'Idempotency-Key': 'group-1'})
+
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual([booking['id'] for booking in retry.data['bookings']],
+                         [booking['id'] for booking in first.data['bookings']])
+        self.assertEqual(Booking.objects.count(), 2)
+
+
+class BookingsListTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        today = timezone.localdate()
+        self.past = self.create_booking(accommodation_type, today - timedelta(days=10), today - timedelta(days=5))
+        self.upcoming = [
+            self.create_booking(accommodation_type, today + timedelta(days=days), today + timedelta(days=days + 2))
+            for days in (20, 10)
+        ]
+        self.cancelled = self.create_booking(accommodation_type, today + timedelta(days=3), today + timedelta(days=4),
+                                             is_cancelled=True)
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='password')
+        Booking.objects.create(user=other, accommodation=self.past.accommodation,
+                               arrival_date=today + timedelta(days=1), departure_date=today + timedelta(days=2))
+
+    def create_booking(self, accommodation_type, arrival_date, departure_date, **kwargs):
+        return Booking.objects.create(user=self.user, accommodation=create_accommodation(accommodation_type),
+                                      arrival_date=arrival_date, departure_date=departure_date, **kwargs)
+
+    def test_new_bookings_are_booking_rows_with_accommodation_and_counts(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('bookings_list', args=['new_bookings']))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']],
+                         [self.upcoming[1].id, self.upcoming[0].id])
+        row = response.data['results'][0]
+        self.assertEqual(row['arrival_date'], self.upcoming[1].arrival_date.isoformat())
+        self.assertEqual(row['accommodation']['id'], self.upcoming[1].accommodation_id)
+        self.assertEqual(response.data['counts'],
+                         {'past_bookings': 1, 'new_bookings': 2, 'cancelled_bookings': 1})
+
+    def test_cancelled_bookings_are_listed_only_as_cancelled(self):
+        response = self.client.get(reverse('bookings_list', args=['cancelled_bookings']))
+
+        self.assertEqual([row['id'] for row in response.data['results']], [self.cancelled.id])
+        self.assertTrue(response.data['results'][0]['is_cancelled'])
+
+    def test_unknown_booking_type_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('bookings_list', args=['all'])).status_code, 404)
+
+
+class BookingsExportTests(TestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create_user(username='staff', email='staff@example.com', password='password',
+                                                    is_staff=True)
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        self.accommodation = create_accommodation(accommodation_type)
+        self.other_accommodation = create_accommodation(accommodation_type)
+        self.bookings = [
+            Booking.objects.create(user=self.user, accommodation=self.accommodation,
+                                   arrival_date=date(2030, 1, day), departure_date=date(2030, 1, day + 1))
+            for day in (10, 11, 12)
+        ]
+        Booking.objects.create(user=self.user, accommodation=self.other_accommodation,
+                               arrival_date=date(2030, 1, 11), departure_date=date(2030, 1, 12))
+
+    def export(self, **params):
+        response = self.client.get(reverse('bookings-export'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_is_staff_only(self):
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(self.client.get(reverse('bookings-export')).status_code, 403)
+
+    def test_ndjson_filters_and_resumes_after_id(self):
+        Accommodation.objects.filter(id=self.accommodation.id).update(cost=999, currency='USD')
+        rows = [json.loads(line) for line in self.export(
+            accommodation=self.accommodation.id, date_from='2030-01-11', date_to='2030-01-12',
+        ).splitlines()]
+
+        self.assertEqual([row['id'] for row in rows], [self.bookings[1].id, self.bookings[2].id])
+        self.assertEqual(rows[0]['user_email'], 'guest@example.com')
+        self.assertEqual(rows[0]['arrival_date'], '2030-01-11')
+        self.assertEqual((rows[0]['price_per_night'], rows[0]['price_currency']), ('100.00', settings.BASE_CURRENCY))
+        self.assertNotIn('cost', rows[0])
+
+        rows = self.export(accommodation=self.accommodation.id, after=self.bookings[1].id).splitlines()
+
+        self.assertEqual([json.loads(line)['id'] for line in rows], [self.bookings[2].id])
+
+    def test_csv_has_header(self):
+        lines = self.export(file_format='csv', accommodation=self.other_accommodation.id).splitlines()
+
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'arrival_date', 'departure_date'])
+        self.assertEqual(len(lines), 2)
+
+    def test_invalid_params_are_bad_request(self):
+        self.assertEqual(self.client.get(reverse('bookings-export'), {'date_from': '2030-13-01'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('bookings-export'), {'file_format': 'xml'}).status_code, 400)
+
+    def test_command_writes_all_rows(self):
+        stdout = io.StringIO()
+
+        call_command('export_bookings', stdout=stdout, stderr=io.StringIO())
+
+        self.assertEqual(len(stdout.getvalue().splitlines()), 4)
+
+
+class BookingPartitionTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.accommodation = create_accommodation(AccommodationType.objects.create(name='Отель', description='Отель'))
+
+    def book(self, arrival_date, departure_date, is_cancelled=False):
+        return Booking.objects.create(user=self.user, accommodation=self.accommodation, arrival_date=arrival_date,
+                                      departure_date=departure_date, is_cancelled=is_cancelled)
+
+    def default_partition_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {default_partition_name()}')
+            return cursor.fetchone()[0]
+
+    def test_ensure_partitions_moves_bookings_out_of_default(self):
+        booking = self.book(date(2040, 1, 10), date(2040, 1, 12))
+        self.assertEqual(self.default_partition_count(), 1)
+
+        created = ensure_partitions(0)
+
+        self.assertIn(date(2040, 1, 1), created)
+        self.assertEqual(attached_partitions()[date(2040, 1, 1)], 'bookings_booking_p204001')
+        self.assertEqual(self.default_partition_count(), 0)
+        self.assertEqual(Booking.objects.get(arrival_date=date(2040, 1, 10)).id, booking.id)
+        self.assertEqual(BookedNight.objects.filter(booking_id=booking.id).count(), 2)
+        self.assertEqual(ensure_partitions(0), [])
+
+    def booked_nights(self):
+        return list(BookedNight.objects.order_by('night').values_list('night', 'booking_id', 'hold_id'))
+
+    def test_database_rejects_overlap_written_past_claim_dates(self):
+        booking = self.book(date(2040, 1, 10), date(2040, 1, 15))
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='password')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Booking.objects.bulk_create([Booking(user=other, accommodation=self.accommodation,
+                                                 arrival_date=date(2040, 1, 14), departure_date=date(2040, 1, 16))])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            BookingHold.objects.create(user=other, accommodation=self.accommodation, arrival_date=date(2040, 1, 1),
+                                       departure_date=date(2040, 1, 11), expires_at=timezone.now())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Booking.objects.filter(id=booking.id).update(is_cancelled=True)
+            self.book(date(2040, 1, 12), date(2040, 1, 13))
+            Booking.objects.filter(id=booking.id).update(is_cancelled=False)
+
+        self.book(date(2040, 1, 12), date(2040, 1, 20), is_cancelled=True)
+        self.assertEqual(self.booked_nights(), [(date(2040, 1, day), booking.id, None) for day in range(10, 15)])
+
+    def test_moved_and_cancelled_bookings_free_their_nights(self):
+        booking = self.book(date(2040, 1, 30), date(2040, 2, 2))
+        ensure_partitions(0)
+        self.assertEqual(self.booked_nights(), [
+            (date(2040, 1, 30), booking.id, None), (date(2040, 1, 31), booking.id, None),
+            (date(2040, 2, 1), booking.id, None),
+        ])
+
+        # Перенос в другой месяц перемещает строку между партициями.
+        Booking.objects.filter(id=booking.id).update(arrival_date=date(2040, 3, 5), departure_date=date(2040, 3, 6))
+        self.assertEqual(self.booked_nights(), [(date(2040, 3, 5), booking.id, None)])
+        self.book(date(2040, 1, 30), date(2040, 2, 2))
+
+        Booking.objects.filter(id=booking.id).update(is_cancelled=True)
+        self.assertFalse(BookedNight.objects.filter(booking_id=booking.id).exists())
+
+    def test_admin_cannot_create_or_edit_bookings(self):
+        booking = self.book(date(2040, 1, 10), date(2040, 1, 12))
+        admin = CustomUser.objects.create_superuser(username='admin', email='admin@example.com', password='password')
+        self.client.force_login(admin)
+
+        self.assertEqual(self.client.get(reverse('admin:bookings_booking_add')).status_code, 403)
+        response = self.client.post(reverse('admin:bookings_booking_change', args=[booking.id]), {
+            'arrival_date': '2040-01-01', 'departure_date': '2040-06-01',
+        })
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Booking.objects.get().departure_date, date(2040, 1, 12))
+
+    def test_detach_frees_nights_of_archived_bookings(self):
+        self.book(date(2020, 1, 10), date(2020, 1, 12))
+        kept = self.book(date(2040, 1, 10), date(2040, 1, 11))
+        ensure_partitions(0)
+
+        detached, _ = detach_partitions(date(2020, 2, 1), 'bookings_archive_test')
+
+        self.assertEqual(detached, ['bookings_booking_p202001'])
+        self.assertEqual(self.booked_nights(), [(date(2040, 1, 10), kept.id, None)])
+
+    def test_detach_keeps_partitions_with_unfinished_bookings(self):
+        self.book(date(2040, 1, 10), date(2040, 1, 12), is_cancelled=True)
+        self.book(date(2040, 2, 10), date(2040, 2, 12))
+        ensure_partitions(0)
+
+        detached, skipped = detach_partitions(date(2040, 3, 1), 'bookings_archive_test')
+
+        self.assertIn('bookings_booking_p204001', detached)
+        self.assertEqual(skipped, ['bookings_booking_p204002'])
+        self.assertNotIn(date(2040, 1, 1), attached_partitions())
+        self.assertEqual(list(Booking.objects.values_list('arrival_date', flat=True)), [date(2040, 2, 10)])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM bookings_archive_test.bookings_booking_p204001')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    def test_only_one_concurrent_booking_succeeds(self):
+        accommodation = create_accommodation(AccommodationType.objects.create(name='Отель', description='Отель'))
+        users = [
+            CustomUser.objects.create_user(username=f'guest{n}', email=f'guest{n}@example.com', password='password')
+            for n in range(5)
+        ]
+        barrier = threading.Barrier(len(users))
+        statuses = []
+
+        def book(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                response = client.post(reverse('booking_create'), {
+                    'accommodation': accommodation.id,
+                    'arrival_date': '2030-01-10',
+                    'departure_date': '2030-01-15',
+                }, format='json')
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [201, 409, 409, 409, 409])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_concurrent_duplicates_with_idempotency_key_execute_once(self):
+        accommodation = create_accommodation(AccommodationType.objects.create(name='Отель', description='Отель'))
+        user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        barrier = threading.Barrier(5)
+        responses = []
+
+        def book():
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                responses.append(client.post(reverse('booking_create'), {
+                    'accommodation': accommodation.id,
+                    'arrival_date': '2030-01-10',
+                    'departure_date': '2030-01-15',
+                }, format='json', headers={'Idempotency-Key': 'checkout-1'}))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([response.status_code for response in responses], [201] * 5)
+        self.assertEqual(sum(response.has_header('Idempotent-Replayed') for response in responses), 4)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_concurrent_batches_in_opposite_order_do_not_deadlock(self):
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        accommodations = [create_accommodation(accommodation_type) for _ in range(2)]
+        users = [
+            CustomUser.objects.create_user(username=f'guest{n}', email=f'guest{n}@example.com', password='password')
+            for n in range(2)
+        ]
+        barrier = threading.Barrier(len(users))
+        statuses = []
+
+        def book(user, ordered):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                statuses.append(client.post(reverse('booking-batch-create'), {'items': [
+                    {'accommodation': accommodation.id, 'arrival_date': '2030-01-10', 'departure_date': '2030-01-15'}
+                    for accommodation in ordered
+                ]}, format='json').status_code)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=book, args=(users[0], accommodations)),
+            threading.Thread(target=book, args=(users[1], accommodations[::-1])),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [201, 409])
+        self.assertEqual(Booking.objects.count(), 2)
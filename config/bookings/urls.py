@@ -1,9 +1,23 @@
 from django.urls import path
 
-from .views import BookingCreateAPIView, BookingsListAPIView, BookingCancelAPIView
+from .views import (
+    BookingCreateAPIView,
+    BookingBatchCreateAPIView,
+    BookingsListAPIView,
+    BookingCancelAPIView,
+    BookingsExportAPIView,
+    BookingHoldCreateAPIView,
+    BookingHoldConfirmAPIView,
+    BookingHoldReleaseAPIView,
+)
 
 urlpatterns = [
     path('create/', BookingCreateAPIView.as_view(), name='booking_create'),
+    path('batch/', BookingBatchCreateAPIView.as_view(), name='booking-batch-create'),
     path('list/<str:booking_type>/', BookingsListAPIView.as_view(), name='bookings_list'),
     path('cancel/<int:booking_id>/', BookingCancelAPIView.as_view(), name='cancel-booking'),
+    path('export/', BookingsExportAPIView.as_view(), name='bookings-export'),
+    path('holds/', BookingHoldCreateAPIView.as_view(), name='booking-hold-create'),
+    path('holds/<int:hold_id>/', BookingHoldReleaseAPIView.as_view(), name='booking-hold-release'),
+    path('holds/<int:hold_id>/confirm/', BookingHoldConfirmAPIView.as_view(), name='booking-hold-confirm'),
 ]
@@ -1,5 +1,6 @@
 from django.core.exceptions import ValidationError
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Q
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from django.utils import timezone
@@ -9,11 +10,16 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Booking
-from .serializers import BookingSerializer
-from accommodations.serializers import AccommodationSerializer
-
-from accommodations.models import Accommodation
+from .batch import book_batch
+from .events import BOOKING_CANCELLED, BOOKING_CREATED, publish_booking_events
+from .exports import BOOKINGS_EXPORT
+from .holds import BookingConflict, HoldConflict, claim_dates, claiming_nights, confirm_hold, create_hold
+from .idempotency import IDEMPOTENCY_KEY_PARAMETER, idempotent
+from .models import Booking, BookingHold
+from .serializers import BookingBatchSerializer, BookingHoldSerializer, BookingListSerializer, BookingSerializer
+from accommodations.favorites import FavoriteIdsContextMixin
+from accommodations.models import Accommodation, cover_image_prefetch
+from config.exports import ExportAPIView
 
 
 class BookingCreateAPIView(CreateAPIView):
@@ -31,9 +37,24 @@ class BookingCreateAPIView(CreateAPIView):
             - "Жилье недоступно для бронирования": Жилье не доступно для бронирования.
             - "Жилье с указанным ID не существует": Жилье с указанным ID не существует.
             - "Некорректные данные": Переданные данные некорректны.
+        - 409 Conflict: Жилье уже забронировано на часть выбранных дат или удерживается другим пользователем.
+
+    Собственное удержание пользователя на эти даты снимается при бронировании. Каждая ночь бронирования занимается
+    в базе с ограничением уникальности, поэтому одновременные запросы на одни и те же даты не могут создать
+    двойное бронирование.
+
+    Заголовок Idempotency-Key: повторный запрос с тем же ключом (например, после таймаута) не создает
+    новое бронирование, а получает ответ первого запроса.
+
+    Вместе с бронированием в outbox записывается событие booking.created для уведомлений и синхронизации.
     """
     permission_classes = [IsAuthenticated]
 
+    @swagger_auto_schema(manual_parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         try:
             accommodation_id = request.data.get("accommodation")
@@ -45,15 +66,130 @@ class BookingCreateAPIView(CreateAPIView):
             request.data["user"] = user.id
             serializer = BookingSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            with claiming_nights():
+                claim_dates(user, accommodation.id, serializer.validated_data['arrival_date'],
+                            serializer.validated_data['departure_date'])
+                booking = serializer.save()
+                publish_booking_events(BOOKING_CREATED, [booking])
             return Response({'message': 'Бронирование успешно создано'}, status=status.HTTP_201_CREATED)
+        except HoldConflict:
+            return Response({'error': 'Жилье временно удерживается другим пользователем'},
+                            status=status.HTTP_409_CONFLICT)
+        except BookingConflict:
+            return Response({'error': 'Жилье уже забронировано на выбранные даты'}, status=status.HTTP_409_CONFLICT)
         except Accommodation.DoesNotExist:
             return Response({'error': 'Жилье с указанным ID не существует'}, status=status.HTTP_400_BAD_REQUEST)
         except ValidationError as e:
             return Response({'error': 'Некорректные данные'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class BookingsListAPIView(ListAPIView):
+class BookingBatchCreateAPIView(APIView):
+    """
+    API для пакетного бронирования нескольких размещений одним запросом.
+
+    Параметры запроса:
+    - items (array): Позиции пакета, не больше BOOKING_BATCH_MAX_ITEMS:
+        - accommodation (integer): ID размещения.
+        - arrival_date (string): Дата заезда в формате "YYYY-MM-DD".
+        - departure_date (string): Дата выезда в формате "YYYY-MM-DD".
+
+    Пакет бронируется целиком в одной транзакции: если хотя бы одна позиция недоступна, не создается ни одно
+    бронирование, а в ответе перечисляются ошибки по позициям. Поддерживается заголовок Idempotency-Key.
+
+    Ответы:
+        - 201 Created: Все бронирования созданы, в поле "bookings" - созданные бронирования в порядке позиций.
+        - 400 Bad Request: Некорректные данные.
+        - 409 Conflict: Часть позиций недоступна, в поле "items" - индекс позиции (index) и причина (error).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=BookingBatchSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
+        responses={
+            201: openapi.Response(
+                description='Все бронирования созданы',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'bookings': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                    },
+                ),
+            ),
+            400: openapi.Response(description='Некорректные данные'),
+            409: openapi.Response(
+                description='Часть позиций недоступна, ничего не забронировано',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'error': openapi.Schema(type=openapi.TYPE_STRING),
+                        'items': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    'index': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    'error': openapi.Schema(type=openapi.TYPE_STRING),
+                                },
+                            ),
+                        ),
+                    },
+                ),
+            ),
+        }
+    )
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        serializer = BookingBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        bookings, conflicts = book_batch(request.user, serializer.validated_data['items'])
+        if conflicts:
+            return Response({
+                'error': 'Часть позиций недоступна, ничего не забронировано',
+                'items': [{'index': index, 'error': error} for index, error in sorted(conflicts.items())],
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'message': 'Бронирования успешно созданы',
+            'bookings': [
+                {
+                    'id': booking.id,
+                    'accommodation': booking.accommodation_id,
+                    'arrival_date': booking.arrival_date,
+                    'departure_date': booking.departure_date,
+                }
+                for booking in bookings
+            ],
+        }, status=status.HTTP_201_CREATED)
+
+
+BOOKING_TYPES = ('past_bookings', 'new_bookings', 'cancelled_bookings')
+
+
+def booking_type_filters(today):
+    """
+    Условия вкладок списка бронирований: прошедшие, текущие и будущие, отмененные.
+    Отмененные бронирования попадают только во вкладку cancelled_bookings.
+
+    Граница даты заезда у прошедших бронирований следует из даты выезда и нужна только для отсечения партиций:
+    прошедшие бронирования читаются без партиций будущих месяцев.
+    """
+    return {
+        'past_bookings': Q(is_cancelled=False, departure_date__lte=today, arrival_date__lt=today),
+        'new_bookings': Q(is_cancelled=False, departure_date__gt=today),
+        'cancelled_bookings': Q(is_cancelled=True),
+    }
+
+
+BOOKING_TYPE_ORDERING = {
+    'past_bookings': ('-departure_date', '-id'),
+    'new_bookings': ('arrival_date', 'id'),
+    'cancelled_bookings': ('-id',),
+}
+
+
+class BookingsListAPIView(FavoriteIdsContextMixin, ListAPIView):
     """
     API для отображения списка бронирований пользователя в зависимости от типа.
 
@@ -62,28 +198,71 @@ class BookingsListAPIView(ListAPIView):
         Возможные значения: "past_bookings", "new_bookings", "cancelled_bookings".
 
     Ответы:
-        - 200 OK: Возвращает список бронирований соответствующего типа пользователя.
-        ПРИМЕЧАНИЕ: Если в ответе получен пустой список "[]", проверьте синтаксис запроса.
+        - 200 OK: Бронирования выбранного типа (id, arrival_date, departure_date, is_cancelled) с карточкой
+            размещения в поле "accommodation". Будущие бронирования отсортированы по дате заезда,
+            прошедшие и отмененные - от последних к первым.
+            Ответ постраничный: {"next": "...", "previous": "...", "results": [...]}, см. параметры cursor и page_size.
+            Поле "counts" содержит число бронирований пользователя каждого типа.
+        - 404 Not Found: Неизвестный тип бронирований.
     """
 
-    queryset = Accommodation.objects.all()
     permission_classes = [IsAuthenticated]
-    serializer_class = AccommodationSerializer
+    serializer_class = BookingListSerializer
 
     def get_queryset(self):
-        user = self.request.user
-        booking_type = self.kwargs.get('booking_type')
-        now = timezone.now()
+        if getattr(self, 'swagger_fake_view', False):
+            return Booking.objects.none()
+        booking_type = self.kwargs['booking_type']
+        return (
+            Booking.objects
+            .filter(booking_type_filters(timezone.localdate())[booking_type], user=self.request.user)
+            .select_related('accommodation')
+            .prefetch_related(cover_image_prefetch('accommodation__images'))
+            .order_by(*BOOKING_TYPE_ORDERING[booking_type])
+        )
 
-        if booking_type == 'past_bookings':
-            filter_query = Q(departure_date__lte=now)
-        elif booking_type == 'new_bookings':
-            filter_query = Q(departure_date__gte=now)
-        elif booking_type == 'cancelled_bookings':
-            filter_query = Q(is_cancelled=True)
+    def get_counts(self):
+        """
+        Число бронирований пользователя каждого типа одним агрегирующим запросом.
+        """
+        filters = booking_type_filters(timezone.localdate())
+        return Booking.objects.filter(user=self.request.user).aggregate(
+            **{booking_type: Count('id', filter=filters[booking_type]) for booking_type in BOOKING_TYPES}
+        )
 
-        bookings = Booking.objects.filter(filter_query, user=user)
-        return Accommodation.objects.filter(booking__in=bookings)
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('booking_type', openapi.IN_PATH, type=openapi.TYPE_STRING, enum=list(BOOKING_TYPES),
+                              description='Тип бронирований'),
+        ],
+        responses={
+            200: openapi.Response(
+                description='Бронирования выбранного типа и число бронирований каждого типа',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'next': openapi.Schema(type=openapi.TYPE_STRING, description='Ссылка на следующую страницу'),
+                        'previous': openapi.Schema(type=openapi.TYPE_STRING, description='Ссылка на предыдущую страницу'),
+                        'results': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                                                  description='Бронирования с карточкой размещения'),
+                        'counts': openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={booking_type: openapi.Schema(type=openapi.TYPE_INTEGER)
+                                        for booking_type in BOOKING_TYPES},
+                            description='Число бронирований каждого типа',
+                        ),
+                    },
+                ),
+            ),
+            404: openapi.Response(description='Неизвестный тип бронирований'),
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        if self.kwargs['booking_type'] not in BOOKING_TYPES:
+            return Response({'error': 'Неизвестный тип бронирований'}, status=status.HTTP_404_NOT_FOUND)
+        response = self.list(request, *args, **kwargs)
+        response.data['counts'] = self.get_counts()
+        return response
 
 
 class BookingCancelAPIView(APIView):
@@ -98,6 +277,9 @@ class BookingCancelAPIView(APIView):
         - 404 Not Found: Если указанное бронирование не найдено.
         - 400 Bad Request: Если возникла ошибка при обработке запроса. Может возникнуть, если бронирование уже отменено или произошла другая ошибка.
 
+    Заголовок Idempotency-Key: повторный запрос с тем же ключом получает ответ первого запроса.
+
+    Вместе с отменой в outbox записывается событие booking.cancelled для уведомлений и синхронизации.
     """
 
     permission_classes = [IsAuthenticated]
@@ -105,6 +287,7 @@ class BookingCancelAPIView(APIView):
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('booking_id', in_=openapi.IN_PATH, type=openapi.TYPE_INTEGER, description='Идентификатор бронирования'),
+            IDEMPOTENCY_KEY_PARAMETER,
         ],
         responses={
             200: openapi.Response(description='Бронирование успешно отменено'),
@@ -112,17 +295,20 @@ class BookingCancelAPIView(APIView):
             400: openapi.Response(description='Ошибка при обработке запроса. Может возникнуть, если бронирование уже отменено или произошла другая ошибка.')
         }
     )
+    @idempotent
     def patch(self, request, *args, **kwargs):
         try:
             user = self.request.user
             booking_id = kwargs['booking_id']
-            booking = Booking.objects.get(id=booking_id, user=user.id)
+            with transaction.atomic():
+                booking = Booking.objects.select_for_update().get(id=booking_id, user=user.id)
 
-            if booking.is_cancelled:
-                return Response({'error': 'Бронирование уже отменено'}, status=status.HTTP_400_BAD_REQUEST)
+                if booking.is_cancelled:
+                    return Response({'error': 'Бронирование уже отменено'}, status=status.HTTP_400_BAD_REQUEST)
 
-            booking.is_cancelled = True
-            booking.save()
+                booking.is_cancelled = True
+                booking.save()
+                publish_booking_events(BOOKING_CANCELLED, [booking])
             return Response({'successful': 'Бронирование успешно отменено'}, status=status.HTTP_200_OK)
         except Booking.DoesNotExist:
             return Response({'error': 'Бронирование не найдено'}, status=status.HTTP_404_NOT_FOUND)
@@ -130,4 +316,129 @@ class BookingCancelAPIView(APIView):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BookingHoldCreateAPIView(APIView):
+    """
+    API для временного удержания дат размещения на время оформления бронирования.
+
+    Параметры запроса:
+    - accommodation (integer): ID размещения.
+    - arrival_date (string): Дата заезда в формате "YYYY-MM-DD".
+    - departure_date (string): Дата выезда в формате "YYYY-MM-DD".
+
+    Удержание действует BOOKING_HOLD_TTL секунд (поле expires_at): в это время даты не доступны в поиске
+    и не могут быть забронированы другими пользователями. Повторное удержание тех же дат заменяет прежнее.
+
+    Ответы:
+        - 201 Created: Даты удержаны.
+        - 400 Bad Request: Некорректные данные или жилье недоступно для бронирования.
+        - 409 Conflict: Даты уже забронированы или удерживаются другим пользователем.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=BookingHoldSerializer,
+        responses={
+            201: BookingHoldSerializer(),
+            400: openapi.Response(description='Некорректные данные или жилье недоступно для бронирования'),
+            409: openapi.Response(description='Даты уже забронированы или удерживаются другим пользователем'),
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = BookingHoldSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if not serializer.validated_data['accommodation'].available:
+            return Response({'error': 'Жилье недоступно для бронирования'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            hold = create_hold(
+                request.user,
+                serializer.validated_data['accommodation'].id,
+                serializer.validated_data['arrival_date'],
+                serializer.validated_data['departure_date'],
+            )
+        except (BookingConflict, HoldConflict):
+            return Response({'error': 'Жилье уже забронировано или удерживается на выбранные даты'},
+                            status=status.HTTP_409_CONFLICT)
+        return Response(BookingHoldSerializer(hold).data, status=status.HTTP_201_CREATED)
+
+
+class BookingHoldConfirmAPIView(APIView):
+    """
+    API для подтверждения удержания: удержание превращается в бронирование.
+
+    Параметры запроса:
+    - hold_id (integer): Идентификатор удержания.
+
+    Ответы:
+        - 201 Created: Бронирование создано.
+        - 404 Not Found: Удержание не найдено или истекло.
+        - 409 Conflict: Жилье уже забронировано на выбранные даты.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
+        responses={
+            201: openapi.Response(description='Бронирование создано'),
+            404: openapi.Response(description='Удержание не найдено или истекло'),
+            409: openapi.Response(description='Жилье уже забронировано на выбранные даты'),
+        }
+    )
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        try:
+            booking = confirm_hold(request.user, kwargs['hold_id'])
+        except BookingConflict:
+            return Response({'error': 'Жилье уже забронировано на выбранные даты'}, status=status.HTTP_409_CONFLICT)
+        if booking is None:
+            return Response({'error': 'Удержание не найдено или истекло'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'message': 'Бронирование успешно создано', 'id': booking.id},
+                        status=status.HTTP_201_CREATED)
+
+
+class BookingHoldReleaseAPIView(APIView):
+    """
+    API для отмены удержания дат.
+
+    Параметры запроса:
+    - hold_id (integer): Идентификатор удержания.
+
+    Ответы:
+        - 204 No Content: Удержание снято.
+        - 404 Not Found: Удержание не найдено.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        responses={
+            204: openapi.Response(description='Удержание снято'),
+            404: openapi.Response(description='Удержание не найдено'),
+        }
+    )
+    def delete(self, request, *args, **kwargs):
+        hold = BookingHold.objects.filter(id=kwargs['hold_id'], user=request.user).first()
+        if hold is None:
+            return Response({'error': 'Удержание не найдено'}, status=status.HTTP_404_NOT_FOUND)
+        hold.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BookingsExportAPIView(ExportAPIView):
+    """
+    API для потоковой выгрузки бронирований (только для персонала).
+
+    Параметры запроса:
+    - file_format (str): ndjson (по умолчанию) или csv.
+    - date_from, date_to (date): Период по дате заезда, границы включаются.
+    - accommodation (int): Идентификатор размещения.
+    - after (int): Продолжить выгрузку после бронирования с этим id.
+
+    Ответы:
+        - 200 OK: Бронирования в порядке id, вместе с пользователем и размещением.
+        - 400 Bad Request: Некорректные параметры выгрузки.
+        - 403 Forbidden: Пользователь не является персоналом.
+    """
 
+    export = BOOKINGS_EXPORT
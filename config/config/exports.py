@@ -0,0 +1,225 @@
+import csv
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Export:
+    """
+    Описание выгрузки: queryset, колонки (имя в выгрузке -> путь поля для values_list)
+    и поле даты, по которому фильтруется период.
+    """
+
+    name: str
+    queryset: models.QuerySet
+    columns: dict
+    date_field: str
+
+    def rows(self, date_from=None, date_to=None, accommodation_id=None, after_id=None):
+        """
+        Строки выгрузки в порядке id, границы периода включаются.
+
+        Строки читаются серверным курсором пачками по EXPORT_CHUNK_SIZE, поэтому память не зависит
+        от объема выгрузки; after_id продолжает прерванную выгрузку после строки с этим id.
+        """
+        queryset = self.queryset.all()
+        if isinstance(self.queryset.model._meta.get_field(self.date_field), models.DateTimeField):
+            if date_from is not None:
+                queryset = queryset.filter(**{f'{self.date_field}__gte': _start_of_day(date_from)})
+            if date_to is not None:
+                queryset = queryset.filter(**{f'{self.date_field}__lt': _start_of_day(date_to + timedelta(days=1))})
+        else:
+            if date_from is not None:
+                queryset = queryset.filter(**{f'{self.date_field}__gte': date_from})
+            if date_to is not None:
+                queryset = queryset.filter(**{f'{self.date_field}__lte': date_to})
+        if accommodation_id is not None:
+            queryset = queryset.filter(accommodation_id=accommodation_id)
+        if after_id is not None:
+            queryset = queryset.filter(id__gt=after_id)
+
+        names = list(self.columns)
+        values = queryset.order_by('id').values_list(*self.columns.values())
+        for row in values.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+            yield dict(zip(names, row))
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _format_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def render_ndjson(export, rows):
+    for row in rows:
+        yield json.dumps({name: _format_value(value) for name, value in row.items()}, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def render_csv(export, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(export.columns)
+    for row in rows:
+        yield writer.writerow(_format_value(value) for value in row.values())
+
+
+RENDERERS = {
+    'ndjson': render_ndjson,
+    'csv': render_csv,
+}
+
+
+def parse_export_params(params):
+    """
+    Разбирает параметры выгрузки: date_from и date_to (YYYY-MM-DD), accommodation и after (id).
+    """
+    parsed = {}
+    for name in ('date_from', 'date_to'):
+        value = params.get(name)
+        if value:
+            try:
+                parsed[name] = parse_date(value)
+            except ValueError:
+                parsed[name] = None
+            if parsed[name] is None:
+                raise ExportError(f'Параметр {name} должен быть датой в формате YYYY-MM-DD.')
+    for name, key in (('accommodation', 'accommodation_id'), ('after', 'after_id')):
+        value = params.get(name)
+        if value:
+            try:
+                parsed[key] = int(value)
+            except (TypeError, ValueError):
+                raise ExportError(f'Параметр {name} должен быть целым числом.')
+    return parsed
+
+
+class ExportAPIView(APIView):
+    """
+    Базовое представление потоковой выгрузки для персонала. Подклассы задают атрибут export.
+    """
+
+    permission_classes = [IsAdminUser]
+    export = None
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('file_format', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(RENDERERS),
+                              description='Формат выгрузки (по умолчанию ndjson)'),
+            openapi.Parameter('date_from', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE,
+                              description='Начало периода (включительно)'),
+            openapi.Parameter('date_to', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE,
+                              description='Конец периода (включительно)'),
+            openapi.Parameter('accommodation', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description='ID размещения'),
+            openapi.Parameter('after', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description='Продолжить выгрузку после строки с этим id'),
+        ],
+        responses={
+            200: openapi.Response(description='Потоковая выгрузка в формате NDJSON или CSV'),
+            400: openapi.Response(description='Bad Request - некорректные параметры выгрузки'),
+            403: openapi.Response(description='Forbidden - выгрузка доступна только персоналу'),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        file_format = request.query_params.get('file_format', 'ndjson')
+        if file_format not in RENDERERS:
+            return Response({'error': f'Формат выгрузки должен быть одним из: {", ".join(RENDERERS)}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            params = parse_export_params(request.query_params)
+        except ExportError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            RENDERERS[file_format](self.export, self.export.rows(**params)),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.export.name}.{file_format}"'
+        return response
+
+
+class ExportCommand(BaseCommand):
+    """
+    Базовая команда потоковой выгрузки в файл или stdout. Подклассы задают атрибут export.
+    """
+
+    export = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(RENDERERS), default='ndjson', dest='file_format',
+                            help='Формат выгрузки (по умолчанию ndjson).')
+        parser.add_argument('--output', help='Файл для выгрузки. По умолчанию - stdout.')
+        parser.add_argument('--date-from', help='Начало периода (YYYY-MM-DD, включительно).')
+        parser.add_argument('--date-to', help='Конец периода (YYYY-MM-DD, включительно).')
+        parser.add_argument('--accommodation', help='ID размещения.')
+        parser.add_argument('--after', help='Продолжить выгрузку после строки с этим id.')
+
+    def handle(self, *args, file_format='ndjson', output=None, **options):
+        try:
+            params = parse_export_params(options)
+        except ExportError as error:
+            raise CommandError(str(error))
+
+        progress = {'count': 0, 'last_id': params.get('after_id')}
+
+        def tracked_rows():
+            for row in self.export.rows(**params):
+                yield row
+                progress['count'] += 1
+                progress['last_id'] = row['id']
+
+        chunks = RENDERERS[file_format](self.export, tracked_rows())
+        try:
+            if output is None:
+                for chunk in chunks:
+                    self.stdout.write(chunk, ending='')
+            else:
+                # При продолжении выгрузки (--after) строки дописываются в конец файла без повторного заголовка CSV.
+                resume = params.get('after_id') is not None
+                with open(output, 'a' if resume else 'w', newline='', encoding='utf-8') as file:
+                    if resume and file_format == 'csv':
+                        next(chunks)
+                    for chunk in chunks:
+                        file.write(chunk)
+        except BaseException:
+            self.stderr.write(f'Выгрузка прервана после {progress["count"]} строк. '
+                              f'Для продолжения укажите --after {progress["last_id"]}.')
+            raise
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено {progress["count"]} строк ({self.export.name}), последний id: {progress["last_id"]}.'
+        ))
@@ -0,0 +1,210 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import namedtuple
+
+from django.db.models import F, OrderBy, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+# inclusive - строка в позиции курсора входит в страницу (ссылки с пустых страниц).
+KeysetCursor = namedtuple('KeysetCursor', ['position', 'reverse', 'inclusive'])
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация по сортировке, уже примененной к queryset.
+
+    Сортировка берется из queryset (в том числе из OrderingFilter), к ней всегда добавляется
+    первичный ключ, поэтому позиция в выдаче уникальна, а курсор хранит значения всех полей
+    сортировки последней строки страницы. Следующая страница выбирается условием
+    "строго после этих значений" без OFFSET, поэтому стоимость запроса не зависит от глубины страницы.
+    NULL-значения считаются наибольшими (NULLS LAST при сортировке по возрастанию).
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(self.cursor.position, reverse, inclusive=self.cursor.inclusive)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = self.cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def paginate_ordered_ids(self, queryset, request, get_ids, view=None):
+        """
+        Пагинация по готовому упорядоченному списку ID, который возвращает get_ids(queryset), например из кэша.
+
+        Позиция курсора ищется в списке по первичному ключу, а строки страницы читаются из queryset по ID,
+        поэтому курсоры совместимы с обычной keyset-пагинацией. Если get_ids вернул None, строки курсора
+        в списке нет или список устарел, страница строится обычным keyset-запросом.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        ids = get_ids(queryset.order_by(*self.get_order_by(reverse=False)))
+        if ids is None:
+            return self.paginate_queryset(queryset, request, view)
+
+        if self.cursor is None:
+            index = -1
+        else:
+            pk_name = queryset.model._meta.pk.name
+            pk_index = next(i for i, order in enumerate(self.ordering) if order.lstrip('-') in (pk_name, 'pk'))
+            try:
+                index = ids.index(self.cursor.position[pk_index])
+            except ValueError:
+                return self.paginate_queryset(queryset, request, view)
+
+        inclusive = self.cursor is not None and self.cursor.inclusive
+        if self.cursor is not None and self.cursor.reverse:
+            end = index + 1 if inclusive else index
+            start = max(end - self.page_size, 0)
+            page_ids = ids[start:end]
+            self.has_next = True
+            self.has_previous = start > 0
+        else:
+            start = index if inclusive else index + 1
+            page_ids = ids[start:start + self.page_size]
+            self.has_next = start + self.page_size < len(ids)
+            self.has_previous = self.cursor is not None
+
+        rows = {row.pk: row for row in queryset.order_by().filter(pk__in=page_ids)}
+        if len(rows) < len(page_ids):
+            # Список устарел: часть строк удалена или больше не подходит под фильтры.
+            return self.paginate_queryset(queryset, request, view)
+        self.page = [rows[pk] for pk in page_ids]
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = []
+        for order in queryset.query.order_by or queryset.model._meta.ordering:
+            if isinstance(order, OrderBy) and isinstance(order.expression, F):
+                order = ('-' if order.descending else '') + order.expression.name
+            if not isinstance(order, str):
+                raise ValueError(f'{type(self).__name__} поддерживает сортировку только по именам полей.')
+            ordering.append(order)
+
+        pk_name = queryset.model._meta.pk.name
+        if not any(order.lstrip('-') in (pk_name, 'pk') for order in ordering):
+            ordering.append(pk_name)
+        return tuple(ordering)
+
+    def get_order_by(self, reverse):
+        order_by = []
+        for order in self.ordering:
+            descending = order.startswith('-') != reverse
+            expression = F(order.lstrip('-'))
+            order_by.append(expression.desc(nulls_first=True) if descending else expression.asc(nulls_last=True))
+        return order_by
+
+    def get_keyset_filter(self, position, reverse, inclusive=False):
+        keyset_filter = Q(pk__in=[])
+        equal_prefix = Q()
+        for order, value in zip(self.ordering, position):
+            field_name = order.lstrip('-')
+            descending = order.startswith('-') != reverse
+            if value is None:
+                after = Q(**{f'{field_name}__isnull': False}) if descending else Q(pk__in=[])
+                equal = Q(**{f'{field_name}__isnull': True})
+            else:
+                lookup = 'lt' if descending else 'gt'
+                after = Q(**{f'{field_name}__{lookup}': value})
+                if not descending:
+                    after |= Q(**{f'{field_name}__isnull': True})
+                equal = Q(**{field_name: value})
+            keyset_filter |= equal_prefix & after
+            equal_prefix &= equal
+        if inclusive:
+            keyset_filter |= equal_prefix
+        return keyset_filter
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Пустая страница при обратном проходе: следующая страница начинается со строки курсора.
+            return self.encode_cursor(KeysetCursor(position=self.cursor.position, reverse=False, inclusive=True))
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(KeysetCursor(position=position, reverse=False, inclusive=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return self.encode_cursor(KeysetCursor(position=self.cursor.position, reverse=True, inclusive=True))
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(KeysetCursor(position=position, reverse=True, inclusive=False))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = tokens['p']
+            reverse = bool(tokens.get('r', False))
+            inclusive = bool(tokens.get('i', False))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return KeysetCursor(position=position, reverse=reverse, inclusive=inclusive)
+
+    def encode_cursor(self, cursor):
+        tokens = {'p': cursor.position}
+        if cursor.reverse:
+            tokens['r'] = 1
+        if cursor.inclusive:
+            tokens['i'] = 1
+        encoded = urlsafe_b64encode(json.dumps(tokens, default=str).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for order in ordering:
+            value = instance
+            for attr in order.lstrip('-').split('__'):
+                value = value[attr] if isinstance(value, dict) else getattr(value, attr)
+            position.append(value)
+        return position
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework.authtoken',
@@ -48,6 +49,9 @@ INSTALLED_APPS = [
     'accommodations',
     'feedbacks',
     'bookings',
+    'uploads',
+    'analytics',
+    'outbox',
 
 ]
 
@@ -93,6 +97,8 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
 OTP_LIFETIME = timedelta(minutes=15)
 
+AVAILABILITY_HORIZON = timedelta(days=365)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -113,6 +119,58 @@ DATABASES = {
 }
 
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+SEARCH_CACHE_TIMEOUT = 300
+SEARCH_CACHE_STALE_TIMEOUT = 60
+SEARCH_CACHE_LOCK_TIMEOUT = 10
+SEARCH_CACHE_MAX_IDS = 5000
+
+SEARCH_DEFAULT_RADIUS_KM = 10
+SEARCH_MAX_RADIUS_KM = 200
+
+BASE_CURRENCY = os.getenv('BASE_CURRENCY', 'KGS')
+
+FACETS_PRICE_BUCKET_SIZE = 1000
+
+DETAIL_LATEST_FEEDBACKS = 3
+
+FAVORITES_CACHE_TIMEOUT = 60 * 60
+FAVORITES_BULK_MAX_IDS = 100
+
+SIMILARITY_TOP_K = 20
+SIMILARITY_BATCH_SIZE = 1024
+
+EXPORT_CHUNK_SIZE = 2000
+
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+BOOKING_HOLD_TTL = 10 * 60
+BOOKING_HOLD_SWEEP_BATCH_SIZE = 500
+BOOKING_BATCH_MAX_ITEMS = 20
+BOOKING_PARTITION_MONTHS_AHEAD = 13
+BOOKING_ARCHIVE_SCHEMA = 'bookings_archive'
+
+ANALYTICS_MAX_DAYS = 366
+ANALYTICS_REBUILD_CHUNK_SIZE = 200
+ANALYTICS_REBUILD_CHUNK_DAYS = 31
+
+OUTBOX_HANDLERS = {
+    'booking.created': ['outbox.handlers.log_event'],
+    'booking.cancelled': ['outbox.handlers.log_event'],
+}
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_LEASE = 5 * 60
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_RETRY_MAX_DELAY = 60 * 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -135,7 +193,9 @@ AUTH_PASSWORD_VALIDATORS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'config.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 20,
 }
 
 
@@ -159,6 +219,23 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
 CLOUDINARY_URL = os.getenv('CLOUDINARY_URL')
 
+UPLOAD_STORAGE_BACKEND = os.getenv('UPLOAD_STORAGE_BACKEND', 'uploads.backends.CloudinaryBackend')
+UPLOAD_STAGING_DIR = os.getenv('UPLOAD_STAGING_DIR', os.path.join(BASE_DIR, 'staging'))
+UPLOAD_LOCAL_ROOT = os.getenv('UPLOAD_LOCAL_ROOT', os.path.join(BASE_DIR, 'media'))
+UPLOAD_LOCAL_URL = os.getenv('UPLOAD_LOCAL_URL', 'http://localhost:8000/neobooking/media/')
+UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', 4))
+UPLOAD_TRANSFER_WORKERS = int(os.getenv('UPLOAD_TRANSFER_WORKERS', 8))
+UPLOAD_BATCH_MAX_FILES = 50
+UPLOAD_MAX_ATTEMPTS = 3
+UPLOAD_RETRY_DELAY = 30
+UPLOAD_STALE_AFTER = 10 * 60
+
+IMAGE_VARIANTS = {
+    'card': (480, 320),
+    'gallery': (1280, 960),
+    'avatar': (256, 256),
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -0,0 +1,347 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from accounts.models import OTP, CustomUser
+from accommodations.models import (
+    Accommodation,
+    AccommodationImage,
+    AccommodationType,
+    AvailabilityNight,
+    SimilarAccommodations,
+    StayDate,
+)
+from bookings.models import BookedNight, Booking
+from feedbacks.models import Feedback
+
+from .pagination import KeysetCursorPagination
+
+
+LARGE_TABLES = {
+    Accommodation._meta.db_table,
+    AccommodationImage._meta.db_table,
+    AvailabilityNight._meta.db_table,
+    StayDate._meta.db_table,
+    Booking._meta.db_table,
+    BookedNight._meta.db_table,
+    Feedback._meta.db_table,
+    OTP._meta.db_table,
+    CustomUser._meta.db_table,
+}
+
+INDEX_SCANS = ('Index Scan', 'Index Only Scan')
+
+CITIES = [f'Город {n}' for n in range(20)]
+
+
+def seq_scans(plan, tables=LARGE_TABLES):
+    """
+    Таблицы из tables, которые план читает целиком.
+
+    Кроме Seq Scan учитываются полные проходы по индексу с фильтрацией строк (индексный узел без
+    Index Cond, но с Filter): так планировщик обходит запрет на последовательное сканирование,
+    когда подходящего индекса нет.
+    """
+    found = []
+    if plan.get('Relation Name') in tables and (
+        plan['Node Type'] == 'Seq Scan'
+        or plan['Node Type'] in INDEX_SCANS and 'Index Cond' not in plan and 'Filter' in plan
+    ):
+        found.append(f"{plan['Node Type']} on {plan['Relation Name']}")
+    for child in plan.get('Plans', []):
+        found.extend(seq_scans(child, tables))
+    return found
+
+
+class ExplainRegressionTests(TestCase):
+    """
+    Проверяет, что SQL горячих эндпоинтов читает большие таблицы по индексам.
+
+    Каждый запрос эндпоинта перехватывается и прогоняется через EXPLAIN на заполненной базе с
+    enable_seqscan = off: так планировщик выбирает последовательное сканирование только тогда,
+    когда для условия запроса нет подходящего индекса, и результат не зависит от объема тестовых данных.
+    random_page_cost выставляется в типичное для SSD значение 1.1.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        cls.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'user{n}', email=f'user{n}@example.com') for n in range(200)
+        ])
+
+        accommodations = Accommodation.objects.bulk_create([
+            Accommodation(
+                name=f'Отель {n}',
+                description='Уютный отель в центре города',
+                city=CITIES[n % len(CITIES)],
+                latitude=42 + (n % 100) / 100,
+                longitude=74 + (n % 37) / 100,
+                accommodation_type=accommodation_type,
+                cost=Decimal(500 + n % 50 * 100),
+                currency='KGS',
+                price_normalized=Decimal(500 + n % 50 * 100),
+                adults_capacity=1 + n % 6,
+                children_capacity=n % 3,
+                bed_type=str(1 + n % 3),
+                rating=Decimal('7.5'),
+            )
+            for n in range(2000)
+        ])
+        cls.accommodation = accommodations[0]
+
+        today = timezone.localdate()
+        AccommodationImage.objects.bulk_create([
+            AccommodationImage(accommodation=accommodation, image=f'https://img.example/{accommodation.id}/{n}.jpg')
+            for accommodation in accommodations
+            for n in range(3)
+        ])
+        StayDate.objects.bulk_create([
+            StayDate(accommodation=accommodation, start_date=today, end_date=today + timedelta(days=30))
+            for accommodation in accommodations
+        ])
+        AvailabilityNight.objects.bulk_create([
+            AvailabilityNight(accommodation=accommodation, date=today + timedelta(days=n))
+            for accommodation in accommodations
+            for n in range(30)
+        ], batch_size=5000)
+        Booking.objects.bulk_create([
+            Booking(
+                user=users[n % len(users)],
+                accommodation=accommodation,
+                arrival_date=today + timedelta(days=n % 20),
+                departure_date=today + timedelta(days=n % 20 + 3),
+                is_cancelled=n % 10 == 0,
+            )
+            for n, accommodation in enumerate(accommodations)
+        ])
+        Booking.objects.create(user=cls.user, accommodation=accommodations[1], arrival_date=today - timedelta(days=5),
+                               departure_date=today - timedelta(days=2))
+        Feedback.objects.bulk_create([
+            Feedback(user=users[n % len(users)], accommodation=accommodation, text='Хорошо')
+            for n, accommodation in enumerate(accommodations)
+        ])
+        OTP.objects.bulk_create([
+            OTP(user=user, title='EmailConfirmation', value=1000 + n, expired_date=timezone.now())
+            for n, user in enumerate(users)
+        ])
+        SimilarAccommodations.objects.create(accommodation=cls.accommodation, similar_ids=[
+            accommodation.id for accommodation in accommodations[1:21]
+        ])
+        cls.accommodation.is_favorite.add(cls.user)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            # Бронирования секционированы по месяцу заезда. Пустые партиции без статистики планировщик
+            # читает любым индексом, поэтому проверяются только партиции с данными.
+            cursor.execute(f'SELECT DISTINCT tableoid::regclass::text FROM {Booking._meta.db_table}')
+            cls.large_tables = LARGE_TABLES | {name for name, in cursor.fetchall()}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL random_page_cost = 1.1')
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+            cursor.execute('RESET enable_seqscan')
+            cursor.execute('RESET random_page_cost')
+        return plan[0]['Plan'] if isinstance(plan, list) else json.loads(plan)[0]['Plan']
+
+    def assert_no_seq_scans(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format='json' if method != 'get' else None)
+        self.assertLess(response.status_code, 500)
+
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            plan = self.explain(sql)
+            self.assertEqual(seq_scans(plan, self.large_tables), [],
+                             f'Последовательное сканирование в запросе {url}:\n{sql}\n'
+                             f'{json.dumps(plan, ensure_ascii=False, indent=2)}')
+
+    def test_search(self):
+        url = reverse('accommodation-search')
+        today = timezone.localdate()
+        self.assert_no_seq_scans('get', url, {'city': CITIES[3], 'ordering': 'cost', 'cost__gte': 1000})
+        self.assert_no_seq_scans('get', url, {'city': CITIES[3], 'num_adults': 4, 'num_children': 1})
+        self.assert_no_seq_scans('get', url, {'ordering': '-cost'})
+        self.assert_no_seq_scans('get', url, {'q': 'уютный отель'})
+        self.assert_no_seq_scans('get', url, {'lat': 42.5, 'lon': 74.1, 'radius_km': 5})
+        self.assert_no_seq_scans('get', url, {
+            'city': CITIES[3],
+            'check_in_date': today + timedelta(days=25),
+            'check_out_date': today + timedelta(days=27),
+        })
+
+    def test_search_facets(self):
+        self.assert_no_seq_scans('get', reverse('accommodation-search-facets'), {'city': CITIES[5]})
+
+    def test_accommodation_detail(self):
+        self.assert_no_seq_scans('get', reverse('accommodation-detail', args=[self.accommodation.id]))
+
+    def test_similar_accommodations(self):
+        self.assert_no_seq_scans('get', reverse('similar-accommodations-list', args=[self.accommodation.id]))
+        self.assert_no_seq_scans('get', reverse('similar-accommodations-list', args=[self.accommodation.id + 1]))
+
+    def test_favorite_accommodations(self):
+        self.assert_no_seq_scans('get', reverse('favorite-accommodations-list'))
+
+    def test_feedbacks(self):
+        self.assert_no_seq_scans('get', reverse('accommodation-feedbacks', args=[self.accommodation.id]))
+
+    def test_bookings_list(self):
+        for booking_type in ('past_bookings', 'new_bookings', 'cancelled_bookings'):
+            self.assert_no_seq_scans('get', reverse('bookings_list', args=[booking_type]))
+
+    def test_booking_create(self):
+        today = timezone.localdate()
+        self.assert_no_seq_scans('post', reverse('booking_create'), {
+            'accommodation': self.accommodation.id,
+            'arrival_date': today + timedelta(days=25),
+            'departure_date': today + timedelta(days=28),
+        })
+        self.assert_no_seq_scans('post', reverse('booking-batch-create'), {'items': [
+            {'accommodation': self.accommodation.id, 'arrival_date': today, 'departure_date': today + timedelta(days=2)},
+        ]})
+
+    def test_email_confirmation(self):
+        self.assert_no_seq_scans('post', reverse('email_confirmation'), {'email': 'user7@example.com', 'otp': '1007'})
+
+
+class KeysetCursorPaginationTests(TestCase):
+    """
+    Проход по страницам KeysetCursorPagination на ценах с повторами и NULL.
+    """
+
+    PRICES = [300, 100, None, 200, 100, 100, None, 200, 300, 100, None]
+
+    @classmethod
+    def setUpTestData(cls):
+        accommodation_type = AccommodationType.objects.create(name='Отель', description='Отель')
+        # bulk_create не вызывает сигналы, поэтому цена в базовой валюте задается как есть, включая NULL.
+        cls.accommodations = Accommodation.objects.bulk_create([
+            Accommodation(name=f'Отель {n}', description='Описание', city='Бишкек',
+                          accommodation_type=accommodation_type, cost=price or 1, currency='KGS',
+                          price_normalized=price, adults_capacity=2, bed_type='2', rating=8)
+            for n, price in enumerate(cls.PRICES)
+        ])
+
+    def paginate(self, queryset, params=None, url='/items/'):
+        request = Request(APIRequestFactory().get(url, params))
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        return paginator, [accommodation.id for accommodation in page]
+
+    def follow(self, queryset, link):
+        return self.paginate(queryset, url=link)
+
+    def expected_ids(self, descending):
+        def key(accommodation):
+            price = accommodation.price_normalized
+            if descending:
+                return price is not None, -(price or 0), accommodation.id
+            return price is None, price or 0, accommodation.id
+        return [accommodation.id for accommodation in sorted(self.accommodations, key=key)]
+
+    def traverse(self, ordering, page_size):
+        queryset = Accommodation.objects.order_by(ordering)
+        pages = []
+        paginator, page = self.paginate(queryset, {'page_size': page_size})
+        pages.append(page)
+        while paginator.get_next_link():
+            paginator, page = self.follow(queryset, paginator.get_next_link())
+            pages.append(page)
+
+        backward = [page]
+        while paginator.get_previous_link():
+            paginator, page = self.follow(queryset, paginator.get_previous_link())
+            backward.append(page)
+        return pages, backward[::-1]
+
+    def test_forward_and_backward_traversal_over_ties_and_nulls(self):
+        for ordering, descending in (('price_normalized', False), ('-price_normalized', True)):
+            for page_size in (1, 2, 3, 4):
+                with self.subTest(ordering=ordering, page_size=page_size):
+                    forward, backward = self.traverse(ordering, page_size)
+
+                    self.assertEqual([id for page in forward for id in page], self.expected_ids(descending))
+                    self.assertEqual(backward, forward)
+                    self.assertTrue(all(len(page) == page_size for page in forward[:-1]))
+
+    def test_empty_page_when_earlier_rows_are_gone(self):
+        queryset = Accommodation.objects.order_by('price_normalized')
+        paginator, first_page = self.paginate(queryset, {'page_size': 3})
+        paginator, second_page = self.follow(queryset, paginator.get_next_link())
+        Accommodation.objects.filter(id__in=first_page).delete()
+
+        paginator, page = self.follow(queryset, paginator.get_previous_link())
+
+        self.assertEqual(page, [])
+        self.assertIsNone(paginator.get_previous_link())
+        self.assertEqual(self.follow(queryset, paginator.get_next_link())[1], second_page)
+
+    def test_empty_page_when_later_rows_are_gone(self):
+        queryset = Accommodation.objects.order_by('price_normalized')
+        paginator, first_page = self.paginate(queryset, {'page_size': 3})
+        next_link = paginator.get_next_link()
+        Accommodation.objects.exclude(id__in=first_page).delete()
+
+        paginator, page = self.follow(queryset, next_link)
+
+        self.assertEqual(page, [])
+        self.assertIsNone(paginator.get_next_link())
+        self.assertEqual(self.follow(queryset, paginator.get_previous_link())[1], first_page)
+
+    def test_ordered_ids_share_cursors_with_keyset_pages(self):
+        queryset = Accommodation.objects.order_by('price_normalized')
+        expected = self.expected_ids(descending=False)
+        request = Request(APIRequestFactory().get('/items/', {'page_size': 4}))
+        paginator = KeysetCursorPagination()
+
+        page = paginator.paginate_ordered_ids(queryset, request,
+                                              lambda ordered: list(ordered.values_list('id', flat=True)))
+        self.assertEqual([accommodation.id for accommodation in page], expected[:4])
+
+        paginator, page = self.follow(queryset, paginator.get_next_link())
+        self.assertEqual(page, expected[4:8])
+
+        # Курсор строки, которой нет в списке, и устаревший список переводят пагинацию на keyset-запрос.
+        for get_ids in (lambda ordered: expected[:4], lambda ordered: [*expected, 10 ** 9]):
+            request = Request(APIRequestFactory().get(paginator.get_next_link()))
+            fallback = KeysetCursorPagination()
+            page = fallback.paginate_ordered_ids(queryset, request, get_ids)
+            self.assertEqual([accommodation.id for accommodation in page], expected[8:])
+
+    def test_invalid_cursor_is_not_found(self):
+        queryset = Accommodation.objects.order_by('price_normalized')
+        for cursor in ('not-base64!', 'eyJwIjogWzFdfQ==', 'e30='):
+            with self.subTest(cursor=cursor), self.assertRaises(NotFound):
+                self.paginate(queryset, {'cursor': cursor})
+
+        response = APIClient().get(reverse('accommodation-search'), {'cursor': 'not-base64!'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_size_is_capped(self):
+        queryset = Accommodation.objects.order_by('price_normalized')
+        paginator = KeysetCursorPagination()
+
+        self.assertEqual(paginator.get_page_size(Request(APIRequestFactory().get('/items/', {'page_size': 1000}))),
+                         paginator.max_page_size)
+        self.assertEqual(len(self.paginate(queryset, {'page_size': 5})[1]), 5)
+        self.assertEqual(len(self.paginate(queryset)[1]), len(self.PRICES))
@@ -26,6 +26,8 @@ urlpatterns = [
     path('neobooking/accommodations/', include("accommodations.urls")),
     path('neobooking/feedbacks/', include("feedbacks.urls")),
     path('neobooking/bookings/', include("bookings.urls")),
+    path('neobooking/uploads/', include("uploads.urls")),
+    path('neobooking/analytics/', include("analytics.urls")),
 
     path('neobooking/swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('neobooking/swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
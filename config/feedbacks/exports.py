@@ -0,0 +1,20 @@
+from config.exports import Export
+
+from .models import Feedback
+
+
+FEEDBACKS_EXPORT = Export(
+    name='feedbacks',
+    queryset=Feedback.objects.all(),
+    columns={
+        'id': 'id',
+        'date_created': 'date_created',
+        'user_id': 'user_id',
+        'user_username': 'user__username',
+        'accommodation_id': 'accommodation_id',
+        'accommodation_name': 'accommodation__name',
+        'accommodation_city': 'accommodation__city',
+        'text': 'text',
+    },
+    date_field='date_created',
+)
@@ -0,0 +1,7 @@
+from config.exports import ExportCommand
+from feedbacks.exports import FEEDBACKS_EXPORT
+
+
+class Command(ExportCommand):
+    help = 'Потоково выгружает отзывы в NDJSON или CSV.'
+    export = FEEDBACKS_EXPORT
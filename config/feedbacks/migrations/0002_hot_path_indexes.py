@@ -0,0 +1,22 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:38
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accommodations', '0007_hot_path_indexes'),
+        ('feedbacks', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['accommodation', 'id'], name='feedback_accommodation_idx'),
+        ),
+    ]
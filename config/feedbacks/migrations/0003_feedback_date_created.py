@@ -0,0 +1,29 @@
+# Generated by Django 5.0.3 on 2026-10-17 07:12
+
+import django.utils.timezone
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accommodations', '0009_catalog_natural_keys'),
+        ('feedbacks', '0002_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='date_created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['date_created', 'id'], name='feedback_date_created_idx'),
+        ),
+    ]
@@ -8,4 +8,10 @@ class Feedback(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     accommodation = models.ForeignKey(Accommodation, on_delete=models.CASCADE)
     text = models.TextField()
+    date_created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['accommodation', 'id'], name='feedback_accommodation_idx'),
+            models.Index(fields=['date_created', 'id'], name='feedback_date_created_idx'),
+        ]
@@ -1,11 +1,13 @@
-from rest_framework.serializers import ModelSerializer, CharField
+from rest_framework.serializers import ModelSerializer, CharField, SerializerMethodField
+
+from uploads.derivatives import variant_url
 
 from .models import Feedback
 
 
 class FeedbackSerializer(ModelSerializer):
     username = CharField(source='user.username', read_only=True)
-    user_image = CharField(source='user.image', read_only=True)
+    user_image = SerializerMethodField()
 
     class Meta:
         model = Feedback
@@ -17,3 +19,6 @@ class FeedbackSerializer(ModelSerializer):
             'accommodation',
             'text'
         ]
+
+    def get_user_image(self, feedback):
+        return variant_url(feedback.user.image, feedback.user.image_variants, 'avatar')
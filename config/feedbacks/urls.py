@@ -1,7 +1,8 @@
 from django.urls import path
 
-from .views import AccommodationFeedbacks
+from .views import AccommodationFeedbacks, FeedbacksExportAPIView
 
 urlpatterns = [
-    path('accommodation/<int:accommodation_id>/', AccommodationFeedbacks.as_view(), name='accommodation-feedbacks')
+    path('accommodation/<int:accommodation_id>/', AccommodationFeedbacks.as_view(), name='accommodation-feedbacks'),
+    path('export/', FeedbacksExportAPIView.as_view(), name='feedbacks-export'),
 ]
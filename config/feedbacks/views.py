@@ -3,6 +3,9 @@ from rest_framework.generics import ListAPIView
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from config.exports import ExportAPIView
+
+from .exports import FEEDBACKS_EXPORT
 from .models import Feedback
 from .serializers import FeedbackSerializer
 
@@ -16,7 +19,8 @@ class AccommodationFeedbacks(ListAPIView):
 
     Ответы:
         - 200 OK: Список объектов обратной связи.
-        ПРИМЕЧАНИЕ: Если в ответе получен пустой список "[]", возможно вы обращаетесь к несуществующему отелю либо отель не имеет отзывов.
+            Ответ постраничный: {"next": "...", "previous": "...", "results": [...]}, см. параметры cursor и page_size.
+        ПРИМЕЧАНИЕ: Если в ответе получен пустой список "results", возможно вы обращаетесь к несуществующему отелю либо отель не имеет отзывов.
     """
 
     serializer_class = FeedbackSerializer
@@ -34,4 +38,23 @@ class AccommodationFeedbacks(ListAPIView):
     )
     def get_queryset(self):
         accommodation_id = self.kwargs['accommodation_id']
-        return Feedback.objects.filter(accommodation_id=accommodation_id)
+        return Feedback.objects.select_related('user').filter(accommodation_id=accommodation_id)
+
+
+class FeedbacksExportAPIView(ExportAPIView):
+    """
+    API для потоковой выгрузки отзывов (только для персонала).
+
+    Параметры запроса:
+    - file_format (str): ndjson (по умолчанию) или csv.
+    - date_from, date_to (date): Период по дате создания отзыва, границы включаются.
+    - accommodation (int): Идентификатор размещения.
+    - after (int): Продолжить выгрузку после отзыва с этим id.
+
+    Ответы:
+        - 200 OK: Отзывы в порядке id, вместе с пользователем и размещением.
+        - 400 Bad Request: Некорректные параметры выгрузки.
+        - 403 Forbidden: Пользователь не является персоналом.
+    """
+
+    export = FEEDBACKS_EXPORT
@@ -0,0 +1,14 @@
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def log_event(event):
+    """
+    Обработчик по умолчанию: записывает событие в журнал.
+
+    Обработчик - вызываемый объект, который принимает OutboxEvent. Событие может быть доставлено повторно,
+    поэтому обработчики должны быть идемпотентными, например учитывать event.id.
+    """
+    logger.info('Outbox event %s %s: %s', event.id, event.event_type, event.payload)
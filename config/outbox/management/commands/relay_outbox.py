@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from outbox.relay import relay_pending
+
+
+class Command(BaseCommand):
+    help = ('Доставляет события из outbox обработчикам OUTBOX_HANDLERS. '
+            'Для большей пропускной способности можно запустить несколько процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help='Число событий, захватываемых за один раз.')
+        parser.add_argument('--interval', type=int,
+                            help='Проверять outbox каждые INTERVAL секунд, не завершаясь. По умолчанию - один раз.')
+
+    def handle(self, *args, batch_size=None, interval=None, **options):
+        while True:
+            delivered, failed = relay_pending(batch_size)
+            if delivered or failed or interval is None:
+                self.stdout.write(self.style.SUCCESS(f'Доставлено событий: {delivered}, с ошибкой: {failed}.'))
+            if interval is None:
+                return
+            time.sleep(interval)
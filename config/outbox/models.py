@@ -0,0 +1,35 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """
+    Событие для доставки одному обработчику из OUTBOX_HANDLERS.
+
+    Событие записывается в той же транзакции, что и изменение данных, поэтому оно появляется тогда и только
+    тогда, когда изменение зафиксировано. Доставленные события удаляются, события, для которых исчерпаны
+    OUTBOX_MAX_ATTEMPTS попыток, остаются со статусом failed.
+    """
+
+    PENDING = 'pending'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Ожидает доставки'),
+        (FAILED, 'Ошибка доставки'),
+    ]
+
+    event_type = models.CharField(max_length=64)
+    handler = models.CharField(max_length=255)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at', 'id'], condition=models.Q(status='pending'),
+                         name='outbox_pending_idx'),
+        ]
@@ -0,0 +1,104 @@
+import logging
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_handler(path):
+    return import_string(path)
+
+
+def publish(event_type, *payloads):
+    """
+    Записывает события типа event_type для каждого обработчика из OUTBOX_HANDLERS[event_type].
+
+    Вызывается внутри транзакции, которая меняет данные: события доставляются только после ее фиксации
+    и не теряются, если процесс завершится сразу после нее.
+    """
+    handlers = settings.OUTBOX_HANDLERS.get(event_type, ())
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(event_type=event_type, handler=handler, payload=payload)
+        for payload in payloads
+        for handler in handlers
+    ])
+
+
+def _retry_delay(attempts):
+    return min(settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX_DELAY)
+
+
+def _claim(batch_size):
+    """
+    Захватывает до batch_size готовых к доставке событий через SELECT ... FOR UPDATE SKIP LOCKED.
+
+    Захваченные события откладываются на OUTBOX_LEASE секунд, поэтому другие процессы их не берут, а если
+    процесс завершится во время доставки, события снова станут доступны после истечения этого срока.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=OutboxEvent.PENDING, available_at__lte=now)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+            attempts=F('attempts') + 1, available_at=now + timedelta(seconds=settings.OUTBOX_LEASE),
+        )
+    for event in events:
+        event.attempts += 1
+    return events
+
+
+def relay_batch(batch_size):
+    """
+    Доставляет пачку событий их обработчикам. Доставленные события удаляются, при ошибке событие
+    откладывается с экспоненциально растущей задержкой, пока не исчерпаны OUTBOX_MAX_ATTEMPTS попыток.
+
+    Несколько процессов могут доставлять события одновременно, не мешая друг другу.
+    Возвращает (число доставленных, число неудачных) событий.
+    """
+    events = _claim(batch_size)
+    delivered, failed = [], []
+    for event in events:
+        try:
+            get_handler(event.handler)(event)
+        except Exception as error:
+            logger.warning('Outbox event %s for %s failed: %s', event.id, event.handler, error)
+            event.error = str(error)
+            if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                event.status = OutboxEvent.FAILED
+            else:
+                event.available_at = timezone.now() + timedelta(seconds=_retry_delay(event.attempts))
+            failed.append(event)
+        else:
+            delivered.append(event.id)
+
+    with transaction.atomic():
+        OutboxEvent.objects.filter(id__in=delivered).delete()
+        OutboxEvent.objects.bulk_update(failed, ['status', 'available_at', 'error'])
+    return len(delivered), len(failed)
+
+
+def relay_pending(batch_size):
+    """
+    Доставляет все готовые события пачками по batch_size. Возвращает (доставлено, неудачно).
+    """
+    delivered = failed = 0
+    while True:
+        batch_delivered, batch_failed = relay_batch(batch_size)
+        if not batch_delivered and not batch_failed:
+            return delivered, failed
+        delivered += batch_delivered
+        failed += batch_failed
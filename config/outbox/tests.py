@@ -0,0 +1,112 @@
+import threading
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from accommodations.models import AccommodationType
+from accommodations.tests import create_accommodation
+from bookings.models import Booking
+
+from .models import OutboxEvent
+from .relay import publish, relay_batch, relay_pending
+
+
+delivered = []
+
+
+def record_event(event):
+    delivered.append((event.event_type, event.payload))
+
+
+def fail_event(event):
+    raise RuntimeError('partner is down')
+
+
+HANDLERS = {
+    'booking.created': ['outbox.tests.record_event'],
+    'booking.cancelled': ['outbox.tests.record_event', 'outbox.tests.fail_event'],
+}
+
+
+@override_settings(OUTBOX_HANDLERS=HANDLERS, OUTBOX_MAX_ATTEMPTS=2)
+class OutboxTests(TestCase):
+    def setUp(self):
+        delivered.clear()
+        self.user = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.accommodation = create_accommodation(AccommodationType.objects.create(name='Отель', description='Отель'))
+
+    def book(self, arrival_date='2030-01-10', departure_date='2030-01-12'):
+        return self.client.post(reverse('booking_create'), {
+            'accommodation': self.accommodation.id,
+            'arrival_date': arrival_date,
+            'departure_date': departure_date,
+        }, format='json')
+
+    def test_booking_writes_event_with_booking(self):
+        self.assertEqual(self.book().status_code, 201)
+        self.assertEqual(self.book('2030-01-11', '2030-01-13').status_code, 409)
+
+        booking = Booking.objects.get()
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.event_type, event.handler), ('booking.created', 'outbox.tests.record_event'))
+        self.assertEqual(event.payload['booking_id'], booking.id)
+        self.assertEqual(event.payload['arrival_date'], '2030-01-10')
+
+    def test_relay_delivers_and_retries_per_handler(self):
+        self.book()
+        booking = Booking.objects.get()
+        self.client.patch(reverse('cancel-booking', kwargs={'booking_id': booking.id}))
+
+        with self.assertLogs('outbox.relay', 'WARNING'):
+            self.assertEqual(relay_pending(10), (2, 1))
+        self.assertEqual([event_type for event_type, _ in delivered], ['booking.created', 'booking.cancelled'])
+        failed = OutboxEvent.objects.get()
+        self.assertEqual((failed.handler, failed.status, failed.attempts), ('outbox.tests.fail_event', 'pending', 1))
+        self.assertGreater(failed.available_at, timezone.now())
+
+        OutboxEvent.objects.update(available_at=timezone.now())
+        with self.assertLogs('outbox.relay', 'WARNING'):
+            relay_pending(10)
+
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts, failed.error), ('failed', 2, 'partner is down'))
+        self.assertEqual(relay_pending(10), (0, 0))
+
+    def test_expired_lease_is_claimed_again(self):
+        publish('booking.created', {'booking_id': 1})
+        OutboxEvent.objects.update(attempts=1, available_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(relay_batch(10), (1, 0))
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+@override_settings(OUTBOX_HANDLERS=HANDLERS)
+class ConcurrentRelayTests(TransactionTestCase):
+    def test_locked_events_are_skipped(self):
+        delivered.clear()
+        publish('booking.created', {'booking_id': 1}, {'booking_id': 2})
+        first = OutboxEvent.objects.order_by('id').first()
+        result = {}
+
+        def relay():
+            try:
+                result['relayed'] = relay_batch(10)
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            OutboxEvent.objects.select_for_update().get(id=first.id)
+            thread = threading.Thread(target=relay)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(result['relayed'], (1, 0))
+        self.assertEqual(delivered, [('booking.created', {'booking_id': 2})])
+        self.assertEqual(list(OutboxEvent.objects.values_list('id', flat=True)), [first.id])
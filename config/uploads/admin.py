@@ -0,0 +1,6 @@
+from django.contrib import admin
+
+from .models import ImageDerivative, Upload
+
+admin.site.register(Upload)
+admin.site.register(ImageDerivative)
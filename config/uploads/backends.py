@@ -0,0 +1,35 @@
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class CloudinaryBackend:
+    """
+    Хранилище Cloudinary, настраивается через CLOUDINARY_URL.
+    """
+
+    def upload(self, path, folder):
+        from cloudinary.uploader import upload
+
+        response = upload(str(path), folder=f'{folder}/', resource_type='auto')
+        return response['secure_url']
+
+
+class LocalFileSystemBackend:
+    """
+    Локальное хранилище для разработки и тестов: файлы копируются в UPLOAD_LOCAL_ROOT
+    и раздаются по адресу UPLOAD_LOCAL_URL.
+    """
+
+    def upload(self, path, folder):
+        path = Path(path)
+        destination = Path(settings.UPLOAD_LOCAL_ROOT) / folder / path.name
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, destination)
+        return f'{settings.UPLOAD_LOCAL_URL.rstrip("/")}/{folder}/{path.name}'
+
+
+def get_backend():
+    return import_string(settings.UPLOAD_STORAGE_BACKEND)()
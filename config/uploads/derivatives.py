@@ -0,0 +1,83 @@
+import hashlib
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from .models import ImageDerivative
+
+
+FORMATS = {
+    ImageDerivative.JPEG: ('JPEG', '.jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+    ImageDerivative.WEBP: ('WEBP', '.webp', {'quality': 80, 'method': 4}),
+}
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_derivatives(hashes):
+    """
+    Уже загруженные производные изображения по хэшу содержимого: {хэш: {вариант: {формат: url}}}.
+    """
+    cached = {}
+    derivatives = ImageDerivative.objects.filter(content_hash__in=set(hashes))
+    for derivative in derivatives.values_list('content_hash', 'variant', 'format', 'url'):
+        digest, variant, image_format, url = derivative
+        cached.setdefault(digest, {}).setdefault(variant, {})[image_format] = url
+    return cached
+
+
+def _render(image, size, image_format, path):
+    pillow_format, _, options = FORMATS[image_format]
+    variant = ImageOps.fit(image, size, method=Image.Resampling.LANCZOS)
+    variant.save(path, pillow_format, **options)
+
+
+def build_derivatives(backend, path, digest, folder, variants, cached=None):
+    """
+    Строит варианты изображения фиксированного размера (IMAGE_VARIANTS) в форматах JPEG и WebP и загружает их
+    в хранилище. Варианты, уже загруженные для того же содержимого (cached), не пересобираются.
+
+    Возвращает все варианты {вариант: {формат: url}} и список новых ImageDerivative для сохранения.
+    """
+    result = {variant: dict(urls) for variant, urls in (cached or {}).items() if variant in variants}
+    missing = [
+        (variant, image_format)
+        for variant in variants for image_format in FORMATS
+        if image_format not in result.get(variant, {})
+    ]
+    if not missing:
+        return result, []
+
+    created = []
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    for variant, image_format in missing:
+        derivative_path = (
+            Path(settings.UPLOAD_STAGING_DIR) / f'{digest[:16]}_{variant}_{uuid4().hex[:8]}{FORMATS[image_format][1]}'
+        )
+        try:
+            _render(image, settings.IMAGE_VARIANTS[variant], image_format, derivative_path)
+            url = backend.upload(derivative_path, f'{folder}/derivatives')
+        finally:
+            derivative_path.unlink(missing_ok=True)
+        result.setdefault(variant, {})[image_format] = url
+        created.append(ImageDerivative(content_hash=digest, variant=variant, format=image_format, url=url))
+    return result, created
+
+
+def variant_url(original, variants, variant, image_format=ImageDerivative.JPEG):
+    """
+    URL варианта изображения нужного размера; если вариант еще не построен - оригинал (для JPEG) или None.
+    """
+    url = (variants or {}).get(variant, {}).get(image_format)
+    if url is None and image_format == ImageDerivative.JPEG:
+        return original
+    return url
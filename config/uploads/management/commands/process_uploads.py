@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from uploads.processing import process_pending_uploads, requeue_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Отправляет в хранилище загрузки, оставшиеся в очереди, и повторяет зависшие загрузки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int,
+                            help='Проверять очередь каждые INTERVAL секунд, не завершаясь. По умолчанию - один раз.')
+
+    def handle(self, *args, interval=None, **options):
+        while True:
+            requeued = requeue_stale_uploads()
+            counts = process_pending_uploads()
+            if requeued or counts or interval is None:
+                summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items())) or 'нет загрузок'
+                self.stdout.write(self.style.SUCCESS(f'Возвращено в очередь: {requeued}. Обработано - {summary}.'))
+            if interval is None:
+                return
+            time.sleep(interval)
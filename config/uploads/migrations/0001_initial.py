@@ -0,0 +1,37 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accommodations', '0009_catalog_natural_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Upload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('accommodation_image', 'Изображение размещения'), ('profile_image', 'Фото профиля')], max_length=32)),
+                ('staged_path', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Ожидает загрузки'), ('processing', 'Загружается'), ('done', 'Загружено'), ('failed', 'Ошибка загрузки')], default='pending', max_length=16)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('url', models.URLField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('accommodation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='accommodations.accommodation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='upload_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+from django.db import models
+
+from accounts.models import CustomUser
+from accommodations.models import Accommodation
+
+
+class Upload(models.Model):
+    """
+    Загрузка изображения во внешнее хранилище.
+
+    Файл сначала сохраняется в локальный каталог UPLOAD_STAGING_DIR, затем фоновый обработчик отправляет его
+    в хранилище и записывает полученный URL в изображение размещения или в профиль пользователя.
+    """
+
+    ACCOMMODATION_IMAGE = 'accommodation_image'
+    PROFILE_IMAGE = 'profile_image'
+    KIND_CHOICES = [
+        (ACCOMMODATION_IMAGE, 'Изображение размещения'),
+        (PROFILE_IMAGE, 'Фото профиля'),
+    ]
+
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Ожидает загрузки'),
+        (PROCESSING, 'Загружается'),
+        (DONE, 'Загружено'),
+        (FAILED, 'Ошибка загрузки'),
+    ]
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='uploads')
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    accommodation = models.ForeignKey(Accommodation, on_delete=models.CASCADE, null=True, blank=True,
+                                      related_name='uploads')
+    staged_path = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    url = models.URLField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(status='pending'), name='upload_pending_idx'),
+        ]
+
+
+class ImageDerivative(models.Model):
+    """
+    Загруженный вариант изображения фиксированного размера. Варианты привязаны к хэшу содержимого исходного
+    файла, поэтому повторная загрузка того же изображения использует уже построенные варианты.
+    """
+
+    JPEG = 'jpeg'
+    WEBP = 'webp'
+    FORMAT_CHOICES = [
+        (JPEG, 'JPEG'),
+        (WEBP, 'WebP'),
+    ]
+
+    content_hash = models.CharField(max_length=64)
+    variant = models.CharField(max_length=16)
+    format = models.CharField(max_length=8, choices=FORMAT_CHOICES)
+    url = models.URLField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'variant', 'format'], name='unique_image_derivative'),
+        ]
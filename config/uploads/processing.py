@@ -0,0 +1,237 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from accommodations.models import AccommodationImage
+
+from .backends import get_backend
+from .derivatives import build_derivatives, cached_derivatives, content_hash
+from .models import ImageDerivative, Upload
+
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_CONTENT_TYPES = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+}
+
+FOLDERS = {
+    Upload.ACCOMMODATION_IMAGE: 'accommodation_images',
+    Upload.PROFILE_IMAGE: 'profiles_images',
+}
+
+KIND_VARIANTS = {
+    Upload.ACCOMMODATION_IMAGE: ('card', 'gallery'),
+    Upload.PROFILE_IMAGE: ('avatar',),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _stage_file(file):
+    staging_dir = Path(settings.UPLOAD_STAGING_DIR)
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    path = staging_dir / f'{uuid4().hex}{ALLOWED_CONTENT_TYPES[file.content_type]}'
+    with open(path, 'wb') as staged_file:
+        for chunk in file.chunks():
+            staged_file.write(chunk)
+    return path
+
+
+def stage_uploads(files, user, kind, accommodation=None):
+    """
+    Сохраняет загруженные файлы в UPLOAD_STAGING_DIR и ставит их в очередь на отправку в хранилище одной задачей.
+
+    Файлы отправляются после фиксации текущей транзакции, поэтому запрос возвращается сразу,
+    а загрузки получают статус pending.
+    """
+    uploads = Upload.objects.bulk_create([
+        Upload(user=user, kind=kind, accommodation=accommodation, staged_path=str(_stage_file(file)))
+        for file in files
+    ])
+    enqueue([upload.id for upload in uploads])
+    return uploads
+
+
+def stage_upload(file, user, kind, accommodation=None):
+    return stage_uploads([file], user, kind, accommodation=accommodation)[0]
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.UPLOAD_WORKERS, thread_name_prefix='upload')
+        return _executor
+
+
+def _process_in_worker(upload_ids):
+    try:
+        process_uploads(upload_ids)
+    except Exception:
+        logger.exception('Uploads %s failed', upload_ids)
+    finally:
+        # У каждого потока пула свое соединение с базой, его нужно закрыть после задачи.
+        connections.close_all()
+
+
+def _schedule_retry(upload_ids, attempts):
+    """
+    Повторяет неудачные загрузки в пуле через UPLOAD_RETRY_DELAY секунд, удваивая задержку с каждой попыткой.
+    Отложенный повтор живет только в этом процессе; после перезапуска загрузки подберет process_uploads --interval.
+    """
+    delay = settings.UPLOAD_RETRY_DELAY * 2 ** (attempts - 1)
+    timer = threading.Timer(delay, lambda: _get_executor().submit(_process_in_worker, upload_ids))
+    timer.daemon = True
+    timer.start()
+
+
+def enqueue(upload_ids):
+    """
+    Передает загрузки пулу из UPLOAD_WORKERS потоков после фиксации транзакции.
+    При UPLOAD_WORKERS = 0 загрузки обрабатываются синхронно.
+    """
+    upload_ids = list(upload_ids)
+    if settings.UPLOAD_WORKERS == 0:
+        transaction.on_commit(lambda: process_uploads(upload_ids))
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_process_in_worker, upload_ids))
+
+
+def _claim(upload_ids):
+    with transaction.atomic():
+        uploads = list(
+            Upload.objects
+            .select_for_update(skip_locked=True)
+            .filter(id__in=upload_ids, status=Upload.PENDING)
+            .order_by('id')
+        )
+        Upload.objects.filter(id__in=[upload.id for upload in uploads]).update(
+            status=Upload.PROCESSING, attempts=F('attempts') + 1, updated_at=timezone.now(),
+        )
+    for upload in uploads:
+        upload.attempts += 1
+    return uploads
+
+
+def _transfer(backend, upload, digest, cached):
+    """
+    Загружает оригинал и его варианты. Ошибка построения вариантов не срывает загрузку:
+    пока вариантов нет, клиенты получают оригинал.
+    """
+    try:
+        url = backend.upload(upload.staged_path, FOLDERS[upload.kind])
+    except Exception as error:
+        return None, {}, [], error
+    try:
+        variants, derivatives = build_derivatives(
+            backend, upload.staged_path, digest, FOLDERS[upload.kind], KIND_VARIANTS[upload.kind], cached,
+        )
+    except Exception:
+        logger.exception('Image variants for upload %s failed', upload.id)
+        variants, derivatives = {}, []
+    return url, variants, derivatives, None
+
+
+def _transfer_all(uploads):
+    """
+    Отправляет файлы в хранилище параллельно, не более UPLOAD_TRANSFER_WORKERS одновременно,
+    поэтому время пачки близко ко времени самой долгой загрузки.
+
+    Хэши содержимого и уже построенные варианты читаются заранее, чтобы потоки пула не обращались к базе.
+    Возвращает (url, варианты, новые ImageDerivative, ошибка) для каждой загрузки.
+    """
+    backend = get_backend()
+    digests = [content_hash(upload.staged_path) for upload in uploads]
+    cached = cached_derivatives(digests)
+    tasks = [(upload, digest, cached.get(digest)) for upload, digest in zip(uploads, digests)]
+    if len(tasks) == 1:
+        return [_transfer(backend, *tasks[0])]
+    with ThreadPoolExecutor(max_workers=min(settings.UPLOAD_TRANSFER_WORKERS, len(tasks))) as executor:
+        return list(executor.map(lambda task: _transfer(backend, *task), tasks))
+
+
+def _apply(uploads):
+    AccommodationImage.objects.bulk_create(
+        [AccommodationImage(accommodation_id=upload.accommodation_id, image=upload.url, variants=upload.variants)
+         for upload in uploads if upload.kind == Upload.ACCOMMODATION_IMAGE],
+        ignore_conflicts=True,
+    )
+    for upload in uploads:
+        if upload.kind == Upload.PROFILE_IMAGE:
+            CustomUser.objects.filter(id=upload.user_id).update(image=upload.url, image_variants=upload.variants)
+
+
+def process_uploads(upload_ids):
+    """
+    Отправляет загрузки в хранилище вместе с вариантами изображений и записывает URL в изображения размещений
+    (одним bulk_create) или в профили пользователей.
+
+    Загрузки захватываются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому один файл не отправят два
+    обработчика. При ошибке загрузка возвращается в очередь, пока не исчерпаны UPLOAD_MAX_ATTEMPTS попыток,
+    и при фоновой обработке (UPLOAD_WORKERS > 0) повторяется с задержкой. Возвращает итоговые статусы захваченных загрузок по их id.
+    """
+    uploads = _claim(upload_ids)
+    if not uploads:
+        return {}
+
+    now = timezone.now()
+    derivatives = []
+    for upload, (url, variants, created, error) in zip(uploads, _transfer_all(uploads)):
+        upload.updated_at = now
+        if error is None:
+            upload.status, upload.url, upload.error, upload.variants = Upload.DONE, url, '', variants
+            derivatives.extend(created)
+        else:
+            upload.status = Upload.FAILED if upload.attempts >= settings.UPLOAD_MAX_ATTEMPTS else Upload.PENDING
+            upload.error = str(error)
+
+    with transaction.atomic():
+        ImageDerivative.objects.bulk_create(derivatives, ignore_conflicts=True)
+        _apply([upload for upload in uploads if upload.status == Upload.DONE])
+        Upload.objects.bulk_update(uploads, ['status', 'url', 'error', 'updated_at'])
+
+    for upload in uploads:
+        if upload.status in (Upload.DONE, Upload.FAILED):
+            Path(upload.staged_path).unlink(missing_ok=True)
+    retries = [upload for upload in uploads if upload.status == Upload.PENDING]
+    if retries and settings.UPLOAD_WORKERS > 0:
+        _schedule_retry([upload.id for upload in retries], max(upload.attempts for upload in retries))
+    return {upload.id: upload.status for upload in uploads}
+
+
+def requeue_stale_uploads():
+    """
+    Возвращает в очередь загрузки, которые слишком долго находятся в обработке (например, после перезапуска).
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.UPLOAD_STALE_AFTER)
+    return (
+        Upload.objects
+        .filter(status=Upload.PROCESSING, updated_at__lt=stale_before)
+        .update(status=Upload.PENDING, updated_at=timezone.now())
+    )
+
+
+def process_pending_uploads():
+    """
+    Синхронно обрабатывает все загрузки в очереди пачками по UPLOAD_BATCH_MAX_FILES.
+    Возвращает число обработанных загрузок по статусам.
+    """
+    counts = {}
+    pending_ids = list(Upload.objects.filter(status=Upload.PENDING).order_by('id').values_list('id', flat=True))
+    for start in range(0, len(pending_ids), settings.UPLOAD_BATCH_MAX_FILES):
+        statuses = process_uploads(pending_ids[start:start + settings.UPLOAD_BATCH_MAX_FILES])
+        for upload_status in statuses.values():
+            counts[upload_status] = counts.get(upload_status, 0) + 1
+    return counts
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+from .models import Upload
+
+
+class UploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Upload
+        fields = (
+            'id',
+            'kind',
+            'accommodation',
+            'status',
+            'url',
+            'error',
+            'created_at',
+            'updated_at',
+        )
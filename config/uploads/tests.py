@@ -0,0 +1,231 @@
+import io
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from accommodations.models import AccommodationImage, AccommodationType
+from accommodations.tests import create_accommodation
+
+from .models import ImageDerivative, Upload
+from .processing import process_pending_uploads
+
+
+class FailingBackend:
+    def upload(self, path, folder):
+        raise ConnectionError('storage unavailable')
+
+
+class FlakyBackend:
+    """
+    Хранилище, которое отказывает failures раз, а затем принимает файлы.
+    """
+
+    failures = 0
+
+    def upload(self, path, folder):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise ConnectionError('storage unavailable')
+        return f'http://testserver/media/{folder}/{Path(path).name}'
+
+
+class ConcurrentBackend:
+    """
+    Хранилище, которое завершает загрузку, только когда все файлы пачки отправляются одновременно.
+    """
+
+    barrier = None
+
+    def upload(self, path, folder):
+        self.barrier.wait(timeout=5)
+        return f'http://testserver/media/{folder}/{Path(path).name}'
+
+
+def png(name='photo.png', color='red'):
+    content = io.BytesIO()
+    Image.new('RGB', (1600, 1000), color).save(content, 'PNG')
+    return SimpleUploadedFile(name, content.getvalue(), content_type='image/png')
+
+
+class UploadTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.local_root = Path(directory.name) / 'media'
+        settings_override = override_settings(
+            UPLOAD_STORAGE_BACKEND='uploads.backends.LocalFileSystemBackend',
+            UPLOAD_STAGING_DIR=str(Path(directory.name) / 'staging'),
+            UPLOAD_LOCAL_ROOT=str(self.local_root),
+            UPLOAD_LOCAL_URL='http://testserver/media/',
+            UPLOAD_WORKERS=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff = CustomUser.objects.create_user(username='staff', email='staff@example.com', password='password',
+                                                    is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.accommodation = create_accommodation(AccommodationType.objects.create(name='Отель', description='Отель'))
+
+    def add_image(self):
+        return self.client.post(reverse('accommodation-images-add', args=[self.accommodation.id]), {'image': png()},
+                                format='multipart')
+
+    def test_accommodation_image_is_uploaded_after_response(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.add_image()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['data']['status'], Upload.PENDING)
+        self.assertFalse(AccommodationImage.objects.exists())
+
+        for callback in callbacks:
+            callback()
+
+        upload = Upload.objects.get()
+        self.assertEqual(upload.status, Upload.DONE)
+        self.assertEqual(AccommodationImage.objects.get().image, upload.url)
+        self.assertFalse(Path(upload.staged_path).exists())
+        self.assertTrue((self.local_root / 'accommodation_images' / Path(upload.staged_path).name).exists())
+
+        status_response = self.client.get(reverse('upload-status', args=[upload.id]))
+        self.assertEqual(status_response.data['status'], Upload.DONE)
+        self.assertEqual(status_response.data['url'], upload.url)
+
+    def test_profile_image_is_uploaded_in_background(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('my_profile'), {'image': png()}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['image_upload']['status'], Upload.PENDING)
+        self.staff.refresh_from_db()
+        self.assertEqual(self.staff.image, Upload.objects.get().url)
+        self.assertEqual(set(self.staff.image_variants), {'avatar'})
+        profile = self.client.get('/neobooking/accounts/profile/me/').data
+        self.assertEqual(profile['image_url'], self.staff.image_variants['avatar']['jpeg'])
+
+    def add_images(self, *images):
+        return self.client.post(reverse('accommodation-images-batch-add', args=[self.accommodation.id]),
+                                {'images': list(images)}, format='multipart')
+
+    def test_batch_images_are_uploaded_concurrently_and_inserted_together(self):
+        ConcurrentBackend.barrier = threading.Barrier(5)
+        with self.settings(UPLOAD_STORAGE_BACKEND='uploads.tests.ConcurrentBackend'):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.add_images(*(png(f'photo{n}.png') for n in range(5)))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual([result['file'] for result in response.data['data']], [f'photo{n}.png' for n in range(5)])
+        self.assertEqual(set(Upload.objects.values_list('status', flat=True)), {Upload.DONE})
+        self.assertEqual(
+            set(AccommodationImage.objects.values_list('image', flat=True)),
+            set(Upload.objects.values_list('url', flat=True)),
+        )
+        self.assertEqual(AccommodationImage.objects.count(), 5)
+
+    def test_batch_with_invalid_file_is_rejected_before_upload(self):
+        invalid = SimpleUploadedFile('notes.txt', b'text', content_type='text/plain')
+
+        response = self.add_images(png(), invalid)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['file'] for result in response.data['files']], ['notes.txt'])
+        self.assertFalse(Upload.objects.exists())
+
+    def test_image_variants_are_built_and_reused_by_content_hash(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_image()
+        image = AccommodationImage.objects.get()
+
+        self.assertEqual(set(image.variants), {'card', 'gallery'})
+        card_name = image.variants['card']['webp'].rsplit('/', 1)[1]
+        card_path = self.local_root / 'accommodation_images' / 'derivatives' / card_name
+        with Image.open(card_path) as card:
+            self.assertEqual((card.format, card.size), ('WEBP', (480, 320)))
+        self.assertEqual(ImageDerivative.objects.count(), 4)
+
+        other_accommodation = create_accommodation(AccommodationType.objects.get())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('accommodation-images-add', args=[other_accommodation.id]), {'image': png()},
+                             format='multipart')
+
+        self.assertEqual(ImageDerivative.objects.count(), 4)
+        self.assertEqual(AccommodationImage.objects.get(accommodation=other_accommodation).variants, image.variants)
+
+        response = self.client.get(reverse('accommodation-detail', args=[self.accommodation.id]))
+        self.assertEqual(response.data['images'][0]['url'], image.variants['gallery']['jpeg'])
+        self.assertEqual(response.data['images'][0]['webp_url'], image.variants['gallery']['webp'])
+
+    def test_failed_upload_is_retried_until_max_attempts(self):
+        with self.settings(UPLOAD_STORAGE_BACKEND='uploads.tests.FailingBackend', UPLOAD_MAX_ATTEMPTS=2):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.add_image()
+            upload = Upload.objects.get()
+            self.assertEqual((upload.status, upload.attempts), (Upload.PENDING, 1))
+
+            self.assertEqual(process_pending_uploads(), {Upload.FAILED: 1})
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.error, 'storage unavailable')
+        self.assertFalse(Path(upload.staged_path).exists())
+        self.assertFalse(AccommodationImage.objects.exists())
+
+    def test_upload_status_is_visible_only_to_owner(self):
+        with self.captureOnCommitCallbacks():
+            self.add_image()
+        other = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client.force_authenticate(other)
+
+        response = self.client.get(reverse('upload-status', args=[Upload.objects.get().id]))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_image_upload_requires_staff(self):
+        guest = CustomUser.objects.create_user(username='guest', email='guest@example.com', password='password')
+        self.client.force_authenticate(guest)
+
+        self.assertEqual(self.add_image().status_code, 403)
+
+
+class UploadRetryTests(TransactionTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            UPLOAD_STORAGE_BACKEND='uploads.tests.FlakyBackend',
+            UPLOAD_STAGING_DIR=directory.name,
+            UPLOAD_WORKERS=1,
+            UPLOAD_RETRY_DELAY=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_failed_upload_is_retried_in_background(self):
+        FlakyBackend.failures = 1
+        staff = CustomUser.objects.create_user(username='staff', email='staff@example.com', password='password',
+                                               is_staff=True)
+        accommodation = create_accommodation(AccommodationType.objects.create(name='Отель', description='Отель'))
+        client = APIClient()
+        client.force_authenticate(staff)
+
+        response = client.post(reverse('accommodation-images-add', args=[accommodation.id]), {'image': png()},
+                               format='multipart')
+        self.assertEqual(response.status_code, 202)
+
+        upload = Upload.objects.get()
+        deadline = time.monotonic() + 10
+        while upload.status != Upload.DONE and time.monotonic() < deadline:
+            time.sleep(0.05)
+            upload.refresh_from_db()
+
+        self.assertEqual((upload.status, upload.attempts), (Upload.DONE, 2))
+        self.assertEqual(AccommodationImage.objects.get().image, upload.url)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import UploadStatusAPIView
+
+urlpatterns = [
+    path('<int:pk>/', UploadStatusAPIView.as_view(), name='upload-status'),
+]
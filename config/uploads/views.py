@@ -0,0 +1,35 @@
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.generics import RetrieveAPIView
+from rest_framework.permissions import IsAuthenticated
+
+from .models import Upload
+from .serializers import UploadSerializer
+
+
+class UploadStatusAPIView(RetrieveAPIView):
+    """
+    API для получения статуса загрузки изображения.
+
+    Параметры:
+    - id (int): Идентификатор загрузки, полученный при отправке изображения.
+
+    Ответы:
+    - 200 OK: Статус загрузки.
+        - status (str): pending - ожидает загрузки, processing - загружается, done - загружено, failed - ошибка.
+        - url (str): URL изображения в хранилище (для status = done).
+        - error (str): Текст последней ошибки загрузки.
+    - 401 Unauthorized: Пользователь не аутентифицирован.
+    - 404 Not Found: Загрузка не найдена или принадлежит другому пользователю.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = UploadSerializer
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Upload.objects.none()
+        return Upload.objects.filter(user=self.request.user)
+
+    @swagger_auto_schema(responses={200: UploadSerializer()})
+    def get(self, request, *args, **kwargs):
+        return self.retrieve(request, *args, **kwargs)
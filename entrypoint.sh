@@ -1,4 +1,18 @@
 python3 config/manage.py collectstatic --no-input;
 python3 config/manage.py migrate;
+python3 config/manage.py maintain_booking_partitions;
+python3 config/manage.py import_catalog accommodation_types config/catalog/accommodation_types.ndjson;
+python3 config/manage.py import_catalog accommodations config/catalog/accommodations.ndjson;
+python3 config/manage.py import_catalog accommodation_images config/catalog/accommodation_images.ndjson;
+python3 config/manage.py import_catalog stay_dates config/catalog/stay_dates.ndjson;
 python3 config/manage.py loaddata config/fixtures.json;
+python3 config/manage.py normalize_prices;
+python3 config/manage.py rebuild_rollups;
+python3 config/manage.py rebuild_similarity_index;
+python3 config/manage.py rebuild_availability --interval 86400 &
+python3 config/manage.py expire_booking_holds --interval 60 &
+python3 config/manage.py relay_outbox --interval 5 &
+python3 config/manage.py process_uploads --interval 60 &
+python3 config/manage.py purge_idempotency_keys --interval 3600 &
+python3 config/manage.py maintain_booking_partitions --interval 86400 &
 python3 config/manage.py runserver 0.0.0.0:8000;
\ No newline at end of file